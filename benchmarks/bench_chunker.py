@@ -0,0 +1,78 @@
+"""Micro-benchmark: split_text_into_chunks against the old per-word re-encoding chunker.
+
+Usage: python benchmarks/bench_chunker.py [--pages 20] [--max-tokens 2000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from main import get_token_encoder, split_text_into_chunks
+
+WORDS = [
+    "DEED", "OF", "TRUST", "THIS", "made", "and", "entered", "into", "by", "between", "Grantor",
+    "Grantee", "Fairfax", "County", "Virginia", "Tax", "Map", "Parcel", "0394-01-0012", "Lot",
+    "Block", "Section", "recorded", "in", "Deed", "Book", "Page", "Instrument", "2024000123",
+    "LIS", "PENDENS", "Plaintiff", "Defendant", "property", "known", "as", "Street", "Road",
+    "Court", "Circuit", "Clerk", "Notary", "Public", "Commonwealth", "witness", "signature",
+]
+
+
+def make_ocr_text(pages, words_per_page=600, seed=7):
+    """Build text shaped like EasyOCR output of a multi-page deed."""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(pages * words_per_page))
+
+
+def quadratic_split(text, max_tokens=2000):
+    """The previous implementation, kept here as the baseline."""
+    enc = get_token_encoder()
+    words = text.split()
+    chunks, current_chunk = [], []
+    for word in words:
+        current_chunk.append(word)
+        token_count = len(enc.encode(" ".join(current_chunk)))
+        if token_count > max_tokens:
+            chunks.append(" ".join(current_chunk[:-1]))
+            current_chunk = [word]
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    return chunks
+
+
+def best_of(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_ocr_text(args.pages)
+    enc = get_token_encoder()
+    print(f"Input: {args.pages} pages, {len(text.split())} words, {len(enc.encode(text))} tokens")
+
+    old_time, old_chunks = best_of(lambda: quadratic_split(text, args.max_tokens), args.repeat)
+    new_time, new_chunks = best_of(lambda: split_text_into_chunks(text, args.max_tokens), args.repeat)
+    largest = max(len(enc.encode(chunk)) for chunk in new_chunks)
+
+    print(f"old chunker: {old_time * 1000:9.1f} ms  {len(old_chunks)} chunks")
+    print(f"new chunker: {new_time * 1000:9.1f} ms  {len(new_chunks)} chunks (largest {largest} tokens)")
+    print(f"speedup:     {old_time / new_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
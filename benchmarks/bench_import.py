@@ -0,0 +1,82 @@
+"""Startup benchmark: time and peak memory of importing main, with and without preloading the pipeline.
+
+Each measurement runs in a fresh interpreter started in a scratch directory,
+and the slowest imports are listed from python -X importtime.
+
+Usage: python benchmarks/bench_import.py [--repeat 5] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MEASURE = """
+import resource, sys, time
+started = time.perf_counter()
+import main
+{extra}
+elapsed = time.perf_counter() - started
+heavy = [m for m in ("selenium.webdriver", "lxml", "webdriver_manager", "openai", "tiktoken", "PIL.Image", "bs4", "pyarrow", "pandas", "pymupdf", "easyocr", "torch") if m in sys.modules]
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, ",".join(heavy) or "-")
+"""
+
+SCENARIOS = [
+    ("import main (API only)", ""),
+    ("import main + GET / handler", "main.root()"),
+    ("import main + preload_pipeline()", "main.preload_pipeline()"),
+]
+
+
+def run_python(code, cwd, *flags):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]))
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def measure(code, repeat, cwd):
+    best = None
+    for _ in range(repeat):
+        lines = run_python(code, cwd).stdout.strip().splitlines()
+        elapsed, maxrss, heavy = lines[-1].split(" ")
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        rss_mb = int(maxrss) / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        if best is None or float(elapsed) < best[0]:
+            best = (float(elapsed), rss_mb, heavy)
+    return best
+
+
+def slowest_imports(cwd, top):
+    stderr = run_python("import main", cwd, "-X", "importtime").stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            entries.append((int(cumulative), name.rstrip()))
+        except ValueError:
+            continue
+    # Only first-level imports of main, so nested modules are not counted twice
+    direct = [(us, name.strip()) for us, name in entries if name.startswith("   ") and not name.startswith("    ")]
+    return sorted(direct, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        for label, extra in SCENARIOS:
+            elapsed, rss_mb, heavy = measure(MEASURE.format(extra=extra), args.repeat, cwd)
+            print(f"{label:34s} {elapsed * 1000:8.0f} ms  {rss_mb:6.0f} MB peak  heavy modules loaded: {heavy}")
+        print("\nSlowest imports of main (cumulative):")
+        for us, name in slowest_imports(cwd, args.top):
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
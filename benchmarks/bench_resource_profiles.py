@@ -0,0 +1,106 @@
+"""Browser benchmark: bytes, requests and load time per page step with the full and lean resource profiles.
+
+Drives real Chrome (through main.setup_driver) against the mock CPAN site,
+whose pages carry a stylesheet, a web font and images like the real ones:
+login page, CPAN home, search results and a document viewer tab, once per
+profile. Bytes are counted on both sides: what the page's Performance API
+reports, and what the mock server actually sent.
+
+Usage: python benchmarks/bench_resource_profiles.py [--repeat 3] [--latency 0.05] [--rows-per-day 12]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from mock_cpan import start_mock_cpan
+
+STEPS = ["login_page", "cpan_home", "search_results", "viewer"]
+
+
+def run_steps(main, server, profile):
+    """One pass over the scraper's pages; returns {step: (seconds, bytes the server sent)}."""
+    from selenium.webdriver.common.by import By
+
+    driver = main.setup_driver()
+    if isinstance(driver, str):
+        sys.exit(f"Could not start Chrome: {driver}")
+    results = {}
+    profiles = main.resource_profiles
+
+    def step(name, action):
+        sent_before = sum(server.bytes_sent.values())
+        started = time.perf_counter()
+        action()
+        main.wait_for_page_settled(driver, timeout=30)
+        elapsed = time.perf_counter() - started
+        profiles.measure(driver, name)
+        results[name] = (elapsed, sum(server.bytes_sent.values()) - sent_before)
+
+    def log_in():
+        driver.find_element(By.ID, "username").send_keys("bench")
+        driver.find_element(By.ID, "password").send_keys("bench")
+        driver.find_element(By.XPATH, "//input[@type='submit']").click()
+        driver.get(server.cpan_url)
+
+    def search():
+        driver.execute_script("document.getElementById('LR_startdate').value = '01/01/2024';"
+                              "document.getElementById('LR_enddate').value = '01/07/2024';"
+                              "document.querySelector('#deedDocTypeDT option[value=LP]').selected = true;")
+        driver.find_element(By.ID, "Search").click()
+        main.wait_for_element_with_retry(driver, By.CSS_SELECTOR, "table.k-grid-table", timeout=30)
+
+    def open_viewer():
+        details = driver.find_element(By.CSS_SELECTOR, "img.imgIcon").get_attribute("onclick").split("'")[1]
+        driver.switch_to.new_window("tab")
+        driver.get(server.base_url + details)
+
+    try:
+        profiles.apply(driver, profile)
+        step("login_page", lambda: driver.get(server.login_url))
+        step("cpan_home", log_in)
+        step("search_results", search)
+        step("viewer", open_viewer)
+    finally:
+        driver.quit()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rows-per-day", type=int, default=12)
+    args = parser.parse_args()
+
+    server = start_mock_cpan(latency=args.latency, rows_per_day=args.rows_per_day)
+    os.environ.update(LOGIN_URL=server.login_url, CPAN_URL=server.cpan_url, RESOURCE_PROFILE="full")
+    # Screenshots and caches go to fairfax/ under the working directory
+    os.chdir(tempfile.mkdtemp(prefix="bench_resources_"))
+    import main as app
+
+    totals = {}
+    for _ in range(args.repeat):
+        for profile in ("full", "lean"):
+            for name, (elapsed, sent) in run_steps(app, server, profile).items():
+                best = totals.setdefault((profile, name), [elapsed, sent])
+                best[0] = min(best[0], elapsed)
+                best[1] = min(best[1], sent)
+
+    summary = app.resource_profiles.summary()
+    print(f"{'step':16s} {'profile':8s} {'best ms':>8s} {'server KB':>10s} {'page KB':>8s} {'requests':>9s}")
+    for name in STEPS:
+        for profile in ("full", "lean"):
+            elapsed, sent = totals[(profile, name)]
+            # The viewer tab is never blocked, so it is measured under the full profile in both passes
+            page = summary.get(name, {}).get(profile) or summary.get(name, {}).get("full", {})
+            print(f"{name:16s} {profile:8s} {elapsed * 1000:8.0f} {sent / 1024:10.1f} {page.get('avg_kb', 0):8.1f} {page.get('avg_requests', 0):9.1f}")
+        full, lean = totals[("full", name)], totals[("lean", name)]
+        print(f"{'':16s} {'saved':8s} {(full[0] - lean[0]) * 1000:8.0f} {(full[1] - lean[1]) / 1024:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
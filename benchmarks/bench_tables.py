@@ -0,0 +1,154 @@
+"""Micro-benchmark: lxml grid table parsing against the old BeautifulSoup html.parser version.
+
+The fixture is a saved-page-shaped CPAN results grid (Kendo markup, hidden
+columns, page chrome and scripts around it) built from the mock CPAN filings
+and written to benchmarks/fixtures/ the first time it is needed.
+
+Usage: python benchmarks/bench_tables.py [--rows 5000] [--repeat 3] [--refresh]
+"""
+import argparse
+import html
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bs4 import BeautifulSoup
+
+from mock_cpan import filings_for_day
+from tables import find_grid_tables, grid_records, parse_grid_html, parse_grid_table
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+COLUMNS = [
+    ("Id", "Id", True),
+    ("", None, False),
+    ("Record Date", "RecordDate", False),
+    ("Doc Type", "DocType", False),
+    ("Instrument Number", "InstrumentNumber", False),
+    ("Grantor", "Grantor", False),
+    ("Address", "Address", False),
+    ("Tax Map", "Apn", False),
+]
+
+
+def make_grid_page(rows):
+    """A full CPAN results page whose grid holds the given number of rows."""
+    filings = []
+    day = date(2024, 1, 1)
+    while len(filings) < rows:
+        filings.extend(filings_for_day(day, 12))
+        day += timedelta(days=1)
+    parts = ["<!DOCTYPE html><html><head><title>CPAN - Land Records</title>"]
+    # Saved pages carry a lot of inline script and style next to the grid
+    parts.append("<script>" + "var cpanConfig = {};\n" * 2000 + "</script>")
+    parts.append("<style>" + ".k-grid td { padding: 4px; }\n" * 500 + "</style></head><body>")
+    parts.append("<nav>" + "".join(f"<a href='/cpan/menu/{n}'>Menu {n}</a>" for n in range(200)) + "</nav>")
+    parts.append("<div id='SearchResultsGrid' class='k-grid k-grid-md'>")
+    parts.append("<table class=\"k-grid-table k-table k-table-md k-selectable\" role=\"grid\"><thead class='k-table-thead'><tr class='k-table-row'>")
+    for title, field, hidden in COLUMNS:
+        style = " style=\"display: none\"" if hidden else ""
+        parts.append(f"<th class='k-header k-table-th' data-field='{field or ''}'{style}><span class='k-link'><span class='k-column-title'>{title}</span></span></th>")
+    parts.append("</tr></thead><tbody class='k-table-tbody'>")
+    for n, filing in enumerate(filings[:rows]):
+        parts.append(f"<tr class='k-table-row k-master-row{' k-alt' if n % 2 else ''}' data-uid='row-{n}' role='row'>")
+        for title, field, hidden in COLUMNS:
+            style = " style=\"display: none\"" if hidden else ""
+            if field is None:
+                cell = "<img class='imgIcon' src='../Images/ImageIcon.gif' alt='details'>"
+            else:
+                cell = html.escape(str(filing[field]))
+            parts.append(f"<td class='k-table-td' role='gridcell'{style}>{cell}</td>")
+        parts.append("</tr>")
+    parts.append("</tbody></table></div>")
+    parts.append("<footer>" + "<p>Fairfax County Circuit Court</p>" * 100 + "</footer></body></html>")
+    return "".join(parts)
+
+
+def load_fixture(rows, refresh=False):
+    path = os.path.join(FIXTURE_DIR, f"grid_{rows}.html")
+    if refresh or not os.path.exists(path):
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(make_grid_page(rows))
+    with open(path, encoding="utf-8") as f:
+        return path, f.read()
+
+
+def bs4_parse_page(page_source):
+    """The previous implementation, kept here as the baseline."""
+    soup = BeautifulSoup(page_source, "html.parser")
+    tables = soup.find_all("table", class_="k-grid-table k-table k-table-md k-selectable")
+    results = []
+    for table in tables:
+        headers = []
+        thead = table.find("thead")
+        if thead:
+            header_row = thead.find("tr")
+            if header_row:
+                for th in header_row.find_all("th"):
+                    style = th.get("style", "")
+                    if "display: none" not in style:
+                        col_title = th.find("span", class_="k-column-title")
+                        if col_title:
+                            headers.append(col_title.get_text(strip=True))
+                        else:
+                            headers.append(th.get_text(strip=True))
+        rows = []
+        tbody = table.find("tbody")
+        if tbody:
+            for tr in tbody.find_all("tr"):
+                row = []
+                for td in tr.find_all("td"):
+                    style = td.get("style", "")
+                    if "display: none" not in style:
+                        row.append(td.get_text(strip=True))
+                if row:
+                    rows.append(row)
+        results.append((headers, rows))
+    return results
+
+
+def lxml_parse_page(page_source):
+    return [parse_grid_table(table) for table in find_grid_tables(page_source)]
+
+
+def best_of(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--refresh", action="store_true", help="rebuild the fixture")
+    args = parser.parse_args()
+
+    path, page_source = load_fixture(args.rows, args.refresh)
+    start = page_source.index("<table")
+    table_html = page_source[start:page_source.index("</table>", start) + len("</table>")]
+    print(f"Fixture: {path} ({len(page_source) / 1e6:.1f} MB page, {len(table_html) / 1e6:.1f} MB grid, {args.rows} rows)")
+
+    old_time, old_tables = best_of(lambda: bs4_parse_page(page_source), args.repeat)
+    page_time, new_tables = best_of(lambda: lxml_parse_page(page_source), args.repeat)
+    grid_time, grid_table = best_of(lambda: parse_grid_html(table_html), args.repeat)
+    typed_time, records = best_of(lambda: grid_records(*grid_table), args.repeat)
+    if new_tables != old_tables or [grid_table] != old_tables:
+        sys.exit("lxml parser output differs from the BeautifulSoup baseline")
+
+    print(f"bs4 html.parser, whole page: {old_time * 1000:9.1f} ms")
+    print(f"lxml, whole page:            {page_time * 1000:9.1f} ms  ({old_time / page_time:.1f}x)")
+    print(f"lxml, grid subtree only:     {grid_time * 1000:9.1f} ms  ({old_time / grid_time:.1f}x)")
+    print(f"typed records:               {typed_time * 1000:9.1f} ms  e.g. {records[0]}")
+
+
+if __name__ == "__main__":
+    main()
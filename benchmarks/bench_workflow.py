@@ -0,0 +1,183 @@
+"""End-to-end benchmark: the full workflow against the mock CPAN site and the fake OpenAI server.
+
+Both servers run in this process; each repetition imports main in a fresh
+interpreter, in a scratch directory, and runs one search through login,
+results grid export, document lookup, downloads, text extraction/OCR and
+LLM extraction. Reported per run: rows/minute, per-stage latency (from
+step_timings) and peak memory of the app process and of its largest OCR
+worker. --save writes the best run to a JSON file; --compare checks a run
+against such a file and exits with status 1 if rows/minute dropped by more
+than --tolerance or a stage got that much slower on average.
+
+HTTP mode (CPAN_HTTP_MODE) is used unless --browser is given, which needs
+Chrome and chromedriver. Caches start empty unless --warm-cache is given, in
+which case every repetition after the first reuses the OCR and LLM cache.
+
+Usage: python benchmarks/bench_workflow.py [--days 10] [--rows-per-day 12] [--page-size 50] [--tiff-every 4]
+       [--latency 0.02] [--llm-latency 0.2] [--repeat 3] [--browser] [--warm-cache]
+       [--save results.json] [--compare baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_openai import start_fake_openai
+from mock_cpan import search_filings, start_mock_cpan
+
+START_DATE = date(2024, 1, 1)
+DOC_TYPES = ["LP", "ST"]
+
+RUN = """
+import json, resource, sys, time
+from collections import defaultdict
+from datetime import date
+
+started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - started
+samples = defaultdict(list)
+main.step_timings.add_listener(lambda step, seconds: samples[step].append(seconds))
+results = []
+started = time.perf_counter()
+outcome = main.run_fairfax_workflow(
+    on_result=results.append, doc_types={doc_types!r}, start_date=date.fromisoformat({start!r}),
+    end_date=date.fromisoformat({end!r}), output_dir="fairfax", run_id="bench",
+)
+seconds = time.perf_counter() - started
+# Wait for the OCR workers to exit so their peak memory shows up in RUSAGE_CHILDREN
+main.ocr_pool.executor.shutdown(wait=True)
+stages = {{}}
+for step, values in samples.items():
+    values.sort()
+    stages[step] = {{
+        "count": len(values),
+        "avg_ms": 1000 * sum(values) / len(values),
+        "p50_ms": 1000 * values[len(values) // 2],
+        "p95_ms": 1000 * values[min(len(values) - 1, int(len(values) * 0.95))],
+        "total_s": sum(values),
+    }}
+print(json.dumps({{
+    "outcome": outcome,
+    "rows": len(results),
+    "seconds": seconds,
+    "import_seconds": import_seconds,
+    "stages": stages,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "worker_max_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+}}))
+"""
+
+
+def run_once(env, start, end):
+    """Run the workflow in a fresh interpreter and return its measurements."""
+    code = RUN.format(doc_types=DOC_TYPES, start=start.isoformat(), end=end.isoformat())
+    with tempfile.TemporaryDirectory(prefix="bench_workflow_") as cwd:
+        process = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        sys.exit(f"Workflow run failed:\n{process.stderr[-4000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["rows_per_minute"] = 60 * result["rows"] / result["seconds"] if result["seconds"] else 0.0
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    result["max_rss_mb"] = result.pop("max_rss_kb") / scale
+    result["worker_max_rss_mb"] = result.pop("worker_max_rss_kb") / scale
+    return result
+
+
+def report(result, expected_rows):
+    print(f"rows: {result['rows']} of {expected_rows}  time: {result['seconds']:.1f} s  "
+          f"rows/minute: {result['rows_per_minute']:.1f}  import: {result['import_seconds'] * 1000:.0f} ms")
+    print(f"peak memory: app {result['max_rss_mb']:.0f} MB, largest OCR worker {result['worker_max_rss_mb']:.0f} MB")
+    print(f"{'stage':18s} {'count':>6s} {'avg ms':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'total s':>9s}")
+    for step, stats in sorted(result["stages"].items(), key=lambda item: -item[1]["total_s"]):
+        print(f"{step:18s} {stats['count']:6d} {stats['avg_ms']:9.1f} {stats['p50_ms']:9.1f} {stats['p95_ms']:9.1f} {stats['total_s']:9.2f}")
+
+
+def regressions(result, baseline, tolerance):
+    """What got worse than baseline by more than tolerance (a fraction)."""
+    found = []
+    if result["rows_per_minute"] < baseline["rows_per_minute"] * (1 - tolerance):
+        found.append(f"rows/minute {result['rows_per_minute']:.1f} < {baseline['rows_per_minute']:.1f}")
+    for step, stats in result["stages"].items():
+        before = baseline["stages"].get(step)
+        # Stages of a few milliseconds are mostly noise
+        if before and before["avg_ms"] >= 10 and stats["avg_ms"] > before["avg_ms"] * (1 + tolerance):
+            found.append(f"{step} avg {stats['avg_ms']:.1f} ms > {before['avg_ms']:.1f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=10, help="length of the searched date range")
+    parser.add_argument("--rows-per-day", type=int, default=12)
+    parser.add_argument("--page-size", type=int, default=50, help="results grid page size")
+    parser.add_argument("--tiff-every", type=int, default=4, help="every Nth filing is a TIFF scan (0: PDFs only)")
+    parser.add_argument("--latency", type=float, default=0.02, help="mock CPAN latency per request, seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake OpenAI latency per request, seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--browser", action="store_true", help="drive Chrome instead of CPAN_HTTP_MODE")
+    parser.add_argument("--warm-cache", action="store_true", help="share the OCR/LLM cache between repetitions")
+    parser.add_argument("--save", help="write the best run to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    cpan = start_mock_cpan(rows_per_day=args.rows_per_day, latency=args.latency, page_size=args.page_size, tiff_every=args.tiff_every)
+    llm = start_fake_openai(latency=args.llm_latency)
+    start, end = START_DATE, START_DATE + timedelta(days=args.days - 1)
+    expected_rows = len(search_filings(start, end, DOC_TYPES, args.rows_per_day))
+    cache_dir = tempfile.mkdtemp(prefix="bench_workflow_cache_")
+    # The OpenAI account's rate limits would dominate the numbers; they still apply if set explicitly
+    env = dict(LLM_REQUESTS_PER_MINUTE="100000", LLM_TOKENS_PER_MINUTE="100000000")
+    env.update(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]),
+        LOGIN_URL=cpan.login_url,
+        CPAN_URL=cpan.cpan_url,
+        CPAN_HTTP_MODE="false" if args.browser else "true",
+        GRID_PAGE_SIZE=str(args.page_size),
+        OPENAI_BASE_URL=llm.base_url,
+        OPENAI_API_KEY="bench",
+        CACHE_ENABLED="true" if args.warm_cache else "false",
+        CACHE_PATH=os.path.join(cache_dir, "cache.sqlite3"),
+        INDEX_ENABLED="false",
+        SESSION_STORE_ENABLED="false",
+    )
+    scans = f"one in {args.tiff_every} a TIFF scan" if args.tiff_every else "all PDFs"
+    print(f"Searching {args.days} days ({expected_rows} rows, {scans}), "
+          f"{'browser' if args.browser else 'HTTP'} mode, {args.repeat} run(s)")
+
+    best = None
+    for n in range(args.repeat):
+        result = run_once(env, start, end)
+        print(f"\nRun {n + 1}: {result['outcome']}")
+        report(result, expected_rows)
+        if best is None or result["rows_per_minute"] > best["rows_per_minute"]:
+            best = result
+    print(f"\nBest: {best['rows_per_minute']:.1f} rows/minute, {llm.requests} LLM requests, "
+          f"{sum(cpan.hits.values())} CPAN requests over all runs")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({**best, "args": vars(args)}, f, indent=2)
+        print(f"Saved to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        found = regressions(best, baseline, args.tolerance)
+        if found:
+            print(f"Regressions against {args.compare}:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
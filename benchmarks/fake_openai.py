@@ -0,0 +1,119 @@
+"""Minimal OpenAI-compatible chat completions server for local runs.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 and any
+OPENAI_API_KEY. Every reply is a fixed extraction JSON, or with echo the last
+message sent; latency and injected 429/500 failures are configurable so rate
+limiting and retries can be exercised.
+
+Usage: python benchmarks/fake_openai.py [--port 8100] [--latency 0.2] [--fail-every 5] [--echo]
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EXTRACTION_REPLY = {
+    "date": "2024-05-01",
+    "owner_name": "John Doe",
+    "address": "123 Main St, Fairfax, VA 22030",
+    "apn_taxid": "0394-01-0012",
+}
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, fail_every=0, fail_status=429, echo=False):
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.echo = echo
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        number = next(server.counter)
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            if server.fail_every and number % server.fail_every == 0:
+                with server.lock:
+                    server.failures += 1
+                self._send(server.fail_status, {"error": {"message": "injected failure", "type": "rate_limit_error"}},
+                           headers={"Retry-After": "0.1"})
+                return
+            messages = [m.get("content", "") for m in body.get("messages", []) if isinstance(m.get("content"), str)]
+            prompt = "".join(messages)
+            content = messages[-1] if server.echo and messages else json.dumps(EXTRACTION_REPLY)
+            self._send(200, {
+                "id": f"chatcmpl-{number}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 40, "total_tokens": len(prompt) // 4 + 40},
+            })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_fake_openai(host="127.0.0.1", port=0, latency=0.0, fail_every=0, fail_status=429, echo=False):
+    """Start the server on a background thread and return it (see .base_url)."""
+    server = FakeOpenAIServer((host, port), latency=latency, fail_every=fail_every, fail_status=fail_status, echo=echo)
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=429)
+    parser.add_argument("--echo", action="store_true", help="reply with the last message instead of the extraction JSON")
+    args = parser.parse_args()
+    server = FakeOpenAIServer((args.host, args.port), args.latency, args.fail_every, args.fail_status, args.echo)
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    server.serve_forever()
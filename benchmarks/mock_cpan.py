@@ -0,0 +1,428 @@
+"""Local stand-in for the MyFairfax login and the CPAN Land Records search.
+
+Serves the pages and endpoints the scraper talks to: the login form, the CPAN
+search form, the Kendo grid read action (JSON, paged), document details pages
+and generated PDFs, or TIFF scans for every --tiff-every'th filing. Pages also pull in a stylesheet, a web font and images
+the way the real site does, so resource blocking can be measured. The results
+page carries a small stand-in for jQuery and the Kendo grid (pageSize(), page()
+and the pager's next button, reading pages from the grid read action), so the
+browser workflow's paging is exercised too. Point the app at it with
+
+    LOGIN_URL=http://127.0.0.1:<port>/myfairfax/auth/forms/ffx-choose-login.jsp
+    CPAN_URL=http://127.0.0.1:<port>/cpan/
+
+Usage: python benchmarks/mock_cpan.py [--port 8200] [--rows-per-day 12] [--latency 0.05] [--tiff-every 0] [--no-page-assets]
+"""
+import argparse
+import html
+import io
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pymupdf
+from PIL import Image, ImageDraw
+
+LOGIN_PATH = "/myfairfax/auth/forms/ffx-choose-login.jsp"
+SESSION_COOKIE = "FFXSESSION"
+
+DOC_TYPES = ["LP", "ST", "DE"]
+GRANTORS = ["SMITH JOHN", "DOE JANE", "NGUYEN THANH", "GARCIA MARIA", "PATEL RAJ", "KIM SOO", "BROWN DAVID"]
+STREETS = ["MAIN ST", "LEE HWY", "BRADDOCK RD", "OX RD", "CHAIN BRIDGE RD", "GALLOWS RD"]
+
+LOGIN_PAGE = """<html><body>
+<form method="post" action="/myfairfax/auth/login">
+  <input type="hidden" name="csrf" value="{csrf}">
+  <input type="text" id="username" name="username">
+  <input type="password" id="password" name="password">
+  <input type="submit" value="Log In">
+</form>
+</body></html>"""
+
+SEARCH_PAGE = """<html><body><div>
+<button id="SearchButton">Search</button>
+<a id="SideMenu_LandRecords" href="#">Land Records</a>
+<form method="post" action="/cpan/LandRecords/Search">
+  <input type="hidden" name="__RequestVerificationToken" value="{token}">
+  <select id="LR_SearchType_SearchBy" name="LR_SearchType.SearchBy">
+    <option value="1">NAME</option><option value="3">DOCUMENT TYPE</option>
+  </select>
+  <select id="deedDocTypeDT" name="LR_SearchType.DocTypes" multiple>
+    <option value="LP">LIS PENDENS</option><option value="ST">SUBSTITUTE TRUSTEE</option><option value="DE">DEED</option>
+  </select>
+  <select id="Search_LRStartDate" name="LR_SearchType.Range"><option>7 Days Ago</option></select>
+  <input id="LR_startdate" name="LR_SearchType.StartDate">
+  <input id="LR_enddate" name="LR_SearchType.EndDate">
+  <button id="Search" type="submit">Search</button>
+</form>
+</div></body></html>"""
+
+RESULTS_PAGE = """<html><body><div><div><div>
+<div></div><div></div>
+<div class="k-grid" id="grid" data-total="{total}">
+<table class="k-grid-table k-table k-table-md k-selectable">
+<thead><tr><th><span class="k-column-title"></span></th><th><span class="k-column-title">Record Date</span></th>
+<th><span class="k-column-title">Doc Type</span></th><th><span class="k-column-title">Instrument Number</span></th>
+<th><span class="k-column-title">Grantor</span></th></tr></thead>
+<tbody>{rows}</tbody>
+</table>
+<div class="k-pager"><button class="k-pager-nav" title="Go to the next page"{next_disabled}>&gt;</button></div>
+</div>
+</div></div></div>
+<script src="/cpan/Scripts/grid.js"></script>
+<script>jQuery(function(){{jQuery("#grid").kendoGrid({{"dataSource":{{"type":"aspnetmvc-ajax","transport":{{"read":{{"url":"/cpan/LandRecords/Results_Read"}}}},"pageSize":{page_size},"serverPaging":true}}}});}});</script>
+</body></html>"""
+
+# Just enough of jQuery and the Kendo grid API for grid.py: dataSource.pageSize()/page() and the
+# pager's next button. A page change replaces the tbody rows, as Kendo does.
+GRID_SCRIPT = """(function () {
+  function renderRow(r) {
+    return '<tr><td><img class="imgIcon" src="../Images/ImageIcon.gif" onclick="window.open(\\'' + r.DetailsUrl + '\\')"></td>' +
+      '<td>' + r.RecordDate + '</td><td>' + r.DocType + '</td><td>' + r.InstrumentNumber + '</td><td>' + r.Grantor + '</td></tr>';
+  }
+  function Grid(root, options) {
+    var read = options.dataSource.transport.read.url;
+    var size = options.dataSource.pageSize, current = 1, total = parseInt(root.getAttribute('data-total'), 10);
+    var next = root.querySelector('.k-pager-nav');
+    function load(page) {
+      var body = 'sort=&page=' + page + '&pageSize=' + size + '&group=&filter=';
+      return fetch(read, {method: 'POST', headers: {'Content-Type': 'application/x-www-form-urlencoded'}, body: body})
+        .then(function (response) { return response.json(); })
+        .then(function (result) {
+          current = page;
+          total = result.Total;
+          root.querySelector('tbody').innerHTML = result.Data.map(renderRow).join('');
+          if (current * size < total) {
+            next.removeAttribute('disabled');
+            next.removeAttribute('aria-disabled');
+          } else {
+            next.setAttribute('disabled', 'disabled');
+            next.setAttribute('aria-disabled', 'true');
+          }
+        });
+    }
+    next.addEventListener('click', function () { if (current * size < total) { load(current + 1); } });
+    this.dataSource = {
+      pageSize: function (n) { if (n === undefined) { return size; } size = n; load(1); },
+      page: function (n) { if (n === undefined) { return current; } load(n); }
+    };
+  }
+  function wrap(elements) {
+    return {
+      closest: function (selector) { return wrap(elements.map(function (e) { return e.closest(selector); }).filter(Boolean)); },
+      data: function (key) { return elements.length ? elements[0]['__' + key] : undefined; },
+      kendoGrid: function (options) { elements.forEach(function (e) { e.__kendoGrid = new Grid(e, options); }); return this; }
+    };
+  }
+  window.jQuery = function (target) {
+    if (typeof target === 'function') {
+      return document.readyState === 'loading' ? document.addEventListener('DOMContentLoaded', target) : target();
+    }
+    return wrap(typeof target === 'string' ? Array.prototype.slice.call(document.querySelectorAll(target)) : [target]);
+  };
+})();
+"""
+
+RESULTS_ROW = """<tr><td><img class="imgIcon" src="../Images/ImageIcon.gif" onclick="window.open('{details}')"></td>
+<td>{RecordDate}</td><td>{DocType}</td><td>{InstrumentNumber}</td><td>{Grantor}</td></tr>"""
+
+DETAILS_PAGE = """<html><body>
+<select id="TIFForPDF"><option value="TIFF">TIFF</option><option value="PDF" selected>PDF</option></select>
+<div id="tiffImageViewer"><a href="/cpan/Documents/{id}.pdf">Document</a></div>
+</body></html>"""
+
+# Older filings only have a scanned image
+SCAN_DETAILS_PAGE = """<html><body>
+<select id="TIFForPDF"><option value="TIFF" selected>TIFF</option><option value="PDF">PDF</option></select>
+<div id="tiffImageViewer"><img class="iv-large-image" src="/cpan/Documents/{id}.tiff"></div>
+</body></html>"""
+
+# Page chrome added to every HTML page, and the static files it loads
+PAGE_CHROME = """<link rel="stylesheet" href="/assets/site.css">
+<img src="/assets/images/banner.jpg" alt="Fairfax County"><img src="/assets/images/seal.png" alt="">
+"""
+SITE_CSS = b"""@font-face { font-family: "Site"; src: url("/assets/fonts/site.woff2") format("woff2"); }
+body { font-family: "Site", sans-serif; }
+"""
+_asset_bytes = random.Random(0).randbytes
+PAGE_ASSETS = {
+    "/assets/site.css": (SITE_CSS, "text/css"),
+    "/assets/fonts/site.woff2": (_asset_bytes(60_000), "font/woff2"),
+    "/assets/images/banner.jpg": (_asset_bytes(180_000), "image/jpeg"),
+    "/assets/images/seal.png": (_asset_bytes(40_000), "image/png"),
+    "/cpan/Images/ImageIcon.gif": (_asset_bytes(2_000), "image/gif"),
+    "/cpan/Scripts/grid.js": (GRID_SCRIPT.encode("utf-8"), "text/javascript"),
+}
+
+DEED_TEXT = """COMMONWEALTH OF VIRGINIA - FAIRFAX COUNTY CIRCUIT COURT
+{title}
+Instrument Number {instrument}   Recorded {recorded}
+Grantor: {grantor}
+Property address: {address}, FAIRFAX, VA 22030
+Tax Map / APN: {apn}
+This instrument is recorded in the Land Records of Fairfax County, Virginia.
+"""
+
+
+def filings_for_day(day, rows_per_day):
+    """The same made-up filings for a given recording date every time it is searched."""
+    rng = random.Random(day.toordinal())
+    rows = []
+    for n in range(rows_per_day):
+        row_id = int(f"{day:%Y%m%d}{n:03d}")
+        rows.append({
+            "Id": row_id,
+            "RecordDate": day.strftime("%m/%d/%Y"),
+            "DocType": DOC_TYPES[(day.toordinal() + n) % len(DOC_TYPES)],
+            "InstrumentNumber": f"{day.year}{day.timetuple().tm_yday:03d}{n:04d}",
+            "Grantor": rng.choice(GRANTORS),
+            "Address": f"{rng.randint(100, 9999)} {rng.choice(STREETS)}",
+            "Apn": f"{rng.randint(10, 99):04d}-{rng.randint(1, 20):02d}-{rng.randint(1, 9999):04d}",
+            "DetailsUrl": f"/cpan/LandRecords/Details?id={row_id}",
+        })
+    return rows
+
+
+def deed_text(row):
+    """The text printed on a filing's document."""
+    return DEED_TEXT.format(
+        title="LIS PENDENS" if row["DocType"] == "LP" else "SUBSTITUTE TRUSTEE APPOINTMENT",
+        instrument=row["InstrumentNumber"], recorded=row["RecordDate"], grantor=row["Grantor"],
+        address=row["Address"], apn=row["Apn"],
+    )
+
+
+def search_filings(start, end, doc_types, rows_per_day):
+    """Filings recorded between start and end (inclusive) with one of doc_types."""
+    rows = []
+    day = start
+    while day <= end:
+        rows.extend(r for r in filings_for_day(day, rows_per_day) if r["DocType"] in doc_types)
+        day += timedelta(days=1)
+    return rows
+
+
+class MockCpanServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, rows_per_day=12, latency=0.0, page_size=10, username=None, password=None, page_assets=True, tiff_every=0):
+        super().__init__(address, MockCpanHandler)
+        self.rows_per_day = rows_per_day
+        self.latency = latency
+        self.page_size = page_size
+        self.username = username
+        self.password = password
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.documents = {}
+        self.page_assets = page_assets
+        self.tiff_every = tiff_every
+        self.hits = Counter()
+        self.bytes_sent = Counter()
+        self.logins = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def login_url(self):
+        return self.base_url + LOGIN_PATH
+
+    @property
+    def cpan_url(self):
+        return self.base_url + "/cpan/"
+
+    def is_scan(self, row_id):
+        """Whether a filing's document is a TIFF scan rather than a PDF."""
+        return bool(self.tiff_every) and int(row_id) % self.tiff_every == 0
+
+    def document_tiff(self, row):
+        """A 200 dpi, letter-size, one-bit scan of the filing's deed text."""
+        key = (row["Id"], "tiff")
+        with self.lock:
+            data = self.documents.get(key)
+        if data is None:
+            image = Image.new("1", (1700, 2200), 1)
+            draw = ImageDraw.Draw(image)
+            for n, line in enumerate(deed_text(row).splitlines()):
+                draw.text((150, 200 + n * 40), line, fill=0)
+            buffer = io.BytesIO()
+            image.save(buffer, format="TIFF", compression="group4")
+            data = buffer.getvalue()
+            with self.lock:
+                self.documents[key] = data
+        return data
+
+    def document_pdf(self, row):
+        with self.lock:
+            data = self.documents.get(row["Id"])
+        if data is None:
+            document = pymupdf.open()
+            page = document.new_page()
+            page.insert_text((72, 72), deed_text(row), fontsize=10)
+            data = document.tobytes()
+            document.close()
+            with self.lock:
+                self.documents[row["Id"]] = data
+        return data
+
+
+class MockCpanHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method):
+        server = self.server
+        url = urlsplit(self.path)
+        with server.lock:
+            server.hits[url.path] += 1
+        time.sleep(server.latency)
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"), keep_blank_values=True) if length else {}
+        session = self._session()
+        if url.path in PAGE_ASSETS:
+            return self._send(200, *PAGE_ASSETS[url.path])
+        if url.path == LOGIN_PATH:
+            return self._html(200, LOGIN_PAGE.format(csrf=secrets.token_hex(8)))
+        if url.path == "/myfairfax/auth/login" and method == "POST":
+            return self._login(form)
+        if url.path == "/myfairfax/":
+            return self._html(200, "<html><body><h1>Welcome to MyFairfax</h1></body></html>")
+        if not url.path.startswith("/cpan/"):
+            return self._send(404, b"not found", "text/plain")
+        if session is None:
+            return self._redirect(LOGIN_PATH)
+        if url.path == "/cpan/":
+            return self._html(200, SEARCH_PAGE.format(token=secrets.token_hex(8)))
+        if url.path == "/cpan/LandRecords/Search" and method == "POST":
+            return self._search(session, form)
+        if url.path == "/cpan/LandRecords/Results_Read" and method == "POST":
+            return self._read(session, form)
+        if url.path == "/cpan/LandRecords/Details":
+            row_id = parse_qs(url.query).get("id", ["0"])[0]
+            page = SCAN_DETAILS_PAGE if row_id.isdigit() and server.is_scan(row_id) else DETAILS_PAGE
+            return self._html(200, page.format(id=html.escape(row_id)))
+        if url.path.startswith("/cpan/Documents/") and url.path.endswith(".pdf"):
+            row = self._row(session, url.path.rsplit("/", 1)[1][:-4])
+            if row is None:
+                return self._send(404, b"not found", "text/plain")
+            return self._send(200, server.document_pdf(row), "application/pdf")
+        if url.path.startswith("/cpan/Documents/") and url.path.endswith(".tiff"):
+            row = self._row(session, url.path.rsplit("/", 1)[1][:-5])
+            if row is None:
+                return self._send(404, b"not found", "text/plain")
+            return self._send(200, server.document_tiff(row), "image/tiff")
+        return self._send(404, b"not found", "text/plain")
+
+    def _session(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == SESSION_COOKIE:
+                with self.server.lock:
+                    return self.server.sessions.get(value)
+        return None
+
+    def _login(self, form):
+        server = self.server
+        username = form.get("username", [""])[0]
+        password = form.get("password", [""])[0]
+        if not username or not password or (server.username and (username, password) != (server.username, server.password)):
+            return self._redirect(LOGIN_PATH)
+        token = secrets.token_hex(16)
+        with server.lock:
+            server.sessions[token] = {"rows": []}
+            server.logins += 1
+        self._redirect("/myfairfax/", cookie=f"{SESSION_COOKIE}={token}; Path=/; HttpOnly")
+
+    def _search(self, session, form):
+        def parse(value):
+            return date(int(value[6:10]), int(value[0:2]), int(value[3:5]))
+        try:
+            start = parse(form["LR_SearchType.StartDate"][0])
+            end = parse(form["LR_SearchType.EndDate"][0])
+        except (KeyError, ValueError):
+            return self._send(400, b"bad dates", "text/plain")
+        doc_types = form.get("LR_SearchType.DocTypes") or ["LP"]
+        rows = search_filings(start, end, doc_types, self.server.rows_per_day)
+        session["rows"] = rows
+        first_page = rows[:self.server.page_size]
+        self._html(200, RESULTS_PAGE.format(
+            rows="".join(RESULTS_ROW.format(details=r["DetailsUrl"], **r) for r in first_page),
+            next_disabled="" if len(rows) > len(first_page) else ' disabled aria-disabled="true"',
+            page_size=self.server.page_size,
+            total=len(rows),
+        ))
+
+    def _read(self, session, form):
+        page = int(form.get("page", ["1"])[0])
+        page_size = int(form.get("pageSize", [str(self.server.page_size)])[0])
+        rows = session["rows"]
+        data = rows[(page - 1) * page_size:page * page_size]
+        self._send(200, json.dumps({"Data": data, "Total": len(rows), "AggregateResults": None, "Errors": None}).encode("utf-8"),
+                   "application/json")
+
+    def _row(self, session, row_id):
+        for row in session["rows"]:
+            if str(row["Id"]) == row_id:
+                return row
+        return None
+
+    def _redirect(self, location, cookie=None):
+        self.send_response(302)
+        self.send_header("Location", location)
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _html(self, status, text):
+        if self.server.page_assets:
+            text = text.replace("<body>", "<body>" + PAGE_CHROME, 1)
+        self._send(status, text.encode("utf-8"), "text/html; charset=utf-8")
+
+    def _send(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server.lock:
+            self.server.bytes_sent[urlsplit(self.path).path] += len(data)
+
+
+def start_mock_cpan(host="127.0.0.1", port=0, rows_per_day=12, latency=0.0, page_size=10, page_assets=True, tiff_every=0):
+    """Start the server on a background thread and return it (see .login_url and .cpan_url)."""
+    server = MockCpanServer((host, port), rows_per_day=rows_per_day, latency=latency, page_size=page_size,
+                            page_assets=page_assets, tiff_every=tiff_every)
+    threading.Thread(target=server.serve_forever, name="mock-cpan", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock MyFairfax/CPAN site")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--rows-per-day", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--tiff-every", type=int, default=0, help="serve every Nth filing as a TIFF scan instead of a PDF")
+    parser.add_argument("--no-page-assets", action="store_true", help="serve bare pages without stylesheet, font and images")
+    args = parser.parse_args()
+    server = MockCpanServer((args.host, args.port), rows_per_day=args.rows_per_day, latency=args.latency, page_size=args.page_size,
+                            page_assets=not args.no_page_assets, tiff_every=args.tiff_every)
+    print(f"Mock CPAN listening on {server.cpan_url} (login at {server.login_url})")
+    server.serve_forever()
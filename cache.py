@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def hash_file(path, block_size=1024 * 1024):
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_text(*parts):
+    """sha256 over several strings, unambiguous about where one part ends"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = str(part).encode("utf-8")
+        digest.update(str(len(data)).encode("ascii") + b":")
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """On-disk cache keyed by content hashes, stored in a single SQLite file.
+
+    Entries expire after ttl_seconds and the least recently used ones are
+    evicted once the stored values exceed max_bytes. Hits and misses are
+    counted per namespace (the part of the key before the first ':'). The
+    SQLite file is only created when the cache is first used.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024, ttl_seconds=30 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._db = None
+        self._total_bytes = 0
+        self._stats = {}
+
+    @property
+    def _conn(self):
+        # Every caller holds self._lock
+        if self._db is None:
+            self._db = self._open()
+        return self._db
+
+    def _open(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created)")
+        conn.commit()
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        return conn
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, size, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds and now - row[2] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= row[1]
+                row = None
+            self._count(key, "hits" if row is not None else "misses")
+            if row is None:
+                return None
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict(now)
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            namespaces = {name: dict(counts) for name, counts in self._stats.items()}
+            total_bytes = self._total_bytes
+        return {"path": self.path, "entries": entries, "bytes": total_bytes, "max_bytes": self.max_bytes, "namespaces": namespaces}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _count(self, key, outcome):
+        counts = self._stats.setdefault(key.split(":", 1)[0], {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def _evict(self, now):
+        if self.ttl_seconds:
+            freed = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache WHERE created < ?", (now - self.ttl_seconds,)
+            ).fetchone()[0]
+            if freed:
+                self._conn.execute("DELETE FROM cache WHERE created < ?", (now - self.ttl_seconds,))
+                self._total_bytes -= freed
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under the limit. The
+        # cursor walks the accessed index and stops at the last entry to drop.
+        victims = []
+        cursor = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed")
+        try:
+            for key, size in cursor:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                victims.append((key,))
+                self._total_bytes -= size
+        finally:
+            cursor.close()
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
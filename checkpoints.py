@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+
+
+class CheckpointStore:
+    """One JSON file per workflow run, replaced atomically on every save; the folder is made by the first save."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+
+    def path(self, run_id):
+        return os.path.join(self.folder, f"{run_id}.json")
+
+    def save(self, run_id, state):
+        data = json.dumps(state, indent=2, ensure_ascii=False).encode("utf-8")
+        path = self.path(run_id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            if not os.path.exists(self.folder):
+                os.makedirs(self.folder)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+    def load(self, run_id):
+        try:
+            with open(self.path(run_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"Ignoring unreadable checkpoint {run_id}: {e}")
+            return None
+
+    def list(self):
+        states = []
+        if not os.path.isdir(self.folder):
+            return states
+        for name in sorted(os.listdir(self.folder)):
+            if name.endswith(".json"):
+                state = self.load(name[:-5])
+                if state is not None:
+                    states.append(state)
+        return states
+
+    def delete(self, run_id):
+        try:
+            os.remove(self.path(run_id))
+        except FileNotFoundError:
+            pass
+
+
+class RunCheckpoint:
+    """Progress of one run through the results grid, saved to a CheckpointStore.
+
+    A row is finished when the row loop leaves it, or, if it was queued for
+    extraction, when its result is in. The checkpoint keeps the highest row
+    number up to which every row is finished, together with the first row
+    number of each grid page, so a resumed run can open the grid at the right
+    page and skip the rows already finished. before_save, if given, is called
+    before every save so whatever the checkpoint vouches for (such as appended
+    results) can be made durable first.
+    """
+
+    def __init__(self, store, run_id, params, state=None, save_interval=1.0, before_save=None):
+        self.store = store
+        self.run_id = run_id
+        self.save_interval = save_interval
+        self.before_save = before_save
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._done = set()
+        self._last_save = 0.0
+        self.resumed = state is not None
+        self.state = state or {
+            "run_id": run_id,
+            "params": params,
+            "status": "running",
+            "rows_done": 0,
+            "pages_exported": 0,
+            "page_first_rows": {},
+            "shards": {},
+            "created_at": time.time(),
+        }
+        self.state["status"] = "running"
+        self._rows_done = self.state["rows_done"]
+
+    @property
+    def rows_done(self):
+        return self._rows_done
+
+    def resume_point(self):
+        """(page, first row number on that page) to restart reading the grid from."""
+        next_row = self._rows_done + 1
+        page, first_row = 1, 1
+        for page_number, page_first_row in self.state["page_first_rows"].items():
+            if page_first_row <= next_row and int(page_number) >= page:
+                page, first_row = int(page_number), page_first_row
+        return page, first_row
+
+    @property
+    def pages_exported(self):
+        return self.state["pages_exported"]
+
+    def page_started(self, page, first_row):
+        with self._lock:
+            self.state["page_first_rows"].setdefault(str(page), first_row)
+        self.save()
+
+    def page_exported(self, page):
+        """The page's rows have been written to the results CSV."""
+        with self._lock:
+            self.state["pages_exported"] = max(self.state["pages_exported"], page)
+        self.save()
+
+    def row_queued(self, row):
+        with self._lock:
+            self._queued.add(row)
+
+    def row_left(self, row):
+        """The browser is done with the row; it is finished unless it was queued for extraction."""
+        with self._lock:
+            if row in self._queued:
+                return
+        self.row_done(row)
+
+    def row_done(self, row):
+        with self._lock:
+            self._done.add(row)
+            while self._rows_done + 1 in self._done:
+                self._rows_done += 1
+                self._done.discard(self._rows_done)
+            self.state["rows_done"] = self._rows_done
+        self.save()
+
+    def shard_status(self, shard_id, status):
+        with self._lock:
+            self.state["shards"][shard_id] = status
+        self.save(force=True)
+
+    def finish(self, status="complete"):
+        with self._lock:
+            self.state["status"] = status
+        self.save(force=True)
+
+    def save(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_save < self.save_interval:
+                return
+            self._last_save = now
+            if self.before_save is not None:
+                self.before_save()
+            self.state["updated_at"] = time.time()
+            self.store.save(self.run_id, self.state)
@@ -0,0 +1,173 @@
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+# Names Chrome is installed under, tried in order when no binary is configured
+CHROME_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+CHROME_WINDOWS_PATHS = (
+    r"%PROGRAMFILES%\Google\Chrome\Application\chrome.exe",
+    r"%PROGRAMFILES(X86)%\Google\Chrome\Application\chrome.exe",
+    r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe",
+)
+CHROMEDRIVER_NAME = "chromedriver.exe" if sys.platform == "win32" else "chromedriver"
+# Where webdriver_manager keeps the drivers it has downloaded
+WDM_CACHE_DIRS = (os.path.join("~", ".wdm"), ".wdm")
+
+VERSION_PATTERN = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+
+
+class ChromedriverNotFound(Exception):
+    """Raised when no chromedriver matching the installed Chrome can be found."""
+
+
+def _version_of(binary, timeout=10):
+    """Full version string reported by `binary --version`, or None."""
+    try:
+        output = subprocess.run(
+            [binary, "--version"], capture_output=True, text=True, timeout=timeout,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = VERSION_PATTERN.search(output or "")
+    return match.group(0) if match else None
+
+
+def _major(version):
+    return int(version.split(".", 1)[0]) if version else None
+
+
+def _is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+class ChromedriverResolver:
+    """Finds the chromedriver to launch Chrome with, once per process.
+
+    Candidates are tried in order: the configured path, the path resolved by
+    an earlier run (cached in cache_path), chromedriver on PATH, and drivers
+    webdriver_manager downloaded before. The first one whose major version
+    matches the installed Chrome wins. Only if none does, and allow_download
+    is set, is webdriver_manager asked to download one; with allow_download
+    off nothing touches the network. If the Chrome version cannot be
+    determined, the first candidate that runs is used.
+    """
+
+    def __init__(self, configured_path=None, chrome_binary=None, cache_path=None, allow_download=True):
+        self.configured_path = configured_path
+        self.chrome_binary = chrome_binary
+        self.cache_path = cache_path
+        self.allow_download = allow_download
+        self._lock = threading.Lock()
+        self._resolved = None
+
+    def resolve(self):
+        """Path of a usable chromedriver; raises ChromedriverNotFound if there is none."""
+        if self._resolved is not None:
+            return self._resolved["path"]
+        with self._lock:
+            if self._resolved is None:
+                started = time.perf_counter()
+                resolved = self._resolve()
+                resolved["seconds"] = round(time.perf_counter() - started, 3)
+                print(f"Using chromedriver {resolved['driver_version'] or '(unknown version)'} from {resolved['source']}: {resolved['path']}")
+                self._resolved = resolved
+                self._save_cache(resolved)
+        return self._resolved["path"]
+
+    def info(self):
+        return dict(self._resolved) if self._resolved is not None else {"resolved": False}
+
+    def chrome_version(self):
+        binary = self.find_chrome()
+        return _version_of(binary) if binary else None
+
+    def find_chrome(self):
+        if self.chrome_binary:
+            return self.chrome_binary
+        for name in CHROME_NAMES:
+            path = shutil.which(name)
+            if path:
+                return path
+        if sys.platform == "win32":
+            for path in CHROME_WINDOWS_PATHS:
+                path = os.path.expandvars(path)
+                if os.path.isfile(path):
+                    return path
+        return None
+
+    def _resolve(self):
+        chrome_version = self.chrome_version()
+        chrome_major = _major(chrome_version)
+        rejected = []
+        for source, path in self._candidates():
+            if not _is_executable(path):
+                if source == "config":
+                    rejected.append(f"{path} (config: not an executable file)")
+                    print(f"Skipping chromedriver {rejected[-1]}")
+                continue
+            driver_version = _version_of(path)
+            if driver_version is None:
+                rejected.append(f"{path} ({source}: does not run)")
+                print(f"Skipping chromedriver {rejected[-1]}")
+                continue
+            if chrome_major is not None and _major(driver_version) != chrome_major:
+                rejected.append(f"{path} ({source}: version {driver_version}, Chrome is {chrome_version})")
+                print(f"Skipping chromedriver {rejected[-1]}")
+                continue
+            return {"path": path, "source": source, "driver_version": driver_version, "chrome_version": chrome_version}
+        if self.allow_download:
+            path = self._download()
+            return {"path": path, "source": "download", "driver_version": _version_of(path), "chrome_version": chrome_version}
+        raise ChromedriverNotFound(
+            f"No chromedriver for Chrome {chrome_version or '(version unknown)'} and downloads are disabled; "
+            f"set CHROMEDRIVER_PATH. Rejected: {', '.join(rejected) or 'none found'}"
+        )
+
+    def _candidates(self):
+        if self.configured_path:
+            yield "config", self.configured_path
+        cached = self._load_cache()
+        if cached:
+            yield "cache", cached.get("path")
+        on_path = shutil.which(CHROMEDRIVER_NAME)
+        if on_path:
+            yield "PATH", on_path
+        # Newest downloads first
+        found = []
+        for folder in WDM_CACHE_DIRS:
+            pattern = os.path.join(os.path.expanduser(folder), "drivers", "chromedriver", "**", CHROMEDRIVER_NAME)
+            found.extend(glob.glob(pattern, recursive=True))
+        for path in sorted(set(found), key=os.path.getmtime, reverse=True):
+            yield "webdriver_manager cache", path
+
+    def _download(self):
+        from webdriver_manager.chrome import ChromeDriverManager
+        print("No matching chromedriver found locally, downloading one with webdriver_manager...")
+        return ChromeDriverManager().install()
+
+    def _load_cache(self):
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_cache(self, resolved):
+        if not self.cache_path:
+            return
+        try:
+            folder = os.path.dirname(self.cache_path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump({**resolved, "resolved_at": time.time()}, f, indent=2)
+        except OSError as e:
+            print(f"Could not cache the chromedriver path: {e}")
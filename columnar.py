@@ -0,0 +1,263 @@
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import date
+
+from results_store import parse_result_date
+
+# Columns of the extraction results, with the names of their Arrow types
+EXTRACTION_TYPES = {
+    "run_id": "string",
+    "row": "int32",
+    "image_name": "string",
+    "doc_type": "string",
+    "instrument_number": "string",
+    "date": "date32",
+    "date_text": "string",
+    "owner_name": "string",
+    "address": "string",
+    "apn_taxid": "string",
+}
+
+
+def _arrow():
+    # pyarrow is only imported once something is exported, so the API starts without it
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    return pa, ds, pq
+
+
+def extraction_record(result):
+    """An extraction result with its date parsed and the original text kept in date_text."""
+    record = {name: result.get(name) for name in EXTRACTION_TYPES}
+    record["date_text"] = result.get("date")
+    record["date"] = parse_result_date(result.get("date"))
+    return record
+
+
+def _find_column(names, *candidates):
+    for candidate in candidates:
+        if candidate in names:
+            return candidate
+    return None
+
+
+def _partition_value(value):
+    value = re.sub(r"[^0-9A-Za-z_.-]+", "-", str(value)).strip("-")
+    return value or "unknown"
+
+
+class PartitionedParquet:
+    """A Parquet dataset under root, split into doc_type=<type>/month=<YYYY-MM> folders.
+
+    append() writes each batch as a new part file in the partitions it
+    touches, so nothing already written is read or rewritten. compact()
+    merges the parts of a partition into one file, keeping only the last
+    row seen for each key, which also removes rows repeated by retried or
+    overlapping searches. Columns listed in types get that Arrow type (named
+    as in pyarrow, e.g. "int32"), other
+    columns with "date" in their name are dates and the rest are strings, so
+    every part file of the dataset has compatible columns.
+    """
+
+    def __init__(self, root, date_columns, doc_type_columns, key=None, types=None):
+        self.root = root
+        self.date_columns = date_columns
+        self.doc_type_columns = doc_type_columns
+        self.key = list(key or [])
+        self.types = dict(types or {})
+        # Folders are made as part files are written, so an unused dataset leaves nothing on disk
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self.rows_appended = 0
+        self.files_written = 0
+
+    def append(self, records):
+        """Write records (dicts) to new part files; returns the number of rows written."""
+        if not records:
+            return 0
+        partitions = {}
+        for record in records:
+            partitions.setdefault(self._partition_of(record), []).append(record)
+        for partition, partition_records in partitions.items():
+            table = self._to_table(partition_records)
+            folder = os.path.join(self.root, *partition)
+            with self._lock:
+                if not os.path.exists(folder):
+                    os.makedirs(folder)
+                self._write(table, os.path.join(folder, f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"))
+                self._dirty.add(partition)
+                self.rows_appended += table.num_rows
+        return len(records)
+
+    def compact(self, only_dirty=False):
+        """Merge each partition's part files into one; returns how many partitions were rewritten."""
+        with self._lock:
+            partitions = sorted(self._dirty) if only_dirty else self._partitions()
+            self._dirty.clear()
+            compacted = 0
+            for partition in partitions:
+                folder = os.path.join(self.root, *partition)
+                parts = self._part_files(folder)
+                if len(parts) < 2:
+                    continue
+                table = self._read(parts)
+                before = table.num_rows
+                if self.key:
+                    table = self._drop_duplicates(table)
+                self._write(table, os.path.join(folder, f"part-{time.time_ns()}-compacted.parquet"))
+                for path in parts:
+                    os.remove(path)
+                compacted += 1
+                print(f"Compacted {len(parts)} file(s) in {folder} into one ({before} -> {table.num_rows} rows).")
+            return compacted
+
+    def read(self, doc_type=None, start_date=None, end_date=None, columns=None):
+        """Rows as a pyarrow Table, only opening the partitions that can match."""
+        files = []
+        for partition in self._partitions():
+            type_part, month_part = partition
+            if doc_type is not None and type_part != f"doc_type={_partition_value(doc_type)}":
+                continue
+            month = month_part.split("=", 1)[1]
+            if month != "unknown":
+                if start_date is not None and month < f"{start_date:%Y-%m}":
+                    continue
+                if end_date is not None and month > f"{end_date:%Y-%m}":
+                    continue
+            elif start_date is not None or end_date is not None:
+                continue
+            files.extend(self._part_files(os.path.join(self.root, *partition)))
+        pa, ds, _ = _arrow()
+        if not files:
+            return pa.table({})
+        dataset = ds.dataset(files, schema=self._schema(files), format="parquet")
+        conditions = []
+        doc_type_column = _find_column(dataset.schema.names, *self.doc_type_columns)
+        if doc_type is not None and doc_type_column is not None:
+            conditions.append(ds.field(doc_type_column) == doc_type)
+        date_column = _find_column(dataset.schema.names, *self.date_columns)
+        if start_date is not None and date_column is not None:
+            conditions.append(ds.field(date_column) >= start_date)
+        if end_date is not None and date_column is not None:
+            conditions.append(ds.field(date_column) <= end_date)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def stats(self):
+        with self._lock:
+            partitions = self._partitions()
+            files = sum(len(self._part_files(os.path.join(self.root, *p))) for p in partitions)
+            return {
+                "root": self.root,
+                "partitions": len(partitions),
+                "files": files,
+                "rows_appended": self.rows_appended,
+                "files_written": self.files_written,
+            }
+
+    def _partition_of(self, record):
+        doc_type = next((record[c] for c in self.doc_type_columns if record.get(c)), None)
+        day = next((record[c] for c in self.date_columns if isinstance(record.get(c), date)), None)
+        return (
+            f"doc_type={_partition_value(doc_type or 'unknown')}",
+            f"month={day:%Y-%m}" if day is not None else "month=unknown",
+        )
+
+    def _to_table(self, records):
+        pa = _arrow()[0]
+        names = []
+        for record in records:
+            for name in record:
+                if name not in names:
+                    names.append(name)
+        fields = []
+        for name in names:
+            if name in self.types:
+                fields.append(pa.field(name, getattr(pa, self.types[name])()))
+            elif "date" in name:
+                fields.append(pa.field(name, pa.date32()))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        schema = pa.schema(fields)
+        columns = {}
+        for field in schema:
+            values = [r.get(field.name) for r in records]
+            if pa.types.is_string(field.type):
+                values = [str(v) if v is not None else None for v in values]
+            elif pa.types.is_date(field.type):
+                values = [v if isinstance(v, date) else None for v in values]
+            columns[field.name] = values
+        return pa.table(columns, schema=schema)
+
+    def _write(self, table, path):
+        pq = _arrow()[2]
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+        self.files_written += 1
+
+    def _read(self, files):
+        ds = _arrow()[1]
+        return ds.dataset(files, schema=self._schema(files), format="parquet").to_table()
+
+    def _schema(self, files):
+        pa, _, pq = _arrow()
+        return pa.unify_schemas([pq.read_schema(path) for path in files])
+
+    def _drop_duplicates(self, table):
+        import pandas as pd
+        pa = _arrow()[0]
+        key = [c for c in self.key if c in table.column_names]
+        if not key:
+            return table
+        frame = table.to_pandas(date_as_object=True)
+        keyed = frame[key].notna().all(axis=1)
+        frame = pd.concat([frame[~keyed], frame[keyed].drop_duplicates(subset=key, keep="last")]).sort_index()
+        return pa.Table.from_pandas(frame, schema=table.schema, preserve_index=False).replace_schema_metadata(table.schema.metadata)
+
+    def _partitions(self):
+        partitions = []
+        if not os.path.isdir(self.root):
+            return partitions
+        for type_part in sorted(os.listdir(self.root)):
+            type_folder = os.path.join(self.root, type_part)
+            if not type_part.startswith("doc_type=") or not os.path.isdir(type_folder):
+                continue
+            for month_part in sorted(os.listdir(type_folder)):
+                if month_part.startswith("month=") and os.path.isdir(os.path.join(type_folder, month_part)):
+                    partitions.append((type_part, month_part))
+        return partitions
+
+    def _part_files(self, folder):
+        if not os.path.isdir(folder):
+            return []
+        # Part names start with the time they were written, so sorting keeps write order
+        return [os.path.join(folder, n) for n in sorted(os.listdir(folder)) if n.startswith("part-") and n.endswith(".parquet")]
+
+
+def grid_dataset(root):
+    """Dataset of results grid rows, one row per instrument after compaction."""
+    return PartitionedParquet(
+        root,
+        date_columns=("record_date", "recording_date", "recorded_date", "date_recorded"),
+        doc_type_columns=("doc_type", "document_type"),
+        key=("doc_type", "instrument_number"),
+        types={"page": "int32"},
+    )
+
+
+def extractions_dataset(root):
+    """Dataset of extraction results, partitioned by the date read from the document."""
+    return PartitionedParquet(
+        root,
+        date_columns=("date",),
+        doc_type_columns=("doc_type",),
+        key=("doc_type", "instrument_number"),
+        types=EXTRACTION_TYPES,
+    )
@@ -0,0 +1,221 @@
+import json
+import re
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# The results grid is a Kendo grid; its read action is declared in the page's init script
+GRID_READ_URL_PATTERN = re.compile(r'"?read"?\s*:\s*\{\s*"?url"?\s*:\s*"([^"]+)"')
+
+AUTH_URL_MARKER = "myfairfax/auth"
+
+
+class CpanHttpError(Exception):
+    """Raised when the HTTP fast path cannot continue and the browser has to take over."""
+
+
+class CpanSessionExpired(CpanHttpError):
+    """Raised when CPAN sends us back to the MyFairfax login page."""
+
+
+class CpanHttpClient:
+    """Talks to CPAN with plain HTTP requests, replaying the posts the search page makes.
+
+    The search form is read from the CPAN page itself so its field names and
+    hidden inputs stay in step with the site; results come from the Kendo
+    grid's read action as JSON, one page per request.
+    """
+
+    # Grid columns used to name documents (same columns the browser path reads from cells[2] and cells[3])
+    doc_type_field = "DocType"
+    instrument_field = "InstrumentNumber"
+    details_field = "DetailsUrl"
+
+    def __init__(self, cpan_url, login_url, grid_read_url=None, timeout=30, pool_size=4, user_agent="Mozilla/5.0"):
+        self.cpan_url = cpan_url
+        self.login_url = login_url
+        self.grid_read_url = grid_read_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=2, connect=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET", "HEAD"))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+        self._search_page = None
+
+    def load_cookies(self, cookies):
+        """Copy Selenium-style cookie dicts (e.g. from a logged-in driver) into the session."""
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+
+    def cookies(self):
+        """The session's cookies as Selenium-style dicts."""
+        return [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "secure": c.secure,
+             "httpOnly": c.has_nonstandard_attr("HttpOnly"), "expiry": c.expires}
+            for c in self.session.cookies
+        ]
+
+    def is_logged_in(self):
+        """Fetch the CPAN page; True unless we get bounced to the MyFairfax login."""
+        response = self.session.get(self.cpan_url, timeout=self.timeout)
+        if AUTH_URL_MARKER in response.url or response.status_code in (401, 403):
+            self._search_page = None
+            return False
+        response.raise_for_status()
+        self._search_page = response
+        return True
+
+    def login(self, username, password):
+        """Submit the MyFairfax login form over HTTP. Returns True if CPAN then accepts the session."""
+        response = self.session.get(self.login_url, timeout=self.timeout)
+        response.raise_for_status()
+        soup = _soup(response.text)
+        password_input = soup.find("input", attrs={"type": "password"})
+        form = password_input.find_parent("form") if password_input else None
+        if form is None:
+            raise CpanHttpError("No login form found on the MyFairfax login page")
+        fields, _ = _form_fields(form)
+        username_input = (
+            form.find("input", id="username") or form.find("input", attrs={"name": "username"})
+            or form.find("input", attrs={"type": "text"})
+        )
+        if username_input is None or not username_input.get("name"):
+            raise CpanHttpError("No username field in the MyFairfax login form")
+        fields[username_input["name"]] = username
+        fields[password_input["name"]] = password
+        action = urljoin(response.url, form.get("action") or response.url)
+        response = self.session.post(action, data=fields, timeout=self.timeout)
+        response.raise_for_status()
+        return self.is_logged_in()
+
+    def search(self, doc_types, start_date, end_date, search_by="3"):
+        """Post the Land Records document type search and remember the grid's read URL.
+
+        Values are set by element id (the ids the browser path uses) and posted
+        under whatever names the page gives those elements.
+        """
+        if self._search_page is None and not self.is_logged_in():
+            raise CpanSessionExpired("CPAN session is not logged in")
+        soup = _soup(self._search_page.text)
+        doc_type_select = soup.find(id="deedDocTypeDT")
+        form = doc_type_select.find_parent("form") if doc_type_select else None
+        if form is None:
+            raise CpanHttpError("No Land Records search form found on the CPAN page")
+        fields, names = _form_fields(form)
+        for element_id, value in (
+            ("LR_SearchType_SearchBy", search_by),
+            ("deedDocTypeDT", list(doc_types)),
+            ("LR_startdate", start_date),
+            ("LR_enddate", end_date),
+        ):
+            if element_id not in names:
+                raise CpanHttpError(f"Search form has no {element_id} field")
+            fields[names[element_id]] = value
+        action = urljoin(self._search_page.url, form.get("action") or self._search_page.url)
+        response = self.session.post(action, data=fields, timeout=self.timeout)
+        if AUTH_URL_MARKER in response.url:
+            raise CpanSessionExpired("CPAN session expired during search")
+        response.raise_for_status()
+        match = GRID_READ_URL_PATTERN.search(response.text)
+        if match:
+            self.grid_read_url = urljoin(response.url, match.group(1).replace("\\u0026", "&").replace("\\/", "/"))
+        if not self.grid_read_url:
+            raise CpanHttpError("Search results page does not declare a grid read URL")
+        return response
+
+    def iter_results(self, page_size=100, on_page=None, start_page=1):
+        """Yield (page_number, row) for each result row (a dict of grid columns), one grid page per request.
+
+        on_page(page_number, rows) is called as each page arrives; reading
+        starts at start_page.
+        """
+        if not self.grid_read_url:
+            raise CpanHttpError("search() has to run before the results can be read")
+        page = max(1, int(start_page))
+        seen = (page - 1) * page_size
+        while True:
+            response = self.session.post(
+                self.grid_read_url,
+                data={"sort": "", "page": page, "pageSize": page_size, "group": "", "filter": ""},
+                headers={"X-Requested-With": "XMLHttpRequest"},
+                timeout=self.timeout,
+            )
+            if AUTH_URL_MARKER in response.url:
+                raise CpanSessionExpired("CPAN session expired while reading results")
+            response.raise_for_status()
+            try:
+                payload = response.json()
+            except json.JSONDecodeError as e:
+                raise CpanHttpError(f"Grid read returned something other than JSON: {e}")
+            if payload.get("Errors"):
+                raise CpanHttpError(f"Grid read failed: {payload['Errors']}")
+            rows = payload.get("Data") or payload.get("data") or []
+            total = payload.get("Total", payload.get("total", 0))
+            if on_page is not None:
+                on_page(page, rows)
+            for row in rows:
+                yield page, row
+            seen += len(rows)
+            if not rows or seen >= total:
+                return
+            page += 1
+
+    def document_url(self, row):
+        """Look up a result row's document (PDF preferred, TIFF otherwise) on its details page.
+
+        Returns (url, kind) with kind "pdf" or "tiff", or (None, None) when the
+        details page does not expose a document link without JavaScript.
+        """
+        details = row.get(self.details_field)
+        if not details:
+            raise CpanHttpError(f"Result rows have no {self.details_field} column")
+        details_url = urljoin(self.grid_read_url or self.cpan_url, details)
+        response = self.session.get(details_url, timeout=self.timeout)
+        if AUTH_URL_MARKER in response.url:
+            raise CpanSessionExpired("CPAN session expired while opening a details page")
+        response.raise_for_status()
+        soup = _soup(response.text)
+        viewer = soup.find(id="tiffImageViewer") or soup
+        link = viewer.select_one("a[href$='.pdf'], embed[type='application/pdf'], iframe[src]")
+        if link is not None:
+            url = link.get("href") or link.get("src")
+            if url and "about:blank" not in url:
+                return urljoin(response.url, url), "pdf"
+        image = viewer.select_one("img.iv-large-image")
+        if image is not None and image.get("src") and "about:blank" not in image["src"]:
+            return urljoin(response.url, image["src"]), "tiff"
+        return None, None
+
+    def close(self):
+        self.session.close()
+
+
+def _soup(text):
+    # bs4 is only imported once the HTTP search is actually used
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(text, "html.parser")
+
+
+def _form_fields(form):
+    """Default values of a form's named inputs, plus a map from element id to field name."""
+    fields = {}
+    names = {}
+    for element in form.find_all(["input", "select", "textarea"]):
+        name = element.get("name")
+        if not name:
+            continue
+        if element.get("id"):
+            names[element["id"]] = name
+        if element.name == "select":
+            selected = [o.get("value", o.get_text()) for o in element.find_all("option") if o.has_attr("selected")]
+            fields[name] = selected if element.has_attr("multiple") else (selected[0] if selected else "")
+        elif element.get("type") in ("checkbox", "radio"):
+            if element.has_attr("checked"):
+                fields[name] = element.get("value", "on")
+        elif element.get("type") not in ("submit", "button", "image", "file"):
+            fields[name] = element.get("value", "") if element.name == "input" else element.get_text()
+    return fields, names
@@ -0,0 +1,194 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+from urllib3.util.retry import Retry
+
+from cache import hash_file
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed or fails verification."""
+
+
+class UnexpectedContentType(DownloadError):
+    """Raised when the server answers with a Content-Type the caller did not ask for."""
+
+    def __init__(self, url, content_type):
+        super().__init__(f"Unexpected Content-Type {content_type or 'N/A'} for {url}")
+        self.content_type = content_type or "N/A"
+
+
+class DownloadResult:
+    def __init__(self, path, size, sha256, content_type, resumed):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.content_type = content_type
+        self.resumed = resumed
+
+
+class DownloadClient:
+    """Shared, connection-pooled HTTP client for document downloads.
+
+    One requests.Session is reused for every file so connections are kept
+    alive between documents. Browser cookies are copied into the session only
+    when they have changed since the last sync.
+    """
+
+    def __init__(self, pool_size=10, chunk_size=1024 * 1024, timeout=60, max_attempts=3, user_agent="Mozilla/5.0"):
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_attempts = max(1, int(max_attempts))
+        self.session = requests.Session()
+        retry = Retry(total=2, connect=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET", "HEAD"))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+        self._cookie_fingerprint = None
+        self._lock = threading.Lock()
+        self._stats = {"ok": 0, "failed": 0, "wrong_type": 0, "resumed": 0, "bytes": 0}
+
+    def sync_cookies(self, cookies):
+        """Load Selenium-style cookie dicts into the session if they differ from the last sync.
+
+        The cookies go into a new jar that replaces the session's in one
+        assignment, so downloads running meanwhile never see it half filled.
+        """
+        fingerprint = tuple(sorted((c["name"], c["value"], c.get("domain", ""), c.get("path", "/")) for c in cookies))
+        with self._lock:
+            if fingerprint == self._cookie_fingerprint:
+                return False
+            jar = RequestsCookieJar()
+            for cookie in cookies:
+                jar.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+            self.session.cookies = jar
+            self._cookie_fingerprint = fingerprint
+        return True
+
+    def sync_from_driver(self, driver):
+        return self.sync_cookies(driver.get_cookies())
+
+    def download(self, url, dest_path, content_types=None, expected_sha256=None, headers=None):
+        """Stream url to dest_path and return a DownloadResult.
+
+        The body is written to dest_path + ".part" first. If the connection
+        drops, the next attempt asks the server for the remaining bytes with a
+        Range request and appends to the partial file. When content_types is
+        given, a response whose Content-Type contains none of them raises
+        UnexpectedContentType before anything is written; expected_sha256, when
+        given, is checked against the finished file.
+        """
+        try:
+            result = self._download(url, dest_path, content_types, expected_sha256, headers)
+        except UnexpectedContentType:
+            self._count("wrong_type")
+            raise
+        except Exception:
+            self._count("failed")
+            raise
+        self._count("ok")
+        if result.resumed:
+            self._count("resumed")
+        return result
+
+    def stats(self):
+        """Finished downloads by outcome, and the bytes received over every attempt."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _download(self, url, dest_path, content_types, expected_sha256, headers):
+        part_path = dest_path + ".part"
+        last_error = None
+        resumed = False
+        content_type = ""
+        for attempt in range(self.max_attempts):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            request_headers = dict(headers or {})
+            if offset:
+                request_headers["Range"] = f"bytes={offset}-"
+            try:
+                with self.session.get(url, stream=True, timeout=self.timeout, headers=request_headers) as response:
+                    if response.status_code == 416 and offset:
+                        # Server has nothing past what we already hold
+                        break
+                    response.raise_for_status()
+                    content_type = response.headers.get("Content-Type", "")
+                    if content_types and not any(expected in content_type for expected in content_types):
+                        raise UnexpectedContentType(url, content_type)
+                    if offset and response.status_code != 206:
+                        # Range ignored, start over
+                        offset = 0
+                    resumed = resumed or bool(offset)
+                    with open(part_path, "ab" if offset else "wb", buffering=self.chunk_size) as f:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            f.write(chunk)
+                            self._count("bytes", len(chunk))
+                    expected_size = response.headers.get("Content-Length")
+                    if expected_size is not None and not response.headers.get("Content-Encoding") and os.path.getsize(part_path) != offset + int(expected_size):
+                        raise DownloadError(f"Incomplete download of {url}")
+                break
+            except UnexpectedContentType:
+                raise
+            except (requests.RequestException, DownloadError) as e:
+                last_error = e
+                print(f"Download attempt {attempt + 1}/{self.max_attempts} for {url} failed: {e}")
+        else:
+            raise DownloadError(f"Could not download {url}: {last_error}")
+
+        sha256 = hash_file(part_path, self.chunk_size)
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            os.remove(part_path)
+            raise DownloadError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {sha256}")
+        os.replace(part_path, dest_path)
+        return DownloadResult(dest_path, os.path.getsize(dest_path), sha256, content_type, resumed)
+
+    def close(self):
+        self.session.close()
+
+
+
+class DownloadStage:
+    """Fetch queued documents in the background with bounded total and per-host parallelism.
+
+    Given a StepTimings, each download is timed as the "download" step once it
+    has a host slot (time spent queued is not included).
+    """
+
+    def __init__(self, client, max_workers=4, per_host=2, timings=None):
+        self.client = client
+        self.timings = timings
+        self.per_host = max(1, int(per_host))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="download")
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url, dest_path, content_types=None):
+        """Queue a download and return a Future for its DownloadResult."""
+        return self._executor.submit(self._download, url, dest_path, content_types)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _download(self, url, dest_path, content_types):
+        with self._slot(url):
+            if self.timings is None:
+                return self.client.download(url, dest_path, content_types=content_types)
+            with self.timings.step("download"):
+                return self.client.download(url, dest_path, content_types=content_types)
@@ -0,0 +1,189 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class DriverPool:
+    """Keep a fixed number of logged-in Chrome drivers warm and lend them to workflow runs.
+
+    The pool does not know anything about MyFairfax itself: it is given a
+    factory that starts a browser, a login function and a cheap session
+    check. A leased driver is always sitting on a ready CPAN session.
+    """
+
+    def __init__(self, size, create_driver, login, is_logged_in, health_check_interval=300):
+        self.size = max(1, int(size))
+        self.health_check_interval = health_check_interval
+        self._create_driver = create_driver
+        self._login = login
+        self._is_logged_in = is_logged_in
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self._stop = threading.Event()
+        self._monitor = None
+
+    def start(self, warm=True):
+        """Start the health-check thread and (optionally) log in every driver up front."""
+        self._stop.clear()
+        if warm:
+            for _ in range(self.size):
+                if not self._reserve_slot():
+                    break
+                driver = self._spawn()
+                if driver is not None:
+                    self._idle.put(driver)
+        if self._monitor is None or not self._monitor.is_alive():
+            self._monitor = threading.Thread(target=self._monitor_loop, name="driver-pool-monitor", daemon=True)
+            self._monitor.start()
+        print(f"Driver pool ready with {self._idle.qsize()}/{self.size} warm drivers.")
+
+    def shutdown(self):
+        """Stop the health-check thread and quit every idle driver."""
+        self._stop.set()
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def acquire(self, timeout=None):
+        """Borrow a logged-in driver, starting a new one if the pool is not full yet."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve_slot():
+                    driver = self._spawn()
+                    if driver is None:
+                        raise RuntimeError("Failed to start a logged-in Chrome driver.")
+                    return driver
+                try:
+                    driver = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No Chrome driver became available within {timeout} seconds.")
+            if self._ensure_logged_in(driver):
+                return driver
+            self._discard(driver)
+
+    def release(self, driver, broken=False):
+        """Return a driver to the pool, closing any tabs the workflow left open."""
+        if driver is None:
+            return
+        if broken or self._stop.is_set() or not self._reset(driver):
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Context manager around acquire/release."""
+        driver = self.acquire(timeout=timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self._is_alive(driver)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def stats(self):
+        with self._lock:
+            live = self._live
+        return {"size": self.size, "live": live, "idle": self._idle.qsize()}
+
+    def _reserve_slot(self):
+        with self._lock:
+            if self._live >= self.size:
+                return False
+            self._live += 1
+            return True
+
+    def _free_slot(self):
+        with self._lock:
+            self._live = max(0, self._live - 1)
+
+    def _spawn(self):
+        """Start and log in a driver for a slot that has already been reserved."""
+        driver = None
+        try:
+            driver = self._create_driver()
+            if driver is None or isinstance(driver, str):
+                print(f"Driver pool could not start Chrome: {driver}")
+                driver = None
+            elif not self._ensure_logged_in(driver):
+                self._quit(driver)
+                driver = None
+        except Exception as e:
+            print(f"Driver pool could not start a logged-in driver: {e}")
+            if driver is not None:
+                self._quit(driver)
+            driver = None
+        if driver is None:
+            self._free_slot()
+        return driver
+
+    def _ensure_logged_in(self, driver):
+        if not self._is_alive(driver):
+            return False
+        try:
+            if self._is_logged_in(driver):
+                return True
+            print("Driver pool: session expired, logging in again...")
+            self._login(driver)
+            return self._is_logged_in(driver)
+        except Exception as e:
+            print(f"Driver pool: re-login failed: {e}")
+            return False
+
+    def _is_alive(self, driver):
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            return True
+        except Exception as e:
+            print(f"Driver pool: could not reset driver, discarding it: {e}")
+            return False
+
+    def _discard(self, driver):
+        self._quit(driver)
+        self._free_slot()
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _monitor_loop(self):
+        while not self._stop.wait(self.health_check_interval):
+            checked = []
+            while True:
+                try:
+                    checked.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            for driver in checked:
+                if self._stop.is_set():
+                    self._discard(driver)
+                elif self._ensure_logged_in(driver):
+                    self._idle.put(driver)
+                else:
+                    print("Driver pool: replacing unhealthy driver.")
+                    self._discard(driver)
+                    if self._reserve_slot():
+                        replacement = self._spawn()
+                        if replacement is not None:
+                            self._idle.put(replacement)
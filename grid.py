@@ -0,0 +1,132 @@
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Kendo pager "next" button, for both the older <a> and the newer <button> markup
+NEXT_PAGE_SELECTOR = ".k-pager .k-pager-nav[title*='next' i], .k-pager .k-pager-nav[aria-label*='next' i]"
+
+SET_PAGE_SIZE_SCRIPT = """
+var grid = window.jQuery && jQuery(arguments[0]).closest('.k-grid').data('kendoGrid');
+if (!grid || !grid.dataSource) { return false; }
+if (grid.dataSource.pageSize() === arguments[1]) { return 'unchanged'; }
+grid.dataSource.pageSize(arguments[1]);
+return true;
+"""
+
+GO_TO_PAGE_SCRIPT = """
+var grid = window.jQuery && jQuery(arguments[0]).closest('.k-grid').data('kendoGrid');
+if (!grid || !grid.dataSource) { return false; }
+grid.dataSource.page(arguments[1]);
+return true;
+"""
+
+
+def _grid_root(table_elem):
+    try:
+        return table_elem.find_element(By.XPATH, "./ancestor::div[contains(concat(' ', normalize-space(@class), ' '), ' k-grid ')][1]")
+    except WebDriverException:
+        return None
+
+
+def set_grid_page_size(driver, table_elem, page_size):
+    """Ask the Kendo grid's data source for bigger pages. Returns False if the grid API is not reachable."""
+    first_row = table_elem.find_elements(By.XPATH, ".//tbody/tr")
+    try:
+        changed = driver.execute_script(SET_PAGE_SIZE_SCRIPT, table_elem, int(page_size))
+    except WebDriverException as e:
+        print(f"Could not change the grid page size: {e}")
+        return False
+    if not changed:
+        return False
+    if changed == "unchanged":
+        return True
+    if first_row:
+        try:
+            WebDriverWait(driver, 15, poll_frequency=0.1).until(EC.staleness_of(first_row[0]))
+        except TimeoutException:
+            pass
+    print(f"Grid page size set to {page_size}.")
+    return True
+
+
+def go_to_grid_page(driver, table_xpath, page, timeout=30):
+    """Move the grid to page (1-based) through the Kendo API, or by clicking "next" if that is not reachable.
+
+    Returns False if the grid has fewer pages.
+    """
+    table_elem = driver.find_element(By.XPATH, table_xpath)
+    first_row = table_elem.find_elements(By.XPATH, ".//tbody/tr")
+    try:
+        jumped = driver.execute_script(GO_TO_PAGE_SCRIPT, table_elem, int(page))
+    except WebDriverException:
+        jumped = False
+    if jumped:
+        if first_row:
+            WebDriverWait(driver, timeout, poll_frequency=0.1).until(EC.staleness_of(first_row[0]))
+        return True
+    for _ in range(int(page) - 1):
+        next_button = _next_page_button(driver, table_elem)
+        if next_button is None:
+            return False
+        driver.execute_script("arguments[0].click();", next_button)
+        if first_row:
+            WebDriverWait(driver, timeout, poll_frequency=0.1).until(EC.staleness_of(first_row[0]))
+        table_elem = driver.find_element(By.XPATH, table_xpath)
+        first_row = table_elem.find_elements(By.XPATH, ".//tbody/tr")
+    return True
+
+
+def _next_page_button(driver, table_elem):
+    root = _grid_root(table_elem)
+    buttons = (root or driver).find_elements(By.CSS_SELECTOR, NEXT_PAGE_SELECTOR)
+    for button in buttons:
+        classes = button.get_attribute("class") or ""
+        if "k-disabled" in classes or "k-state-disabled" in classes:
+            continue
+        if button.get_attribute("aria-disabled") == "true" or button.get_attribute("disabled"):
+            continue
+        return button
+    return None
+
+
+def iter_grid_rows(driver, table_xpath, on_page=None, page_size=None, start_page=1, timeout=60):
+    """Yield (page_number, row_element) for every row on every page of the Kendo results grid.
+
+    Only the current page's rows are looked up at any time; the next page is
+    requested once the caller has consumed every row of the current one.
+    on_page(page_number, table_elem) is called as each page arrives, and
+    page_size, if given, is applied to the grid before the first page is read,
+    and reading starts at start_page (used when resuming an interrupted run).
+    """
+    table_elem = WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+        EC.presence_of_element_located((By.XPATH, table_xpath))
+    )
+    if page_size:
+        set_grid_page_size(driver, table_elem, page_size)
+    page_number = 1
+    if start_page > 1:
+        if not go_to_grid_page(driver, table_xpath, start_page, timeout=timeout):
+            print(f"Grid has fewer than {start_page} pages, nothing left to read.")
+            return
+        page_number = start_page
+    while True:
+        table_elem = driver.find_element(By.XPATH, table_xpath)
+        if on_page is not None:
+            on_page(page_number, table_elem)
+        rows = table_elem.find_elements(By.XPATH, ".//tbody/tr")
+        print(f"Grid page {page_number}: {len(rows)} rows.")
+        for row in rows:
+            yield page_number, row
+        next_button = _next_page_button(driver, table_elem)
+        if next_button is None:
+            return
+        driver.execute_script("arguments[0].click();", next_button)
+        # Kendo re-renders the tbody when the page changes
+        if rows:
+            try:
+                WebDriverWait(driver, timeout, poll_frequency=0.1).until(EC.staleness_of(rows[0]))
+            except TimeoutException:
+                print(f"Grid did not move past page {page_number}, stopping.")
+                return
+        page_number += 1
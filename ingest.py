@@ -0,0 +1,60 @@
+import os
+from io import BytesIO
+
+import pymupdf
+from PIL import Image, ImageSequence
+
+# A PDF page with less embedded text than this is treated as a scan and OCRed
+MIN_TEXT_LAYER_CHARS = 20
+# Resolution used when a scanned PDF page has to be rasterised for OCR
+RASTER_DPI = 200
+
+PDF_EXTENSIONS = (".pdf",)
+TIFF_EXTENSIONS = (".tif", ".tiff")
+
+
+def _png_bytes(image):
+    buffer = BytesIO()
+    if image.mode not in ("1", "L", "RGB"):
+        image = image.convert("RGB")
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def extract_pdf_text(path, read_image):
+    """Text of every PDF page, from the embedded text layer when there is one.
+
+    Pages without a usable text layer are rasterised and passed to read_image
+    (a callable taking PNG bytes and returning text).
+    """
+    page_texts = []
+    with pymupdf.open(path) as document:
+        for page in document:
+            text = page.get_text("text").strip()
+            if len(text) < MIN_TEXT_LAYER_CHARS:
+                pixmap = page.get_pixmap(dpi=RASTER_DPI)
+                text = read_image(pixmap.tobytes("png")).strip()
+            if text:
+                page_texts.append(text)
+    return "\n".join(page_texts)
+
+
+def extract_tiff_text(path, read_image):
+    """OCR every frame of a (possibly multi-page) TIFF."""
+    page_texts = []
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            text = read_image(_png_bytes(frame)).strip()
+            if text:
+                page_texts.append(text)
+    return "\n".join(page_texts)
+
+
+def extract_document_text(path, read_image):
+    """Pull the text out of a downloaded document, OCRing only what has no text layer."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        return extract_pdf_text(path, read_image)
+    if extension in TIFF_EXTENSIONS:
+        return extract_tiff_text(path, read_image)
+    return read_image(path)
@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Processing stages of one instrument, in order
+STAGES = ("document", "download", "ocr", "extraction")
+
+
+class InstrumentIndex:
+    """SQLite record of every instrument seen, keyed by instrument number and doc type.
+
+    Each stage (document link found, downloaded, OCRed, extracted) is stored
+    as done or failed, so a later run can skip finished instruments and pick
+    unfinished ones up at the first stage that has not succeeded yet. The
+    SQLite file is only created when the index is first used.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = None
+
+    @property
+    def _conn(self):
+        # Every caller holds self._lock
+        if self._db is None:
+            self._db = self._open()
+        return self._db
+
+    def _open(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS instruments ("
+            " instrument_number TEXT NOT NULL, doc_type TEXT NOT NULL,"
+            " document_url TEXT, document_path TEXT, result TEXT,"
+            " first_seen REAL NOT NULL, updated REAL NOT NULL,"
+            " PRIMARY KEY (instrument_number, doc_type))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            " instrument_number TEXT NOT NULL, doc_type TEXT NOT NULL, stage TEXT NOT NULL,"
+            " status TEXT NOT NULL, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, updated REAL NOT NULL,"
+            " PRIMARY KEY (instrument_number, doc_type, stage))"
+        )
+        conn.commit()
+        return conn
+
+    def get(self, instrument_number, doc_type):
+        """Everything recorded for an instrument, or None if it has never been seen."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document_url, document_path, result, first_seen, updated FROM instruments"
+                " WHERE instrument_number = ? AND doc_type = ?", (instrument_number, doc_type),
+            ).fetchone()
+            if row is None:
+                return None
+            stages = self._conn.execute(
+                "SELECT stage, status, error, attempts FROM stages WHERE instrument_number = ? AND doc_type = ?",
+                (instrument_number, doc_type),
+            ).fetchall()
+        return {
+            "instrument_number": instrument_number,
+            "doc_type": doc_type,
+            "document_url": row[0],
+            "document_path": row[1],
+            "result": json.loads(row[2]) if row[2] else None,
+            "first_seen": row[3],
+            "updated": row[4],
+            "stages": {stage: {"status": status, "error": error, "attempts": attempts} for stage, status, error, attempts in stages},
+        }
+
+    def is_done(self, instrument_number, doc_type, stage="extraction"):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM stages WHERE instrument_number = ? AND doc_type = ? AND stage = ?",
+                (instrument_number, doc_type, stage),
+            ).fetchone()
+        return row is not None and row[0] == "done"
+
+    def mark(self, instrument_number, doc_type, stage, ok=True, error=None, **fields):
+        """Record the outcome of one stage; fields may set document_url, document_path or result."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage}")
+        now = time.time()
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"], ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO instruments (instrument_number, doc_type, first_seen, updated) VALUES (?, ?, ?, ?)",
+                (instrument_number, doc_type, now, now),
+            )
+            for column in ("document_url", "document_path", "result"):
+                if column in fields:
+                    self._conn.execute(
+                        f"UPDATE instruments SET {column} = ? WHERE instrument_number = ? AND doc_type = ?",
+                        (fields[column], instrument_number, doc_type),
+                    )
+            self._conn.execute(
+                "UPDATE instruments SET updated = ? WHERE instrument_number = ? AND doc_type = ?",
+                (now, instrument_number, doc_type),
+            )
+            self._conn.execute(
+                "INSERT INTO stages (instrument_number, doc_type, stage, status, error, attempts, updated)"
+                " VALUES (?, ?, ?, ?, ?, 1, ?)"
+                " ON CONFLICT (instrument_number, doc_type, stage) DO UPDATE SET"
+                " status = excluded.status, error = excluded.error, attempts = attempts + 1, updated = excluded.updated",
+                (instrument_number, doc_type, stage, "done" if ok else "failed", None if ok else str(error), now),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            instruments = self._conn.execute("SELECT COUNT(*) FROM instruments").fetchone()[0]
+            rows = self._conn.execute("SELECT stage, status, COUNT(*) FROM stages GROUP BY stage, status").fetchall()
+        stages = {}
+        for stage, status, count in rows:
+            stages.setdefault(stage, {})[status] = count
+        return {"path": self.path, "instruments": instruments, "stages": stages}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
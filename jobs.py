@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+
+class JobFailed(Exception):
+    """Raised by a job target whose run ended without doing its work; result is kept on the job."""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+class Job:
+    """A single queued workflow run with its status and partial results."""
+
+    def __init__(self, target, params=None):
+        self.id = uuid.uuid4().hex
+        self.target = target
+        self.params = params or {}
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._results = []
+        self._lock = threading.Lock()
+
+    def add_result(self, result):
+        """Record a partial result as soon as the workflow produces it."""
+        with self._lock:
+            self._results.append(result)
+
+    def results(self):
+        with self._lock:
+            return list(self._results)
+
+    def to_dict(self):
+        with self._lock:
+            result_count = len(self._results)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "result_count": result_count,
+        }
+
+
+class JobQueue:
+    """Bounded in-process scheduler that runs jobs on a fixed set of worker threads."""
+
+    def __init__(self, workers=1, max_pending=20, history_limit=100):
+        self.workers = max(1, int(workers))
+        self.history_limit = history_limit
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{n+1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self):
+        """Cancel everything and let the worker threads exit."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+        for _ in self._threads:
+            try:
+                self._pending.put_nowait(None)
+            except queue.Full:
+                break
+
+    def submit(self, target, params=None):
+        """Queue ``target(job)`` and return the job, or raise queue.Full when the backlog is full."""
+        job = Job(target, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+        try:
+            self._pending.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Request cancellation; queued jobs stop immediately, running jobs at their next checkpoint."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == "queued":
+            self._finish(job, "cancelled")
+        return job
+
+    def _worker_loop(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            if job.cancel_event.is_set():
+                if job.finished_at is None:
+                    self._finish(job, "cancelled")
+                continue
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = job.target(job)
+                self._finish(job, "cancelled" if job.cancel_event.is_set() else "succeeded")
+            except JobFailed as e:
+                print(f"Job {job.id} failed: {e}")
+                job.result = e.result
+                job.error = str(e)
+                self._finish(job, "failed")
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}")
+                traceback.print_exc()
+                job.error = str(e)
+                self._finish(job, "failed")
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_limit)]:
+            del self._jobs[job_id]
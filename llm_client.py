@@ -0,0 +1,151 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    """Token bucket that refills `per_minute` units evenly over each minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        """Block until `amount` units are available and take them."""
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedLLM:
+    """Send chat completions concurrently while staying under request and token rate limits.
+
+    Requests run on a fixed-size thread pool, each one first taking a slot from
+    the requests-per-minute bucket and its estimated token cost from the
+    tokens-per-minute bucket. 429 and 5xx responses are retried with
+    exponential backoff, honouring Retry-After when the server sends it.
+    Given a ContentCache, replies are stored under caller-supplied keys and
+    reused instead of calling the API again. Given a StepTimings, every API
+    call is timed as the "llm_request" step.
+    """
+
+    def __init__(self, max_concurrency=4, requests_per_minute=200, tokens_per_minute=40000,
+                 max_retries=5, backoff_base=1.0, backoff_max=60.0, count_tokens=None, cache=None, timings=None):
+        self.cache = cache
+        self.timings = timings
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._count_tokens = count_tokens or (lambda text: len(text) // 4)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "failed": 0, "retries": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def chat(self, client, **request):
+        """Run one chat completion and return the message content."""
+        estimate = request.get("max_tokens") or 0
+        for message in request.get("messages", []):
+            if isinstance(message.get("content"), str):
+                estimate += self._count_tokens(message["content"])
+        for attempt in range(self.max_retries + 1):
+            self._requests.acquire(1)
+            self._tokens.acquire(estimate)
+            self._count("requests")
+            try:
+                response = self._create(client, request)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self._count("failed")
+                    raise
+                self._count("retries")
+                delay = self._retry_delay(e, attempt)
+                print(f"OpenAI request failed ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                continue
+            usage = getattr(response, "usage", None)
+            self._count("prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+            self._count("completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+            return response.choices[0].message.content
+
+    def chat_many(self, client, requests, cache_keys=None):
+        """Run several chat completions concurrently.
+
+        Returns one entry per request in input order: the message content, or
+        the exception that request finally failed with. cache_keys, when given,
+        has one key per request.
+        """
+        futures = []
+        for n, request in enumerate(requests):
+            key = cache_keys[n] if self.cache is not None and cache_keys else None
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                self._count("cache_hits")
+                futures.append(cached)
+            else:
+                futures.append(self._executor.submit(self.chat, client, **request))
+        results = []
+        for n, future in enumerate(futures):
+            if isinstance(future, str):
+                results.append(future)
+                continue
+            try:
+                content = future.result()
+            except Exception as e:
+                results.append(e)
+                continue
+            if self.cache is not None and cache_keys:
+                self.cache.set(cache_keys[n], content)
+            results.append(content)
+        return results
+
+    def stats(self):
+        """API calls made, failed and retried, replies served from the cache, and tokens used."""
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _create(self, client, request):
+        if self.timings is None:
+            return client.chat.completions.create(**request)
+        with self.timings.step("llm_request"):
+            return client.chat.completions.create(**request)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _is_retryable(self, error):
+        import openai
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return False
+
+    def _retry_delay(self, error, attempt):
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        delay = self.backoff_base * (2 ** attempt)
+        return min(self.backoff_max, delay + random.uniform(0, delay / 2))
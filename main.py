@@ -1,33 +1,54 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+# Heavy dependencies (selenium.webdriver, webdriver_manager, lxml, openai, tiktoken, PIL,
+# pyarrow, easyocr) are imported by the stage that uses them, so the API starts quickly;
+# see preload_pipeline() for workers that should load them up front
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
 import time
+import importlib
 import os
+import threading
+import queue
 from datetime import date
-from bs4 import BeautifulSoup
-import pandas as pd
+from typing import List, Optional
 import csv
 import requests
 import re
-from PIL import Image
-from selenium.webdriver.common.action_chains import ActionChains
-import openai
 import base64
 from io import BytesIO
 from dotenv import load_dotenv
 import glob
 import json
-import easyocr
-import tiktoken
 from pathlib import Path
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-import uvicorn
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse, Response
+from driver_pool import DriverPool
+from jobs import JobFailed, JobQueue
+from ocr import OcrPool
+from llm_client import RateLimitedLLM
+from cache import ContentCache, hash_text
+from downloads import DownloadClient, DownloadStage, UnexpectedContentType
+from cpan_http import CpanHttpClient, CpanHttpError, CpanSessionExpired
+from session_store import SessionStore, cookies_from_cdp, cookies_to_cdp
+from search_planner import SearchPlanner, ShardFailed, plan_shards
+from instrument_index import InstrumentIndex
+from checkpoints import CheckpointStore, RunCheckpoint
+from chromedriver import ChromedriverResolver
+from resource_profiles import ResourceProfiles
+from metrics import PipelineMetrics
+from results_store import ResultsStore
+from columnar import extraction_record, extractions_dataset, grid_dataset
+from tables import find_grid_tables, grid_records, parse_grid_html, parse_grid_table
+from concurrent.futures import Future, ThreadPoolExecutor
+from waits import (
+    step_timings,
+    wait_for_any,
+    wait_for_attribute_change,
+    wait_for_document_ready,
+    wait_for_navigation,
+    wait_for_new_window,
+    wait_for_page_settled,
+    wait_for_staleness,
+)
 
 # Load environment variables
 load_dotenv()
@@ -36,27 +57,327 @@ load_dotenv()
 USER_ID = "XAMOTAH"
 PASSWORD = "Logar4life!"
 
-# URLs
-LOGIN_URL = "https://www.fairfaxcounty.gov/myfairfax/auth/forms/ffx-choose-login.jsp"
-CPAN_URL = "https://ccr.fairfaxcounty.gov/cpan/"
+# URLs (overridable so runs can point at benchmarks/mock_cpan.py)
+LOGIN_URL = os.getenv("LOGIN_URL", "https://www.fairfaxcounty.gov/myfairfax/auth/forms/ffx-choose-login.jsp")
+CPAN_URL = os.getenv("CPAN_URL", "https://ccr.fairfaxcounty.gov/cpan/")
 
-app = FastAPI()
+# Search CPAN with plain HTTP requests; Chrome is only used to bootstrap the session or as a fallback
+CPAN_HTTP_MODE = os.getenv("CPAN_HTTP_MODE", "false").lower() in ("1", "true", "yes")
+
+# Saved login session, reused until it expires (set SESSION_STORE_KEY to a Fernet key to encrypt it)
+SESSION_STORE_ENABLED = os.getenv("SESSION_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", os.path.join("fairfax", "session.json"))
+SESSION_STORE_MAX_AGE_HOURS = float(os.getenv("SESSION_STORE_MAX_AGE_HOURS", "12"))
+
+session_store = SessionStore(
+    SESSION_STORE_PATH, key=os.getenv("SESSION_STORE_KEY"), max_age=SESSION_STORE_MAX_AGE_HOURS * 3600,
+) if SESSION_STORE_ENABLED else None
+
+# Driver pool settings
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "1"))
+DRIVER_POOL_HEALTH_CHECK_INTERVAL = int(os.getenv("DRIVER_POOL_HEALTH_CHECK_INTERVAL", "300"))
+DRIVER_POOL_ACQUIRE_TIMEOUT = int(os.getenv("DRIVER_POOL_ACQUIRE_TIMEOUT", "600"))
+
+# chromedriver is resolved once per process (CHROMEDRIVER_PATH, the cached path, PATH, then
+# webdriver_manager's download cache) and checked against the installed Chrome's version;
+# set CHROMEDRIVER_DOWNLOAD=false on workers without internet access
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+CHROME_BINARY = os.getenv("CHROME_BINARY")
+CHROMEDRIVER_CACHE = os.getenv("CHROMEDRIVER_CACHE", os.path.join("fairfax", "chromedriver.json"))
+CHROMEDRIVER_DOWNLOAD = os.getenv("CHROMEDRIVER_DOWNLOAD", "true").lower() in ("1", "true", "yes")
+
+chromedriver_resolver = ChromedriverResolver(
+    configured_path=CHROMEDRIVER_PATH,
+    chrome_binary=CHROME_BINARY,
+    cache_path=CHROMEDRIVER_CACHE,
+    allow_download=CHROMEDRIVER_DOWNLOAD,
+)
+
+# What the browser loads on login, search and grid pages: "lean" blocks images, fonts, media and
+# third-party trackers over CDP, "full" loads everything. Document viewer tabs always load everything.
+RESOURCE_PROFILE = os.getenv("RESOURCE_PROFILE", "lean")
+# Extra URL patterns for the lean profile, comma separated (CDP wildcards such as *.example.com/*)
+RESOURCE_BLOCK_PATTERNS = [p.strip() for p in os.getenv("RESOURCE_BLOCK_PATTERNS", "").split(",") if p.strip()]
+
+resource_profiles = ResourceProfiles(extra_patterns=RESOURCE_BLOCK_PATTERNS)
+
+# Job queue settings
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(DRIVER_POOL_SIZE)))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "20"))
+
+# Load the EasyOCR models at startup instead of on the first document
+OCR_WARMUP = os.getenv("OCR_WARMUP", "false").lower() in ("1", "true", "yes")
+# Number of OCR worker processes (each one loads its own EasyOCR models)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+
+# Content-addressed cache for OCR text and OpenAI replies
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_PATH = os.getenv("CACHE_PATH", os.path.join("fairfax", "cache.sqlite3"))
+CACHE_MAX_MB = int(os.getenv("CACHE_MAX_MB", "512"))
+CACHE_TTL_DAYS = float(os.getenv("CACHE_TTL_DAYS", "30"))
+
+cache = ContentCache(CACHE_PATH, max_bytes=CACHE_MAX_MB * 1024 * 1024, ttl_seconds=CACHE_TTL_DAYS * 24 * 3600) if CACHE_ENABLED else None
+
+ocr_pool = OcrPool(workers=OCR_WORKERS, cache=cache, timings=step_timings)
+
+# Index of instruments already processed, so daily runs only work on new or failed filings
+INDEX_ENABLED = os.getenv("INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+INDEX_PATH = os.getenv("INDEX_PATH", os.path.join("fairfax", "index.sqlite3"))
+
+instrument_index = InstrumentIndex(INDEX_PATH) if INDEX_ENABLED else None
+
+# Extraction results of every run are appended here and can be queried through GET /results
+RESULTS_PATH = os.getenv("RESULTS_PATH", os.path.join("fairfax", "results.jsonl"))
+RESULTS_SYNC_EVERY = int(os.getenv("RESULTS_SYNC_EVERY", "50"))
+RESULTS_SYNC_SECONDS = float(os.getenv("RESULTS_SYNC_SECONDS", "1"))
+
+results_store = ResultsStore(RESULTS_PATH, sync_every=RESULTS_SYNC_EVERY, sync_interval=RESULTS_SYNC_SECONDS)
+
+# Grid rows and extraction results are exported as CSV and/or Parquet partitioned by doc type and month
+EXPORT_FORMATS = {f.strip().lower() for f in os.getenv("EXPORT_FORMATS", "csv,parquet").split(",") if f.strip()}
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join("fairfax", "parquet"))
+EXPORT_COMPACT_AFTER_RUN = os.getenv("EXPORT_COMPACT_AFTER_RUN", "true").lower() in ("1", "true", "yes")
+
+grid_rows_dataset = grid_dataset(os.path.join(EXPORT_DIR, "grid")) if "parquet" in EXPORT_FORMATS else None
+extraction_results_dataset = extractions_dataset(os.path.join(EXPORT_DIR, "extractions")) if "parquet" in EXPORT_FORMATS else None
+
+# Run progress is checkpointed here so interrupted runs can be resumed
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join("fairfax", "checkpoints"))
+
+checkpoint_store = CheckpointStore(CHECKPOINT_DIR)
+# Checkpoints of runs currently executing in this process
+active_checkpoints = set()
+active_checkpoints_lock = threading.Lock()
+
+# Document downloads share one keep-alive session
+DOWNLOAD_POOL_SIZE = int(os.getenv("DOWNLOAD_POOL_SIZE", "10"))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_PER_HOST = int(os.getenv("DOWNLOAD_PER_HOST", "2"))
+
+download_client = DownloadClient(pool_size=DOWNLOAD_POOL_SIZE, chunk_size=DOWNLOAD_CHUNK_SIZE)
+download_stage = DownloadStage(download_client, max_workers=DOWNLOAD_WORKERS, per_host=DOWNLOAD_PER_HOST, timings=step_timings)
+
+# OpenAI extraction settings (set OPENAI_BASE_URL to point at a compatible local server)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "200"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "40000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+# How many documents are analysed at the same time (their chunks share LLM_MAX_CONCURRENCY)
+LLM_DOCUMENT_WORKERS = int(os.getenv("LLM_DOCUMENT_WORKERS", "2"))
+
+# Rows per page requested from the CPAN results grid (0 keeps the site's default and just pages through)
+GRID_PAGE_SIZE = int(os.getenv("GRID_PAGE_SIZE", "100"))
+
+# Backfills are split into shards of this many days (one shard per document type) and run in parallel
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", str(DRIVER_POOL_SIZE)))
+SEARCH_SHARD_DAYS = int(os.getenv("SEARCH_SHARD_DAYS", "7"))
+SEARCH_SHARD_ATTEMPTS = int(os.getenv("SEARCH_SHARD_ATTEMPTS", "3"))
+
+DEFAULT_DOC_TYPES = ["LP", "ST"]
+
+job_queue = JobQueue(workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE)
+
+# Prometheus metrics served on /metrics: stage latency histograms fed by step_timings, pipeline
+# counters, and the stats of the cache, downloads, OCR, LLM client and driver pool read at scrape time
+pipeline_metrics = PipelineMetrics(step_timings)
+if cache is not None:
+    pipeline_metrics.add_source("cache", cache.stats)
+pipeline_metrics.add_source("downloads", download_client.stats)
+pipeline_metrics.add_source("ocr", ocr_pool.stats)
+pipeline_metrics.add_source("results_store", results_store.stats)
+
+# Modules each pipeline stage imports on first use. Workers that will run jobs can import them
+# at startup instead with PRELOAD_STAGES (comma separated, or "all"); the EasyOCR models live in
+# the OCR worker processes and are loaded by OCR_WARMUP
+PIPELINE_STAGE_MODULES = {
+    "browser": ["selenium.webdriver", "selenium.webdriver.support.ui", "selenium.webdriver.support.expected_conditions", "selenium.webdriver.chrome.service", "grid", "lxml.etree"],
+    "http": ["bs4"],
+    "documents": ["PIL.Image"],
+    "llm": ["openai", "tiktoken"],
+    "export": ["pyarrow.dataset", "pyarrow.parquet", "pandas"],
+}
+PRELOAD_STAGES = [s.strip() for s in os.getenv("PRELOAD_STAGES", "").split(",") if s.strip()]
+
+def preload_pipeline(stages=None):
+    """Import the modules of the given pipeline stages (all by default); returns the seconds each stage took."""
+    if not stages or "all" in stages:
+        stages = list(PIPELINE_STAGE_MODULES)
+    timings = {}
+    for stage in stages:
+        if stage not in PIPELINE_STAGE_MODULES:
+            print(f"Unknown pipeline stage {stage!r}, not preloading it.")
+            continue
+        started = time.perf_counter()
+        for module_name in PIPELINE_STAGE_MODULES[stage]:
+            importlib.import_module(module_name)
+        timings[stage] = round(time.perf_counter() - started, 3)
+    print(f"Preloaded pipeline stages: {json.dumps(timings)}")
+    return timings
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm the pool in the background so the API can answer health checks right away
+    threading.Thread(target=driver_pool.start, name="driver-pool-warmup", daemon=True).start()
+    if OCR_WARMUP:
+        threading.Thread(target=ocr_pool.warm_up, name="ocr-warmup", daemon=True).start()
+    if PRELOAD_STAGES:
+        threading.Thread(target=preload_pipeline, args=(PRELOAD_STAGES,), name="pipeline-preload", daemon=True).start()
+    job_queue.start()
+    yield
+    job_queue.shutdown()
+    driver_pool.shutdown()
+    ocr_pool.shutdown()
+    llm.shutdown()
+    download_stage.shutdown(wait=False)
+    download_client.close()
+    results_store.close()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 def root():
     return {"status": "ok", "message": "Fairfax FastAPI is running."}
 
+@app.get("/drivers")
+def driver_pool_status():
+    return {**driver_pool.stats(), "chromedriver": chromedriver_resolver.info()}
+
+@app.get("/resources")
+def resource_usage():
+    """Bytes, requests and load time per page step, by resource profile."""
+    return {
+        "profile": RESOURCE_PROFILE,
+        "blocked_patterns": resource_profiles.profiles.get(RESOURCE_PROFILE, []),
+        "steps": resource_profiles.summary(),
+    }
+
+@app.get("/timings")
+def scraper_timings():
+    return step_timings.summary()
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(pipeline_metrics.render(), media_type=pipeline_metrics.content_type)
+
+@app.get("/cache")
+def cache_status():
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@app.get("/index")
+def index_status():
+    if instrument_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **instrument_index.stats()}
+
+@app.get("/results")
+def query_results(
+    start_date: Optional[date] = None, end_date: Optional[date] = None, owner: Optional[str] = None,
+    apn: Optional[str] = None, run_id: Optional[str] = None, doc_type: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0),
+):
+    """Stored extraction results filtered by document date, owner name, APN, run or doc type."""
+    results = results_store.query(
+        start_date=start_date, end_date=end_date, owner=owner, apn=apn,
+        run_id=run_id, doc_type=doc_type, limit=limit, offset=offset,
+    )
+    return {"results": results, "count": len(results), "offset": offset}
+
+@app.get("/exports")
+def export_status():
+    if grid_rows_dataset is None:
+        return {"formats": sorted(EXPORT_FORMATS)}
+    return {"formats": sorted(EXPORT_FORMATS), "grid": grid_rows_dataset.stats(), "extractions": extraction_results_dataset.stats()}
+
+@app.post("/exports/compact")
+def compact_exports():
+    """Merge the Parquet part files of every partition, dropping repeated instruments."""
+    if grid_rows_dataset is None:
+        return JSONResponse(content={"status": "error", "error": "Parquet export is disabled."}, status_code=409)
+    return {"grid": grid_rows_dataset.compact(), "extractions": extraction_results_dataset.compact()}
+
 @app.post("/run")
-def run_workflow():
+def run_workflow(start_date: Optional[date] = None, end_date: Optional[date] = None, doc_types: Optional[List[str]] = Query(None)):
+    """Queue a run. With start_date/end_date/doc_types the search is sharded across SEARCH_WORKERS.
+
+    The defaults (LP and ST from the first of the month to today) are resolved
+    here and saved with the checkpoint, so a resumed run searches the same range.
+    """
+    sharded = start_date is not None or end_date is not None or bool(doc_types)
+    today = date.today()
+    start_date = start_date or today.replace(day=1)
+    end_date = end_date or today
+    doc_types = [t.strip().upper() for t in (doc_types or DEFAULT_DOC_TYPES) if t.strip()]
+    if end_date < start_date:
+        return JSONResponse(content={"status": "error", "error": "end_date is before start_date."}, status_code=400)
+    params = {"sharded": sharded, "start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "doc_types": doc_types}
     try:
-        result = run_fairfax_workflow()
-        return JSONResponse(content={"status": "success", "result": result})
-    except Exception as e:
-        return JSONResponse(content={"status": "error", "error": str(e)}, status_code=500)
+        job = job_queue.submit(lambda job: run_checkpointed(job, RunCheckpoint(checkpoint_store, job.id, params, before_save=results_store.sync)), params=params)
+    except queue.Full:
+        return JSONResponse(content={"status": "error", "error": "Job queue is full, try again later."}, status_code=429)
+    return JSONResponse(content={"status": "queued", "job_id": job.id}, status_code=202)
+
+@app.get("/checkpoints")
+def list_checkpoints():
+    return {"checkpoints": checkpoint_store.list()}
+
+@app.post("/checkpoints/{run_id}/resume")
+def resume_run(run_id: str):
+    """Queue a job that continues an interrupted run from its last checkpoint."""
+    state = checkpoint_store.load(run_id)
+    if state is None:
+        return JSONResponse(content={"status": "error", "error": "Checkpoint not found."}, status_code=404)
+    if state["status"] == "complete":
+        return JSONResponse(content={"status": "error", "error": "Run already completed."}, status_code=409)
+    with active_checkpoints_lock:
+        if run_id in active_checkpoints:
+            return JSONResponse(content={"status": "error", "error": "Run is still in progress."}, status_code=409)
+    try:
+        job = job_queue.submit(
+            lambda job: run_checkpointed(job, RunCheckpoint(checkpoint_store, run_id, state["params"], state=state, before_save=results_store.sync)),
+            params={**state["params"], "resume": run_id},
+        )
+    except queue.Full:
+        return JSONResponse(content={"status": "error", "error": "Job queue is full, try again later."}, status_code=429)
+    return JSONResponse(content={"status": "queued", "job_id": job.id, "run_id": run_id, "rows_done": state["rows_done"]}, status_code=202)
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": [job.to_dict() for job in job_queue.list()]}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(content={"status": "error", "error": "Job not found."}, status_code=404)
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/results")
+def get_job_results(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(content={"status": "error", "error": "Job not found."}, status_code=404)
+    return {"job_id": job.id, "status": job.status, "results": job.results()}
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return JSONResponse(content={"status": "error", "error": "Job not found."}, status_code=404)
+    return job.to_dict()
 
 def setup_driver():
     """Setup Chrome driver with proper configuration"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
     chrome_options = Options()
+    if CHROME_BINARY:
+        chrome_options.binary_location = CHROME_BINARY
     # chrome_options.headless = True  # Headless is True to run browser in headless mode (deprecated)
     chrome_options.add_argument("--headless=new")  # Use new headless mode for Chrome
     
@@ -76,6 +397,9 @@ def setup_driver():
     chrome_options.add_argument("--disable-ipc-flooding-protection")
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
+    # Network CDP events go to the performance log so waits can detect network idle
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
     
     download_dir = os.path.abspath(os.path.join("fairfax_pdfs"))
     prefs = {
@@ -88,32 +412,50 @@ def setup_driver():
     
     try:
         # Setup WebDriver with timeout
-        service = Service(ChromeDriverManager().install())
+        service = Service(chromedriver_resolver.resolve())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         
         # Set timeouts
         driver.set_page_load_timeout(120)  # Increased to 120 seconds
-        driver.implicitly_wait(15)  # Increased to 15 seconds
+        # No implicit wait: every wait is an explicit condition (see waits.py)
+        driver.implicitly_wait(0)
+        resource_profiles.apply(driver, RESOURCE_PROFILE)
         
         return driver
     except Exception as e:
         print(f"Error setting up Chrome driver: {e}")
         return str(e)  # Return the error message
 
-def safe_click(driver, element, wait_time=2):
-    """Safely click an element with retry logic"""
+def safe_click(driver, element, wait_time=2, navigates=False):
+    """Safely click an element with retry logic.
+
+    wait_time is the longest we wait for the page to be ready after the click.
+    Set navigates for clicks that load a new page: right after the click the
+    old page still reports readyState complete, so we first wait for it to be
+    replaced.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
     max_retries = 3
     for attempt in range(max_retries):
         try:
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-            time.sleep(0.5)
+            WebDriverWait(driver, 5, poll_frequency=0.1).until(EC.element_to_be_clickable(element))
+            if navigates:
+                old_html = driver.find_element(By.TAG_NAME, "html")
+                old_url = driver.current_url
             element.click()
-            time.sleep(wait_time)
+            try:
+                if navigates:
+                    wait_for_navigation(driver, old_html, old_url, timeout=wait_time)
+                wait_for_document_ready(driver, timeout=wait_time)
+            except TimeoutException:
+                pass
             return True
         except Exception as e:
             print(f"Click attempt {attempt + 1} failed: {e}")
             if attempt < max_retries - 1:
-                time.sleep(1)
                 continue
             else:
                 print("All click attempts failed")
@@ -121,6 +463,8 @@ def safe_click(driver, element, wait_time=2):
 
 def wait_for_element_with_retry(driver, by, value, timeout=15, max_retries=3):
     """Wait for element with retry logic"""
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
     for attempt in range(max_retries):
         try:
             wait = WebDriverWait(driver, timeout)
@@ -141,41 +485,139 @@ def wait_for_element_with_retry(driver, by, value, timeout=15, max_retries=3):
             else:
                 raise
 
-def extract_all_tables_to_csv(page_source, output_prefix="fairfax_results"):
-    soup = BeautifulSoup(page_source, "html.parser")
-    tables = soup.find_all("table", class_="k-grid-table k-table k-table-md k-selectable")
+class ResultsPageWriter:
+    """Exports the results grid one page at a time, to a CSV (header row written once) and/or a Parquet dataset."""
+
+    def __init__(self, filename=None, append=False, dataset=None):
+        self.filename = filename
+        self.append = append
+        self.dataset = dataset
+        self.rows_written = 0
+        self.pages_written = 0
+        self._file = None
+        self._writer = None
+
+    def write_page(self, page_number, table_elem):
+        # Only the grid's own subtree is fetched and parsed, not the whole page
+        parsed = parse_grid_html(table_elem.get_attribute("outerHTML"))
+        if parsed is None:
+            return
+        headers, rows = parsed
+        self.write_rows(page_number, headers, rows)
+
+    def write_records(self, page_number, records):
+        """Write a page of grid records (dicts, as returned by the grid's JSON read action)."""
+        headers = list(records[0].keys()) if records else []
+        self.write_rows(page_number, headers, [[record.get(h, "") for h in headers] for record in records])
+
+    def write_rows(self, page_number, headers, rows):
+        if self.filename is not None:
+            if self._file is None:
+                # When resuming, keep the pages an earlier attempt already wrote
+                appending = self.append and os.path.exists(self.filename) and os.path.getsize(self.filename) > 0
+                self._file = open(self.filename, "a" if appending else "w", newline='', encoding='utf-8')
+                self._writer = csv.writer(self._file)
+                if headers and not appending:
+                    self._writer.writerow(headers)
+            self._writer.writerows(rows)
+            self._file.flush()
+        if self.dataset is not None:
+            self.dataset.append(grid_records(headers, rows, page_number))
+        self.rows_written += len(rows)
+        self.pages_written += 1
+        pipeline_metrics.grid_pages.inc()
+        pipeline_metrics.grid_rows.inc(len(rows))
+        print(f"Exported page {page_number} of the results grid ({len(rows)} rows).")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def open_results_writer(output_dir, checkpoint=None):
+    """ResultsPageWriter for a run's results grid, in the formats listed in EXPORT_FORMATS."""
+    return ResultsPageWriter(
+        os.path.join(output_dir, "fairfax_results.csv") if "csv" in EXPORT_FORMATS else None,
+        append=checkpoint is not None and checkpoint.resumed,
+        dataset=grid_rows_dataset,
+    )
+
+def export_run_extractions(run_id, batch_size=5000):
+    """Copy a finished run's extraction results from results_store into the Parquet dataset."""
+    if extraction_results_dataset is None:
+        return 0
+    written = 0
+    batch = []
+    for result in results_store:
+        if result.get("run_id") != run_id:
+            continue
+        batch.append(extraction_record(result))
+        if len(batch) >= batch_size:
+            written += extraction_results_dataset.append(batch)
+            batch = []
+    written += extraction_results_dataset.append(batch)
+    print(f"Exported {written} extraction results of run {run_id} to {extraction_results_dataset.root}.")
+    return written
+
+def compact_exports_after_run():
+    if grid_rows_dataset is None or not EXPORT_COMPACT_AFTER_RUN:
+        return
+    try:
+        grid_rows_dataset.compact(only_dirty=True)
+        extraction_results_dataset.compact(only_dirty=True)
+    except Exception as e:
+        print(f"Could not compact the Parquet exports: {e}")
+
+def checkpointed_page_writer(write_page, checkpoint):
+    """Wrap a ResultsPageWriter method so pages exported before a resume are not written twice."""
+    if checkpoint is None:
+        return write_page
+
+    def on_page(page_number, page):
+        if page_number > checkpoint.pages_exported:
+            write_page(page_number, page)
+            checkpoint.page_exported(page_number)
+    return on_page
+
+def merge_results_csv(paths, dest_path):
+    """Concatenate results CSVs into dest_path, keeping the first row seen for each instrument number."""
+    seen = set()
+    written = 0
+    writer = None
+    with open(dest_path, "w", newline='', encoding='utf-8') as out:
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                headers = next(reader, None)
+                if not headers:
+                    continue
+                # "Instrument Number" in the browser grid, "InstrumentNumber" in the grid's JSON
+                key_column = next((n for n, h in enumerate(headers) if "instrument" in h.lower()), None)
+                if writer is None:
+                    writer = csv.writer(out)
+                    writer.writerow(headers)
+                for row in reader:
+                    if key_column is not None and key_column < len(row):
+                        if row[key_column] in seen:
+                            continue
+                        seen.add(row[key_column])
+                    writer.writerow(row)
+                    written += 1
+    print(f"Merged {len(paths)} result files into {dest_path} ({written} unique rows).")
+    return written
+
+def extract_all_tables_to_csv(page_source, output_prefix="fairfax_results", dataset=None):
+    tables = find_grid_tables(page_source)
     if not tables:
         print("No results tables found on the page.")
         return
 
     for idx, table in enumerate(tables):
-        # Extract headers (only visible columns)
-        headers = []
-        thead = table.find("thead")
-        if thead:
-            header_row = thead.find("tr")
-            if header_row:
-                for th in header_row.find_all("th"):
-                    style = th.get("style", "")
-                    if "display: none" not in style:
-                        col_title = th.find("span", class_="k-column-title")
-                        if col_title:
-                            headers.append(col_title.get_text(strip=True))
-                        else:
-                            headers.append(th.get_text(strip=True))
-        # Extract rows (only visible columns)
-        rows = []
-        tbody = table.find("tbody")
-        if tbody:
-            for tr in tbody.find_all("tr"):
-                row = []
-                tds = tr.find_all("td")
-                for td in tds:
-                    style = td.get("style", "")
-                    if "display: none" not in style:
-                        row.append(td.get_text(strip=True))
-                if row:
-                    rows.append(row)
+        headers, rows = parse_grid_table(table)
+        if dataset is not None:
+            dataset.append(grid_records(headers, rows))
         # Write to CSV
         filename = f"{output_prefix}_table{idx+1}.csv" if len(tables) > 1 else f"{output_prefix}.csv"
         with open(filename, "w", newline='', encoding='utf-8') as f:
@@ -200,7 +642,7 @@ def take_fullpage_screenshot(driver, save_path):
 
 def send_image_to_openai(image_path, prompt="Extract all visible data from this screenshot and return as text."):
     """Send an image to OpenAI Vision API and return the response text."""
-    import os
+    import openai
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY environment variable not set.")
@@ -226,7 +668,7 @@ def screenshot_and_extract():
     try:
         print("Opening Document page...")
         driver.get("https://ccr.fairfaxcounty.gov/cpan/Document")
-        time.sleep(5)  # Wait for page to load
+        wait_for_page_settled(driver, timeout=30)
         screenshot_path = os.path.join("fairfax", "cpan_document_fullpage.png")
         take_fullpage_screenshot(driver, screenshot_path)
         print("Sending screenshot to OpenAI Vision API...")
@@ -237,44 +679,102 @@ def screenshot_and_extract():
         driver.quit()
 
 # --- OCR and OpenAI Extraction Functions (from fairfax_image_analyzer.py) ---
-def extract_text_from_image(image_path):
-    """Extract text from image using EasyOCR"""
+# cl100k_base encoder, loaded on first use and shared by every chunking call
+_token_encoder = None
+
+def get_token_encoder():
+    """Return the cached cl100k_base tiktoken encoder"""
+    global _token_encoder
+    if _token_encoder is None:
+        import tiktoken
+        _token_encoder = tiktoken.get_encoding("cl100k_base")
+    return _token_encoder
+
+def count_tokens(text):
+    """Token count of text for the LLM rate limits, estimated as 4 characters per
+    token when the encoder cannot be loaded (tiktoken downloads it on first use)."""
     try:
-        reader = easyocr.Reader(['en'], gpu=False)
-        result = reader.readtext(image_path, detail=0)
-        text = " ".join(result)
-        return text
-    except Exception as e:
-        print(f"Error extracting text from {image_path}: {e}")
-        return ""
+        return len(get_token_encoder().encode(text))
+    except Exception:
+        return len(text) // 4
+
+def _find_chunk_end(breaks, start, end):
+    """Pick where a chunk ending at or before `end` should stop: a line break in
+    the second half of the window, else the last word break, else `end` itself."""
+    word_break = None
+    half = start + (end - start) // 2
+    for k in range(end, start, -1):
+        if breaks[k] == 2 and k >= half:
+            return k
+        if breaks[k] and word_break is None:
+            word_break = k
+            if k < half:
+                break
+    return word_break or end
+
+def split_text_into_chunks(text, max_tokens=2000, overlap_tokens=0):
+    """Split text into chunks of at most max_tokens tokens.
 
-def split_text_into_chunks(text, max_tokens=2000):
-    """Split text into chunks to avoid token limits"""
+    The text is encoded once and cut on token boundaries, backing off to the
+    nearest line or word break so words are not split. overlap_tokens repeats
+    the tail of each chunk at the start of the next one; it is capped at half
+    of max_tokens so each chunk moves well past the previous one.
+    """
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
     try:
-        enc = tiktoken.get_encoding("cl100k_base")
-        words = text.split()
-        chunks, current_chunk = [], []
-        for word in words:
-            current_chunk.append(word)
-            token_count = len(enc.encode(" ".join(current_chunk)))
-            if token_count > max_tokens:
-                chunks.append(" ".join(current_chunk[:-1]))
-                current_chunk = [word]
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        enc = get_token_encoder()
+        tokens = enc.encode(text)
+        n = len(tokens)
+        pieces = enc.decode_tokens_bytes(tokens)
+        # breaks[k]: 2 if a new line starts at token k, 1 if a new word starts there, 0 otherwise
+        breaks = [0] * (n + 1)
+        breaks[n] = 2
+        for k in range(1, n):
+            prev, cur = pieces[k - 1], pieces[k]
+            if prev.endswith(b"\n") or cur.startswith(b"\n"):
+                breaks[k] = 2
+            elif cur[:1].isspace() or prev[-1:].isspace():
+                breaks[k] = 1
+        chunks = []
+        start = 0
+        while start < n:
+            end = min(start + max_tokens, n)
+            if end < n:
+                end = _find_chunk_end(breaks, start, end)
+            chunk = enc.decode(tokens[start:end]).strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= n:
+                break
+            next_start = end
+            if overlap_tokens > 0:
+                next_start = max(start + 1, end - overlap_tokens)
+                while next_start < end and not breaks[next_start]:
+                    next_start += 1
+            start = next_start
         return chunks
     except Exception as e:
         print(f"Error splitting text into chunks: {e}")
         return [text[i:i+4000] for i in range(0, len(text), 4000)]
 
-def analyze_text_with_openai(text, image_name, client):
-    """Use OpenAI API to extract owner name, address, APN/tax ID, and date with chunking"""
-    try:
-        chunks = split_text_into_chunks(text)
-        all_results = []
-        for i, chunk in enumerate(chunks):
-            print(f"  Processing chunk {i+1}/{len(chunks)} for {image_name}...")
-            prompt = f"""
+def create_openai_client():
+    """OpenAI client for extraction calls; retries are handled by RateLimitedLLM"""
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+llm = RateLimitedLLM(
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+    max_retries=LLM_MAX_RETRIES,
+    count_tokens=count_tokens,
+    cache=cache,
+    timings=step_timings,
+)
+pipeline_metrics.add_source("llm", llm.stats)
+
+EXTRACTION_SYSTEM_PROMPT = "You are a data extraction specialist. Extract only the requested information and return it in valid JSON format."
+EXTRACTION_PROMPT = """
             Extract the following information from this document text chunk:
             1. Owner Name (or Property Owner)
             2. Property Address (full address)
@@ -296,16 +796,33 @@ def analyze_text_with_openai(text, image_name, client):
             Text Content:
             {chunk}
             """
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a data extraction specialist. Extract only the requested information and return it in valid JSON format."},
+
+def analyze_text_with_openai(text, image_name, client):
+    """Use OpenAI API to extract owner name, address, APN/tax ID, and date with chunking"""
+    try:
+        chunks = split_text_into_chunks(text)
+        pipeline_metrics.chunks.inc(len(chunks))
+        requests_to_send = []
+        cache_keys = []
+        for i, chunk in enumerate(chunks):
+            print(f"  Processing chunk {i+1}/{len(chunks)} for {image_name}...")
+            prompt = EXTRACTION_PROMPT.format(image_name=image_name, chunk=chunk)
+            cache_keys.append("llm:" + hash_text(LLM_MODEL, EXTRACTION_SYSTEM_PROMPT, EXTRACTION_PROMPT, chunk))
+            requests_to_send.append({
+                "model": LLM_MODEL,
+                "messages": [
+                    {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=500,
-                temperature=0.1
-            )
-            content = response.choices[0].message.content.strip()
+                "max_tokens": 500,
+                "temperature": 0.1
+            })
+        # Chunks are sent concurrently; responses come back in chunk order
+        all_results = []
+        for content in llm.chat_many(client, requests_to_send, cache_keys=cache_keys):
+            if isinstance(content, Exception):
+                raise content
+            content = content.strip()
             try:
                 if content.startswith("```json"):
                     content = content[7:]
@@ -347,9 +864,202 @@ def clean_apn_taxid(apn):
     cleaned = ''.join(c for c in apn if c.isdigit())
     return cleaned if cleaned else apn
 
+def build_extraction_result(text, image_name, client, row=None, fields=None):
+    """Turn OCR text into the extraction record we store for one document"""
+    result = {"row": row} if row is not None else {}
+    result["image_name"] = image_name
+    result.update(fields or {})
+    if not text.strip():
+        print(f"No text extracted from {image_name}")
+        for key in ("date", "owner_name", "address", "apn_taxid"):
+            result[key] = "No text extracted"
+        return result
+    with step_timings.step("llm_extraction"):
+        analysis_result = analyze_text_with_openai(text, image_name, client)
+    apn_raw = analysis_result.get("apn_taxid", "Not Found")
+    result["date"] = analysis_result.get("date", "Not Found")
+    result["owner_name"] = analysis_result.get("owner_name", "Not Found")
+    result["address"] = analysis_result.get("address", "Not Found")
+    result["apn_taxid"] = clean_apn_taxid(apn_raw)
+    return result
+
+class ExtractionQueue(queue.Queue):
+    """Work queue of the extraction stage; tells the run checkpoint which rows were handed over."""
+
+    def __init__(self, checkpoint=None):
+        super().__init__()
+        self.checkpoint = checkpoint
+
+    def put(self, item, block=True, timeout=None):
+        if item is not None and self.checkpoint is not None:
+            self.checkpoint.row_queued(item[0])
+        super().put(item, block, timeout)
+
+def start_extraction_stage(client, on_result=None, cancel_event=None, checkpoint=None, run_id=None):
+    """Start a thread that turns queued OCR futures into extraction results.
+
+    The scraper puts (row, image_name, ocr_future, fields) items on the returned
+    queue, fields being extra values (doc type, instrument number) copied into the result,
+    and None when it is done; join the returned thread to wait for every result
+    to be stored. Up to LLM_DOCUMENT_WORKERS documents are analysed at once.
+    Each result is tagged with run_id and appended to results_store, and its row
+    is reported to checkpoint as done once the extraction succeeded.
+    """
+    work_queue = ExtractionQueue(checkpoint)
+
+    def handle(row, image_name, ocr_future, fields):
+        try:
+            text = ocr_future.result()
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            extraction_result = build_extraction_result(text, image_name, client, row=row, fields=fields)
+        except Exception as e:
+            print(f"Row {row}: Could not run extraction: {e}")
+            pipeline_metrics.extractions.labels("error").inc()
+            if instrument_index is not None and fields.get("instrument_number"):
+                instrument_index.mark(fields["instrument_number"], fields["doc_type"], "extraction", ok=False, error=e)
+            return
+        print(f"Row {row}: Extraction result: {extraction_result}")
+        extraction_result["run_id"] = run_id
+        try:
+            results_store.append(extraction_result)
+        except Exception as e:
+            print(f"Row {row}: Could not store extraction result: {e}")
+        failed = extraction_result.get("date") in ("Error occurred", "No text extracted")
+        pipeline_metrics.extractions.labels("failed" if failed else "ok").inc()
+        if instrument_index is not None and fields.get("instrument_number"):
+            instrument_index.mark(
+                fields["instrument_number"], fields["doc_type"], "extraction",
+                ok=not failed, error=extraction_result.get("date") if failed else None, result=extraction_result,
+            )
+        if checkpoint is not None and not failed:
+            checkpoint.row_done(row)
+        if on_result is not None:
+            on_result(extraction_result)
+
+    def consume():
+        with ThreadPoolExecutor(max_workers=LLM_DOCUMENT_WORKERS, thread_name_prefix="extraction") as executor:
+            while True:
+                item = work_queue.get()
+                if item is None:
+                    return
+                row, image_name, ocr_future, fields = item
+                if cancel_event is not None and cancel_event.is_set():
+                    ocr_future.cancel()
+                    continue
+                executor.submit(handle, row, image_name, ocr_future, fields)
+
+    thread = threading.Thread(target=consume, name="extraction-stage", daemon=True)
+    thread.start()
+    return work_queue, thread
+
+def _future_error(future):
+    if future.cancelled():
+        return "cancelled"
+    return future.exception()
+
+def track_instrument_stages(fields, document_url, document_path, download_future, text_future):
+    """Record the document, download and OCR stages of an instrument in the index as they finish."""
+    if instrument_index is None or not fields.get("instrument_number"):
+        return
+    key = (fields["instrument_number"], fields["doc_type"])
+    instrument_index.mark(*key, "document", document_url=document_url, document_path=document_path)
+
+    def downloaded(future):
+        error = _future_error(future)
+        instrument_index.mark(*key, "download", ok=error is None, error=error)
+
+    def read(future):
+        error = _future_error(future)
+        if error is None and not future.result().strip():
+            error = "no text"
+        instrument_index.mark(*key, "ocr", ok=error is None, error=error)
+
+    if download_future is not None:
+        download_future.add_done_callback(downloaded)
+    text_future.add_done_callback(read)
+
+def skip_or_resume_indexed_row(row, fields, extraction_queue):
+    """Handle a row from the index instead of the site when possible. Returns True if the row needs no more work here.
+
+    Finished instruments are skipped. Unfinished ones whose document link was
+    found earlier go straight to download (or OCR, if the file is still on
+    disk) without opening the details page; a failed download is looked up again.
+    """
+    if instrument_index is None or not fields.get("instrument_number"):
+        return False
+    entry = instrument_index.get(fields["instrument_number"], fields["doc_type"])
+    if entry is None:
+        return False
+    if entry["stages"].get("extraction", {}).get("status") == "done":
+        print(f"Row {row}: {fields['doc_type']} {fields['instrument_number']} already processed, skipping.")
+        return True
+    download_status = entry["stages"].get("download", {}).get("status")
+    document_path = entry["document_path"]
+    if not entry["document_url"] or not document_path or download_status == "failed":
+        return False
+    if download_status == "done" and os.path.exists(document_path):
+        print(f"Row {row}: Resuming from the downloaded {document_path}")
+        download_future = None
+        text_future = ocr_pool.submit_document(document_path)
+    else:
+        print(f"Row {row}: Resuming with the known document link {entry['document_url']}")
+        download_future = download_stage.submit(entry["document_url"], document_path)
+        text_future = document_text_after_download(row, download_future)
+    track_instrument_stages(fields, entry["document_url"], document_path, download_future, text_future)
+    extraction_queue.put((row, os.path.basename(document_path), text_future, fields))
+    return True
+
+def document_text_after_download(row, download_future, fallback_screenshot=None):
+    """Future for a row's document text once its download finishes.
+
+    The downloaded PDF/TIFF goes through OcrPool.submit_document; if the
+    download fails, the details page screenshot is OCRed instead.
+    """
+    text_future = Future()
+
+    def copy_result(ocr_future):
+        if ocr_future.cancelled():
+            text_future.cancel()
+        elif ocr_future.exception() is not None:
+            text_future.set_exception(ocr_future.exception())
+        else:
+            text_future.set_result(ocr_future.result())
+
+    def on_downloaded(future):
+        if text_future.cancelled():
+            return
+        try:
+            download = future.result()
+            print(f"Row {row}: Downloaded {download.path} ({download.size} bytes, sha256 {download.sha256[:12]})")
+            if download.path.lower().endswith(('.tif', '.tiff')):
+                try:
+                    from PIL import Image
+                    png_filename = os.path.splitext(download.path)[0] + ".png"
+                    with Image.open(download.path) as im:
+                        im.save(png_filename)
+                    print(f"Row {row}: PNG image saved as {png_filename}")
+                except Exception as e:
+                    print(f"Row {row}: Error converting TIFF to PNG: {e}")
+            ocr_future = ocr_pool.submit_document(download.path)
+        except UnexpectedContentType as e:
+            print(f"Row {row}: Downloaded content is not a document. Content-Type: {e.content_type}")
+            ocr_future = None
+        except Exception as e:
+            print(f"Row {row}: Error downloading document: {e}")
+            ocr_future = None
+        if ocr_future is None:
+            if not fallback_screenshot:
+                text_future.set_result("")
+                return
+            ocr_future = ocr_pool.submit(fallback_screenshot[1])
+        ocr_future.add_done_callback(copy_result)
+
+    download_future.add_done_callback(on_downloaded)
+    return text_future
+
 def process_all_screenshots_and_extract():
     """Process all screenshots: OCR + OpenAI extraction, output results as JSON."""
-    from openai import OpenAI
     screenshot_folder = os.path.join("fairfax", "screenshots")
     image_files = []
     for ext in ("*.png", "*.jpg", "*.jpeg"):
@@ -358,39 +1068,26 @@ def process_all_screenshots_and_extract():
         print("No screenshot images found for extraction!")
         return
     print(f"Found {len(image_files)} screenshot images for extraction.")
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    all_results = []
-    for image_path in image_files:
+    client = create_openai_client()
+    # OCR every image on the worker pool first, then run the OpenAI pass concurrently
+    texts = ocr_pool.map(image_files)
+
+    def extract(image_path, text):
         image_name = os.path.basename(image_path)
         print(f"Processing: {image_name}")
-        text = extract_text_from_image(image_path)
-        if not text.strip():
-            print(f"No text extracted from {image_name}")
-            result = {
-                "image_name": image_name,
-                "date": "No text extracted",
-                "owner_name": "No text extracted",
-                "address": "No text extracted",
-                "apn_taxid": "No text extracted"
-            }
-            all_results.append(result)
-            continue
-        analysis_result = analyze_text_with_openai(text, image_name, client)
-        apn_raw = analysis_result.get("apn_taxid", "Not Found")
-        result = {
-            "image_name": image_name,
-            "date": analysis_result.get("date", "Not Found"),
-            "owner_name": analysis_result.get("owner_name", "Not Found"),
-            "address": analysis_result.get("address", "Not Found"),
-            "apn_taxid": clean_apn_taxid(apn_raw)
-        }
-        all_results.append(result)
+        result = build_extraction_result(text, image_name, client)
         print(f"Completed: {image_name}")
+        return result
+
+    with ThreadPoolExecutor(max_workers=LLM_DOCUMENT_WORKERS, thread_name_prefix="extraction") as executor:
+        all_results = list(executor.map(extract, image_files, texts))
     print("\n" + "="*50)
     print("ANALYSIS RESULTS (JSON FORMAT)")
     print("="*50)
     print(json.dumps(all_results, indent=2, ensure_ascii=False))
     print(f"\nTotal images processed: {len(image_files)}")
+    if cache is not None:
+        print(f"Cache stats: {cache.stats()['namespaces']}")
     # Optionally, save to CSV or JSON file
     try:
         output_json = os.path.join(screenshot_folder, "extracted_data.json")
@@ -400,51 +1097,369 @@ def process_all_screenshots_and_extract():
     except Exception as e:
         print(f"Could not save results to file: {e}")
 
-def run_fairfax_workflow():
-    driver = None
+def login_to_myfairfax(driver):
+    """Log in to MyFairfax with the configured credentials"""
+    with step_timings.step("login"):
+        _login_to_myfairfax(driver)
+    save_driver_session(driver)
+
+def save_driver_session(driver):
+    """Save every cookie the browser holds (all domains) to the session store."""
+    if session_store is None:
+        return
+    try:
+        cookies = cookies_from_cdp(driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"])
+        session_store.save(cookies)
+        print(f"Saved {len(cookies)} session cookies to {session_store.path}")
+    except Exception as e:
+        print(f"Could not save session cookies: {e}")
+
+def restore_driver_session(driver):
+    """Load the saved cookies into a fresh browser so the pool's session check can skip the login."""
+    cookies = session_store.load() if session_store is not None else None
+    if not cookies:
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies_to_cdp(cookies)})
+        print(f"Restored {len(cookies)} saved session cookies into Chrome.")
+        return True
+    except Exception as e:
+        print(f"Could not restore saved session cookies: {e}")
+        return False
+
+def setup_pool_driver():
+    driver = setup_driver()
+    if driver is not None and not isinstance(driver, str):
+        restore_driver_session(driver)
+    return driver
+
+def _login_to_myfairfax(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    wait = WebDriverWait(driver, 20)
+    print("Opening login page...")
+    driver.get(LOGIN_URL)
+    print("Waiting for login form to load...")
     try:
-        print("Setting up Chrome driver...")
-        driver = setup_driver()
-        if driver is None or isinstance(driver, str):
-            error_msg = driver if isinstance(driver, str) else "Failed to setup Chrome driver."
-            print(error_msg)
-            return error_msg
-        wait = WebDriverWait(driver, 20)
-        print("Opening login page...")
-        driver.get(LOGIN_URL)
-        print("Waiting for login form to load...")
+        username_field = wait_for_element_with_retry(driver, By.ID, "username")
+        password_field = driver.find_element(By.ID, "password")
+    except Exception as e:
+        print(f"Could not find login form elements: {e}")
+        print("Trying alternative selectors...")
         try:
-            username_field = wait_for_element_with_retry(driver, By.ID, "username")
-            password_field = driver.find_element(By.ID, "password")
-        except Exception as e:
-            print(f"Could not find login form elements: {e}")
-            print("Trying alternative selectors...")
+            username_field = wait_for_element_with_retry(driver, By.NAME, "username")
+            password_field = driver.find_element(By.NAME, "password")
+        except:
+            username_field = wait_for_element_with_retry(driver, By.XPATH, "//input[@type='text']")
+            password_field = driver.find_element(By.XPATH, "//input[@type='password']")
+    resource_profiles.measure(driver, "login_page")
+    print("Entering credentials...")
+    username_field.clear()
+    username_field.send_keys(USER_ID)
+    password_field.clear()
+    password_field.send_keys(PASSWORD)
+    print("Submitting login form...")
+    try:
+        submit_button = driver.find_element(By.XPATH, "//input[@type='submit']")
+    except:
+        submit_button = driver.find_element(By.XPATH, "//button[@type='submit']")
+    safe_click(driver, submit_button, 3, navigates=True)
+    print("Waiting for login to complete...")
+    try:
+        wait_for_staleness(driver, submit_button, timeout=20)
+        wait_for_document_ready(driver, timeout=20)
+    except TimeoutException:
+        print("Login page did not navigate away yet...")
+    try:
+        wait.until(EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Welcome') or contains(text(), 'Dashboard') or contains(text(), 'MyFairfax')]")))
+        print("Login successful!")
+    except:
+        print("Login status unclear, proceeding anyway...")
+
+def is_cpan_session_active(driver):
+    """Open CPAN and check that we were not bounced back to the MyFairfax login"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    driver.get(CPAN_URL)
+    try:
+        WebDriverWait(driver, 15, poll_frequency=0.1).until(
+            lambda d: "myfairfax/auth" in d.current_url or d.find_elements(By.ID, "SearchButton")
+        )
+    except TimeoutException:
+        return False
+    if "myfairfax/auth" in driver.current_url:
+        return False
+    resource_profiles.measure(driver, "cpan_home")
+    return True
+
+driver_pool = DriverPool(
+    DRIVER_POOL_SIZE,
+    create_driver=setup_pool_driver,
+    login=login_to_myfairfax,
+    is_logged_in=is_cpan_session_active,
+    health_check_interval=DRIVER_POOL_HEALTH_CHECK_INTERVAL,
+)
+pipeline_metrics.add_source("driver_pool", driver_pool.stats)
+
+def open_cpan_http_session():
+    """CpanHttpClient with a logged-in session.
+
+    Tries the saved session first, then an HTTP login, then the cookies of a
+    pooled (logged-in) Chrome driver. A session obtained by logging in is saved.
+    """
+    client = CpanHttpClient(CPAN_URL, LOGIN_URL, pool_size=DOWNLOAD_POOL_SIZE)
+    try:
+        saved_cookies = session_store.load() if session_store is not None else None
+        if saved_cookies:
+            client.load_cookies(saved_cookies)
+            with step_timings.step("session_check"):
+                if client.is_logged_in():
+                    print("Reusing the saved CPAN session.")
+                    return client
+            print("Saved session has expired, logging in again...")
+            client.session.cookies.clear()
+        with step_timings.step("http_login"):
+            logged_in = client.login(USER_ID, PASSWORD)
+        if not logged_in:
+            print("HTTP login did not give a CPAN session, borrowing the session of a Chrome driver...")
+            with driver_pool.lease(timeout=DRIVER_POOL_ACQUIRE_TIMEOUT) as driver:
+                client.load_cookies(cookies_from_cdp(driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]))
+            if not client.is_logged_in():
+                raise CpanSessionExpired("CPAN rejected the cookies copied from Chrome")
+        if session_store is not None:
+            session_store.save(client.cookies())
+    except Exception:
+        client.close()
+        raise
+    return client
+
+def run_fairfax_http_workflow(client, doc_types, start_date_str, end_date_str, on_result=None, cancel_event=None, output_dir="fairfax", checkpoint=None, run_id=None):
+    """Same search and per-row extraction as the browser workflow, over plain HTTP.
+
+    Results are read from the grid's JSON endpoint page by page and each row's
+    document link comes from its details page, so no page is ever rendered.
+    """
+    with step_timings.step("search_results"):
+        client.search(doc_types, start_date_str, end_date_str)
+    pdf_folder = os.path.join(output_dir, "fairfax_pdfs")
+    screenshot_folder = os.path.join(output_dir, "screenshots")
+    for folder in (pdf_folder, screenshot_folder):
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+    download_client.sync_cookies(client.cookies())
+    results_writer = open_results_writer(output_dir, checkpoint)
+    documents = []
+    stopped_early = None
+    extraction_queue, extraction_thread = start_extraction_stage(
+        create_openai_client(),
+        on_result=on_result,
+        cancel_event=cancel_event,
+        checkpoint=checkpoint,
+        run_id=run_id,
+    )
+    start_page, first_row = checkpoint.resume_point() if checkpoint is not None else (1, 1)
+    rows_done = checkpoint.rows_done if checkpoint is not None else 0
+    if rows_done:
+        print(f"Resuming after row {rows_done} from grid page {start_page}.")
+    current_page = None
+    try:
+        records = client.iter_results(page_size=GRID_PAGE_SIZE or 100, start_page=start_page, on_page=checkpointed_page_writer(results_writer.write_records, checkpoint))
+        for i, (page_number, record) in enumerate(records, start=first_row - 1):
+            if cancel_event is not None and cancel_event.is_set():
+                print(f"Cancellation requested, stopping before row {i+1}.")
+                break
+            if checkpoint is not None and page_number != current_page:
+                checkpoint.page_started(page_number, i+1)
+                current_page = page_number
+            if i+1 <= rows_done:
+                continue
             try:
-                username_field = wait_for_element_with_retry(driver, By.NAME, "username")
-                password_field = driver.find_element(By.NAME, "password")
-            except:
-                username_field = wait_for_element_with_retry(driver, By.XPATH, "//input[@type='text']")
-                password_field = driver.find_element(By.XPATH, "//input[@type='password']")
-        print("Entering credentials...")
-        username_field.clear()
-        username_field.send_keys(USER_ID)
-        password_field.clear()
-        password_field.send_keys(PASSWORD)
-        print("Submitting login form...")
+                doc_type = str(record.get(client.doc_type_field, "")).strip()
+                instr_num = str(record.get(client.instrument_field, "")).strip()
+                fields = {"doc_type": doc_type, "instrument_number": instr_num}
+                if skip_or_resume_indexed_row(i+1, fields, extraction_queue):
+                    pipeline_metrics.rows.labels("http", "indexed").inc()
+                    continue
+                safe_instr_num = "".join(c for c in instr_num.replace('/', '-') if c.isalnum() or c in ('-'))
+                with step_timings.step("document_lookup"):
+                    document_url, kind = client.document_url(record)
+                if not document_url:
+                    print(f"Row {i+1}: No document link on the details page.")
+                    pipeline_metrics.rows.labels("http", "no_document").inc()
+                    continue
+                document_filename = os.path.join(pdf_folder, f"{doc_type.replace('/', '-')}_{safe_instr_num}_{i+1}.{kind}")
+                documents.append({
+                    "row": i+1,
+                    "doc_type": doc_type,
+                    "instrument_number": instr_num,
+                    "url": document_url,
+                    "path": document_filename,
+                })
+                content_types = ('application/pdf',) if kind == "pdf" else ('image/tiff',)
+                if document_url.lower().endswith(('.pdf', '.tif', '.tiff')):
+                    content_types = None
+                print(f"Row {i+1}: Queued download of {document_url}")
+                download_future = download_stage.submit(document_url, document_filename, content_types=content_types)
+                text_future = document_text_after_download(i+1, download_future)
+                track_instrument_stages(fields, document_url, document_filename, download_future, text_future)
+                extraction_queue.put((i+1, os.path.basename(document_filename), text_future, fields))
+                pipeline_metrics.rows.labels("http", "queued").inc()
+            except CpanSessionExpired:
+                raise
+            except Exception as e:
+                print(f"Row {i+1}: Error processing row: {e}")
+                pipeline_metrics.rows.labels("http", "error").inc()
+            finally:
+                if checkpoint is not None:
+                    checkpoint.row_left(i+1)
+    except (CpanHttpError, requests.RequestException) as e:
+        print(f"Stopped reading CPAN results over HTTP: {e}")
+        stopped_early = str(e)
+    finally:
+        results_writer.close()
+        extraction_queue.put(None)
+        print("Waiting for OCR and extraction of the remaining documents...")
+        extraction_thread.join()
+    print(f"Step timings: {json.dumps(step_timings.summary())}")
+    try:
+        documents_list_path = os.path.join(screenshot_folder, "documents_list.json")
+        with open(documents_list_path, "w", encoding="utf-8") as f:
+            json.dump(documents, f, indent=2, ensure_ascii=False)
+        print(f"Document URLs written to {documents_list_path}")
+    except Exception as e:
+        print(f"Could not write documents list: {e}")
+    if stopped_early:
+        return f"Stopped early: {stopped_early}"
+    if results_writer.pages_written or (checkpoint is not None and checkpoint.pages_exported):
+        print(f"Exported {results_writer.rows_written} rows from {results_writer.pages_written} grid page(s).")
+        return "Data exported to CSV."
+    print("No results returned by the CPAN grid.")
+
+def run_checkpointed(job, checkpoint):
+    """Job target: run (or resume) the workflow described by checkpoint.params, saving progress as it goes."""
+    params = checkpoint.state["params"]
+    with active_checkpoints_lock:
+        active_checkpoints.add(checkpoint.run_id)
+    status = "failed"
+    try:
+        with step_timings.step("run"):
+            if params.get("sharded"):
+                result = run_sharded_workflow(
+                    date.fromisoformat(params["start_date"]), date.fromisoformat(params["end_date"]), params["doc_types"],
+                    on_result=job.add_result, cancel_event=job.cancel_event, checkpoint=checkpoint,
+                )
+                done = not result["failed"]
+            else:
+                # Checkpoints saved before the defaults were stored have no dates or doc types
+                result = run_fairfax_workflow(
+                    on_result=job.add_result, cancel_event=job.cancel_event, doc_types=params.get("doc_types"),
+                    start_date=date.fromisoformat(params["start_date"]) if params.get("start_date") else None,
+                    end_date=date.fromisoformat(params["end_date"]) if params.get("end_date") else None,
+                    checkpoint=checkpoint, run_id=checkpoint.run_id,
+                )
+                done = result == "Data exported to CSV."
+        if job.cancel_event.is_set():
+            status = "cancelled"
+        elif done:
+            status = "complete"
+            export_run_extractions(checkpoint.run_id)
+        elif params.get("sharded"):
+            raise JobFailed(f"{len(result['failed'])} of {result['shards']} search shards failed: {', '.join(result['failed'])}", result)
+        else:
+            raise JobFailed(result or "The search returned no results.", result)
+        return result
+    finally:
+        checkpoint.finish(status)
+        compact_exports_after_run()
+        with active_checkpoints_lock:
+            active_checkpoints.discard(checkpoint.run_id)
+
+def run_sharded_workflow(start_date, end_date, doc_types, on_result=None, cancel_event=None, checkpoint=None):
+    """Search a (possibly long) date range by splitting it into shards run on SEARCH_WORKERS workers.
+
+    Each shard writes to its own folder under fairfax/shards; the shard CSVs
+    are merged into fairfax/fairfax_results.csv, de-duplicated by instrument number.
+    Shards a checkpoint records as done are not searched again.
+    """
+    shards = plan_shards(start_date, end_date, doc_types, days_per_shard=SEARCH_SHARD_DAYS)
+    print(f"Planned {len(shards)} search shards for {', '.join(doc_types)} from {start_date} to {end_date}.")
+    if checkpoint is not None:
+        for shard in shards:
+            if checkpoint.state["shards"].get(shard.id) == "done":
+                shard.status = "done"
+    pending = [s for s in shards if s.status != "done"]
+    if len(pending) < len(shards):
+        print(f"Resuming: {len(shards) - len(pending)} shards already done, {len(pending)} to go.")
+
+    def run_shard(shard, emit, cancel_event):
+        result = run_fairfax_workflow(
+            on_result=emit, cancel_event=cancel_event, doc_types=shard.doc_types,
+            start_date=shard.start_date, end_date=shard.end_date,
+            output_dir=os.path.join("fairfax", "shards", shard.id),
+            run_id=checkpoint.run_id if checkpoint is not None else None,
+        )
+        if result != "Data exported to CSV.":
+            raise ShardFailed(result or "search did not return a results table")
+
+    on_status = (lambda shard: checkpoint.shard_status(shard.id, shard.status)) if checkpoint is not None else None
+    planner = SearchPlanner(run_shard, workers=SEARCH_WORKERS, max_attempts=SEARCH_SHARD_ATTEMPTS, on_status=on_status)
+    planner.run(pending, on_result=on_result, cancel_event=cancel_event)
+    summary = planner.summary(shards)
+    if "csv" in EXPORT_FORMATS:
+        shard_csvs = [os.path.join("fairfax", "shards", s.id, "fairfax_results.csv") for s in shards if s.status == "done"]
+        summary["csv_rows"] = merge_results_csv(shard_csvs, os.path.join("fairfax", "fairfax_results.csv"))
+    try:
+        with open(os.path.join("fairfax", "shards", "shards.json"), "w", encoding="utf-8") as f:
+            json.dump([s.to_dict() for s in shards], f, indent=2)
+    except Exception as e:
+        print(f"Could not write shard summary: {e}")
+    print(f"Sharded search finished: {json.dumps(summary)}")
+    return summary
+
+def run_fairfax_workflow(on_result=None, cancel_event=None, doc_types=None, start_date=None, end_date=None, output_dir="fairfax", checkpoint=None, run_id=None):
+    """Run the CPAN search and per-row extraction.
+
+    on_result is called with each row's extraction result as soon as it is ready,
+    and cancel_event (a threading.Event) stops the run between rows when set.
+    doc_types and the start_date/end_date range default to LP and ST from the
+    first of the month to today; output files go under output_dir. Progress is
+    saved to checkpoint, and a resumed checkpoint continues where it stopped.
+    Extraction results are appended to results_store tagged with run_id.
+    With CPAN_HTTP_MODE the search runs over plain HTTP and Chrome is only
+    used if the HTTP session or search cannot be set up.
+    """
+    today = date.today()
+    values_to_select = list(doc_types or DEFAULT_DOC_TYPES)
+    start_date_str = (start_date or today.replace(day=1)).strftime("%m/%d/%Y")
+    end_date_str = (end_date or today).strftime("%m/%d/%Y")
+    if CPAN_HTTP_MODE:
+        client = None
         try:
-            submit_button = driver.find_element(By.XPATH, "//input[@type='submit']")
-        except:
-            submit_button = driver.find_element(By.XPATH, "//button[@type='submit']")
-        safe_click(driver, submit_button, 3)
-        print("Waiting for login to complete...")
-        time.sleep(8)
+            client = open_cpan_http_session()
+            return run_fairfax_http_workflow(
+                client, values_to_select, start_date_str, end_date_str,
+                on_result=on_result, cancel_event=cancel_event, output_dir=output_dir, checkpoint=checkpoint,
+                run_id=run_id,
+            )
+        except (CpanHttpError, requests.RequestException) as e:
+            print(f"HTTP search failed ({e}), falling back to the browser...")
+        finally:
+            if client is not None:
+                client.close()
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import Select, WebDriverWait
+    from grid import iter_grid_rows
+    driver = None
+    driver_broken = False
+    error = None
+    try:
+        print("Borrowing a logged-in Chrome driver from the pool...")
         try:
-            wait.until(EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Welcome') or contains(text(), 'Dashboard') or contains(text(), 'MyFairfax')]")))
-            print("Login successful!")
-        except:
-            print("Login status unclear, proceeding anyway...")
-        print("Navigating to CPAN page...")
-        driver.get(CPAN_URL)
+            driver = driver_pool.acquire(timeout=DRIVER_POOL_ACQUIRE_TIMEOUT)
+        except Exception as e:
+            print(f"Could not get a Chrome driver: {e}")
+            return str(e)
         print("Waiting for search panel button...")
         try:
             search_button = wait_for_element_with_retry(driver, By.ID, "SearchButton")
@@ -453,7 +1468,6 @@ def run_fairfax_workflow():
         except Exception as e:
             print(f"Could not click search panel button: {e}")
             pass
-        time.sleep(2)
         print("Selecting 'Land Records'...")
         try:
             land_records_button = wait_for_element_with_retry(driver, By.ID, "SideMenu_LandRecords")
@@ -464,16 +1478,18 @@ def run_fairfax_workflow():
         try:
             search_type_dropdown = Select(wait_for_element_with_retry(driver, By.ID, "LR_SearchType_SearchBy"))
             search_type_dropdown.select_by_value("3")
-            time.sleep(2)
         except Exception as e:
             print(f"Could not select 'DOCUMENT TYPE': {e}")
         try:
-            deed_doc_type_select = Select(wait_for_element_with_retry(driver, By.ID, "deedDocTypeDT"))
+            deed_doc_type_elem = wait_for_element_with_retry(driver, By.ID, "deedDocTypeDT")
+            # The document type options are filled in after the search type changes
+            WebDriverWait(driver, 15, poll_frequency=0.1).until(
+                lambda d: deed_doc_type_elem.find_elements(By.TAG_NAME, "option")
+            )
+            deed_doc_type_select = Select(deed_doc_type_elem)
             deed_doc_type_select.deselect_all()
-            values_to_select = ["LP", "ST"]
             for value in values_to_select:
                 deed_doc_type_select.select_by_value(value)
-                time.sleep(1)
         except Exception as e:
             print(f"Could not select document types: {e}")
         print("Selecting 'ALL' from sub-type dropdown...")
@@ -490,10 +1506,6 @@ def run_fairfax_workflow():
             print("Selected '7 Days Ago' from date range dropdown.")
         except Exception as e:
             print(f"Could not select '7 Days Ago' from dropdown: {e}")
-        today = date.today()
-        start_date = today.replace(day=1)
-        start_date_str = start_date.strftime("%m/%d/%Y")
-        end_date_str = today.strftime("%m/%d/%Y")
         try:
             start_date_input = wait_for_element_with_retry(driver, By.ID, "LR_startdate")
             driver.execute_script("arguments[0].value = arguments[1];", start_date_input, start_date_str)
@@ -504,15 +1516,20 @@ def run_fairfax_workflow():
         print("Clicking search button...")
         try:
             final_search_button = wait_for_element_with_retry(driver, By.ID, "Search")
-            safe_click(driver, final_search_button, 3)
+            safe_click(driver, final_search_button, 3, navigates=True)
         except Exception as e:
             print(f"Could not click search button: {e}")
         print(f"Search for {values_to_select} completed. Waiting for results to load...")
         table_xpath = "/html/body/div[1]/div/div/div[3]/table"
+        # Each grid page is written to the CSV as soon as it is rendered
+        results_writer = open_results_writer(output_dir, checkpoint)
+        extraction_thread = None
         try:
-            table_elem = wait_for_element_with_retry(driver, By.XPATH, table_xpath, timeout=60)
+            with step_timings.step("search_results"):
+                table_elem = wait_for_element_with_retry(driver, By.XPATH, table_xpath, timeout=60)
             print("Results table appeared!")
-            screenshot_folder = os.path.join("fairfax", "screenshots")
+            resource_profiles.measure(driver, "search_results")
+            screenshot_folder = os.path.join(output_dir, "screenshots")
             if not os.path.exists(screenshot_folder):
                 os.makedirs(screenshot_folder)
             from datetime import datetime
@@ -524,24 +1541,57 @@ def run_fairfax_workflow():
             driver.execute_script('arguments[0].style.border = "3px solid red";', table_elem)
             driver.execute_script('var ths = arguments[0].querySelectorAll("thead tr"); for (var i=0; i<ths.length; ++i) { ths[i].style.background = "yellow"; }', table_elem)
             driver.execute_script('var trs = arguments[0].querySelectorAll("tbody tr"); for (var i=0; i<trs.length; ++i) { trs[i].style.background = "lightgreen"; }', table_elem)
-            pdf_folder = os.path.join("fairfax", "fairfax_pdfs")
+            pdf_folder = os.path.join(output_dir, "fairfax_pdfs")
             if not os.path.exists(pdf_folder):
                 os.makedirs(pdf_folder)
-            screenshot_folder = os.path.join("fairfax", "screenshots")
+            screenshot_folder = os.path.join(output_dir, "screenshots")
             if not os.path.exists(screenshot_folder):
                 os.makedirs(screenshot_folder)
             screenshot_filenames = []
+            documents = []
             main_window = driver.current_window_handle
             print("Iterating over table rows to download PDFs from details icon...")
-            rows = table_elem.find_elements(By.XPATH, ".//tbody/tr")
-            all_extraction_results = []
-            from openai import OpenAI
-            openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            for i, row in enumerate(rows):
+            openai_client = create_openai_client()
+            # OCR and OpenAI extraction run alongside the browser instead of inside the row loop
+            extraction_queue, extraction_thread = start_extraction_stage(
+                openai_client,
+                on_result=on_result,
+                cancel_event=cancel_event,
+                checkpoint=checkpoint,
+                run_id=run_id,
+            )
+            start_page, first_row = checkpoint.resume_point() if checkpoint is not None else (1, 1)
+            rows_done = checkpoint.rows_done if checkpoint is not None else 0
+            if rows_done:
+                print(f"Resuming after row {rows_done} from grid page {start_page}.")
+            current_page = None
+            write_page = checkpointed_page_writer(results_writer.write_page, checkpoint)
+
+            def on_grid_page(page_number, page):
+                resource_profiles.measure(driver, "grid_page")
+                write_page(page_number, page)
+            # Rows are streamed page by page, so only the current page's elements are ever held
+            grid_rows = iter_grid_rows(
+                driver, table_xpath, on_page=on_grid_page,
+                page_size=GRID_PAGE_SIZE, start_page=start_page,
+            )
+            for i, (page_number, row) in enumerate(grid_rows, start=first_row - 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    print(f"Cancellation requested, stopping before row {i+1}.")
+                    break
+                if checkpoint is not None and page_number != current_page:
+                    checkpoint.page_started(page_number, i+1)
+                    current_page = page_number
+                if i+1 <= rows_done:
+                    continue
                 try:
                     cells = row.find_elements(By.TAG_NAME, "td")
                     if not cells:
                         continue
+                    row_fields = {"doc_type": cells[2].text.strip(), "instrument_number": cells[3].text.strip()}
+                    if skip_or_resume_indexed_row(i+1, row_fields, extraction_queue):
+                        pipeline_metrics.rows.labels("browser", "indexed").inc()
+                        continue
                     # Find the <img class="imgIcon" src="../Images/ImageIcon.gif"> in the row
                     details_icon = None
                     try:
@@ -550,19 +1600,26 @@ def run_fairfax_workflow():
                         details_icon = None
                     if details_icon:
                         print(f"Row {i+1}: Found details icon, clicking to open details page...")
+                        handles_before = driver.window_handles
                         try:
                             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", details_icon)
-                            time.sleep(0.5)
                             driver.execute_script("arguments[0].click();", details_icon)
                         except Exception as e:
                             print(f"Row {i+1}: Could not click details icon via JS: {e}")
-                        time.sleep(3)  # Increased wait for new tab to open
+                        try:
+                            with step_timings.step("open_tab"):
+                                wait_for_new_window(driver, handles_before, timeout=15)
+                        except TimeoutException:
+                            pass
                         # Switch to new tab
                         window_handles = driver.window_handles
                         if len(window_handles) > 1:
                             new_tab = [h for h in window_handles if h != main_window][0]
                             driver.switch_to.window(new_tab)
-                            time.sleep(3)  # Increased wait for page to load
+                            with step_timings.step("tab_load"):
+                                wait_for_page_settled(driver, timeout=30)
+                            # New tabs are not blocked, so the viewer is measured under the full profile
+                            resource_profiles.measure(driver, "viewer")
                             try:
                                 driver.maximize_window()
                                 print(f"Row {i+1}: Opened page in full screen mode")
@@ -575,176 +1632,132 @@ def run_fairfax_workflow():
                                 driver.save_screenshot(screenshot_path)
                                 screenshot_filenames.append(screenshot_filename)
                                 print(f"Row {i+1}: Details page screenshot saved as {screenshot_path}")
-                                # --- Immediately run OCR and OpenAI extraction on this screenshot ---
-                                text = extract_text_from_image(screenshot_path)
-                                if not text.strip():
-                                    print(f"Row {i+1}: No text extracted from screenshot.")
-                                    extraction_result = {
-                                        "row": i+1,
-                                        "image_name": screenshot_filename,
-                                        "date": "No text extracted",
-                                        "owner_name": "No text extracted",
-                                        "address": "No text extracted",
-                                        "apn_taxid": "No text extracted"
-                                    }
-                                else:
-                                    analysis_result = analyze_text_with_openai(text, screenshot_filename, openai_client)
-                                    apn_raw = analysis_result.get("apn_taxid", "Not Found")
-                                    extraction_result = {
-                                        "row": i+1,
-                                        "image_name": screenshot_filename,
-                                        "date": analysis_result.get("date", "Not Found"),
-                                        "owner_name": analysis_result.get("owner_name", "Not Found"),
-                                        "address": analysis_result.get("address", "Not Found"),
-                                        "apn_taxid": clean_apn_taxid(apn_raw)
-                                    }
-                                all_extraction_results.append(extraction_result)
-                                print(f"Row {i+1}: Extraction result: {extraction_result}")
-                                # Optionally, save after each row
-                                try:
-                                    output_json = os.path.join(screenshot_folder, "extracted_data_incremental.json")
-                                    with open(output_json, "w", encoding="utf-8") as f:
-                                        json.dump(all_extraction_results, f, indent=2, ensure_ascii=False)
-                                except Exception as e:
-                                    print(f"Row {i+1}: Could not save incremental extraction results: {e}")
+                                details_screenshot = (screenshot_filename, screenshot_path)
                             except Exception as e:
-                                print(f"Row {i+1}: Could not take details page screenshot or run extraction: {e}")
-                            # --- Try to download PDF first ---
-                            pdf_downloaded = False
-                            screenshot_taken = False
+                                details_screenshot = None
+                                print(f"Row {i+1}: Could not take details page screenshot: {e}")
+                            # Only the document URL is collected here; the download itself runs on the
+                            # download stage so the browser can move on to the next row straight away
+                            doc_type = cells[2].text.strip().replace('/', '-')
+                            instr_num = cells[3].text.strip().replace('/', '-')
+                            safe_instr_num = "".join(c for c in instr_num if c.isalnum() or c in ('-'))
+                            document_url = None
+                            document_filename = None
+                            content_types = None
+                            # --- Try PDF first ---
                             try:
                                 pdf_dropdown = wait_for_element_with_retry(driver, By.ID, "TIFForPDF", timeout=10)
                                 select_pdf = Select(pdf_dropdown)
                                 select_pdf.select_by_value("PDF")
                                 print(f"Row {i+1}: Selected PDF from dropdown on document page.")
-                                time.sleep(2)  # Wait for the PDF to load
                                 pdf_url = None
                                 try:
-                                    pdf_link_elem = driver.find_element(By.CSS_SELECTOR, "#tiffImageViewer a[href$='.pdf']")
-                                    pdf_url = pdf_link_elem.get_attribute("href")
+                                    # Wait for the viewer to show either a PDF link or an embedded PDF
+                                    with step_timings.step("pdf_lookup"):
+                                        pdf_elem = wait_for_any(driver, [
+                                            (By.CSS_SELECTOR, "#tiffImageViewer a[href$='.pdf']"),
+                                            (By.CSS_SELECTOR, "#tiffImageViewer embed[type='application/pdf'], #tiffImageViewer iframe"),
+                                        ], timeout=10)
+                                    pdf_url = pdf_elem.get_attribute("href") if pdf_elem.tag_name == "a" else pdf_elem.get_attribute("src")
                                 except:
-                                    try:
-                                        pdf_embed_elem = driver.find_element(By.CSS_SELECTOR, "#tiffImageViewer embed[type='application/pdf'], #tiffImageViewer iframe")
-                                        pdf_url = pdf_embed_elem.get_attribute("src")
-                                    except:
-                                        pdf_url = None
+                                    pdf_url = None
                                 if pdf_url and 'about:blank' not in pdf_url:
                                     print(f"Row {i+1}: Found PDF URL: {pdf_url}")
-                                    try:
-                                        cookies = driver.get_cookies()
-                                        s = requests.Session()
-                                        for cookie in cookies:
-                                            s.cookies.set(cookie['name'], cookie['value'])
-                                        from urllib.parse import urljoin
-                                        if not pdf_url.startswith('http'):
-                                            pdf_url = urljoin(driver.current_url, pdf_url)
-                                        response = s.get(pdf_url, stream=True, timeout=60, headers={'User-Agent': 'Mozilla/5.0'})
-                                        if 'application/pdf' in response.headers.get('Content-Type', '') or pdf_url.lower().endswith('.pdf'):
-                                            doc_type = cells[2].text.strip().replace('/', '-')
-                                            instr_num = cells[3].text.strip().replace('/', '-')
-                                            safe_instr_num = "".join(c for c in instr_num if c.isalnum() or c in ('-'))
-                                            pdf_filename = os.path.join(pdf_folder, f"{doc_type}_{safe_instr_num}_{i+1}.pdf")
-                                            with open(pdf_filename, "wb") as f:
-                                                for chunk in response.iter_content(chunk_size=8192):
-                                                    f.write(chunk)
-                                            print(f"Row {i+1}: PDF saved as {pdf_filename}")
-                                            # --- Take screenshot of the whole page ---
-                                            try:
-                                                doc_type = cells[2].text.strip().replace('/', '-')
-                                                instr_num = cells[3].text.strip().replace('/', '-')
-                                                safe_instr_num = "".join(c for c in instr_num if c.isalnum() or c in ('-'))
-                                                screenshot_filename = f"{doc_type}_{safe_instr_num}_{i+1}_page.png"
-                                                screenshot_path = os.path.join(pdf_folder, screenshot_filename)
-                                                driver.save_screenshot(screenshot_path)
-                                                print(f"Row {i+1}: Screenshot saved as {screenshot_path}")
-                                                screenshot_taken = True
-                                            except Exception as e:
-                                                print(f"Row {i+1}: Could not take screenshot: {e}")
-                                            pdf_downloaded = True
-                                        else:
-                                            print(f"Row {i+1}: Downloaded content is not a PDF. Content-Type: {response.headers.get('Content-Type', 'N/A')}")
-                                    except Exception as e:
-                                        print(f"Row {i+1}: Error downloading PDF: {e}")
+                                    document_url = pdf_url
+                                    document_filename = os.path.join(pdf_folder, f"{doc_type}_{safe_instr_num}_{i+1}.pdf")
+                                    # Trust a .pdf URL, otherwise insist on a PDF Content-Type
+                                    content_types = None if pdf_url.lower().endswith('.pdf') else ('application/pdf',)
                                 else:
                                     print(f"Row {i+1}: No valid PDF URL found.")
                             except Exception as e:
-                                print(f"Row {i+1}: Could not select PDF from dropdown or download PDF: {e}")
-                            # --- If PDF not downloaded, try TIFF ---
-                            if not pdf_downloaded and not screenshot_taken:
+                                print(f"Row {i+1}: Could not select PDF from dropdown: {e}")
+                            # --- If there is no PDF, fall back to the TIFF image ---
+                            if not document_url:
+                                tiff_locator = (By.CSS_SELECTOR, "#tiffImageViewer img.iv-large-image")
+                                old_tiff_src = None
                                 try:
+                                    existing_images = driver.find_elements(*tiff_locator)
+                                    old_tiff_src = existing_images[0].get_attribute("src") if existing_images else None
                                     tiff_dropdown = wait_for_element_with_retry(driver, By.ID, "TIFForPDF", timeout=10)
                                     select = Select(tiff_dropdown)
                                     select.select_by_value("TIFF")
                                     print(f"Row {i+1}: Selected TIFF from dropdown on document page.")
-                                    time.sleep(3)  # Increased wait for the image to update
                                 except Exception as e:
                                     print(f"Row {i+1}: Could not select TIFF from dropdown on document page: {e}")
                                 tiff_url = None
                                 try:
-                                    tiff_image_elem = wait_for_element_with_retry(driver, By.CSS_SELECTOR, "#tiffImageViewer img.iv-large-image", timeout=15)
+                                    # Wait for the viewer to load a new image rather than a fixed delay
+                                    with step_timings.step("tiff_lookup"):
+                                        try:
+                                            tiff_image_elem = wait_for_attribute_change(driver, tiff_locator, "src", old_tiff_src, timeout=15)
+                                        except TimeoutException:
+                                            tiff_image_elem = wait_for_element_with_retry(driver, *tiff_locator, timeout=5, max_retries=1)
                                     tiff_url = tiff_image_elem.get_attribute("src")
                                     print(f"Row {i+1}: Found TIFF image src: {tiff_url}")
-                                    # --- Take screenshot of the whole page ---
-                                    try:
-                                        doc_type = cells[2].text.strip().replace('/', '-')
-                                        instr_num = cells[3].text.strip().replace('/', '-')
-                                        safe_instr_num = "".join(c for c in instr_num if c.isalnum() or c in ('-'))
-                                        screenshot_filename = f"{doc_type}_{safe_instr_num}_{i+1}_page.png"
-                                        screenshot_path = os.path.join(pdf_folder, screenshot_filename)
-                                        driver.save_screenshot(screenshot_path)
-                                        print(f"Row {i+1}: Screenshot saved as {screenshot_path}")
-                                        screenshot_taken = True
-                                    except Exception as e:
-                                        print(f"Row {i+1}: Could not take screenshot: {e}")
-                                    time.sleep(2)
                                 except Exception as e:
                                     print(f"Row {i+1}: Could not find TIFF image: {e}")
                                 if tiff_url and 'about:blank' not in tiff_url:
-                                    print(f"Row {i+1}: Downloading TIFF image via requests...")
-                                    try:
-                                        cookies = driver.get_cookies()
-                                        s = requests.Session()
-                                        for cookie in cookies:
-                                            s.cookies.set(cookie['name'], cookie['value'])
-                                        from urllib.parse import urljoin
-                                        if not tiff_url.startswith('http'):
-                                            tiff_url = urljoin(driver.current_url, tiff_url)
-                                        response = s.get(tiff_url, stream=True, timeout=60, headers={'User-Agent': 'Mozilla/5.0'})
-                                        if 'image/tiff' in response.headers.get('Content-Type', '') or tiff_url.lower().endswith('.tif') or tiff_url.lower().endswith('.tiff'):
-                                            doc_type = cells[2].text.strip().replace('/', '-')
-                                            instr_num = cells[3].text.strip().replace('/', '-')
-                                            safe_instr_num = "".join(c for c in instr_num if c.isalnum() or c in ('-'))
-                                            filename = os.path.join(pdf_folder, f"{doc_type}_{safe_instr_num}_{i+1}.tiff")
-                                            with open(filename, "wb") as f:
-                                                for chunk in response.iter_content(chunk_size=8192):
-                                                    f.write(chunk)
-                                            print(f"Row {i+1}: TIFF image saved as {filename}")
-                                            # Convert TIFF to PNG
-                                            try:
-                                                im = Image.open(filename)
-                                                png_filename = os.path.join(pdf_folder, f"{doc_type}_{safe_instr_num}_{i+1}.png")
-                                                im.save(png_filename)
-                                                print(f"Row {i+1}: PNG image saved as {png_filename}")
-                                            except Exception as e:
-                                                print(f"Row {i+1}: Error converting TIFF to PNG: {e}")
-                                        else:
-                                            print(f"Row {i+1}: Downloaded content is not a TIFF image. Content-Type: {response.headers.get('Content-Type', 'N/A')}")
-                                    except Exception as e:
-                                        print(f"Row {i+1}: Error downloading TIFF image with requests: {e}")
+                                    document_url = tiff_url
+                                    document_filename = os.path.join(pdf_folder, f"{doc_type}_{safe_instr_num}_{i+1}.tiff")
+                                    content_types = None if tiff_url.lower().endswith(('.tif', '.tiff')) else ('image/tiff',)
                                 else:
                                     print(f"Row {i+1}: No valid TIFF image URL found.")
+                            # --- Take screenshot of the whole page ---
+                            if document_url:
+                                try:
+                                    screenshot_filename = f"{doc_type}_{safe_instr_num}_{i+1}_page.png"
+                                    screenshot_path = os.path.join(pdf_folder, screenshot_filename)
+                                    driver.save_screenshot(screenshot_path)
+                                    print(f"Row {i+1}: Screenshot saved as {screenshot_path}")
+                                except Exception as e:
+                                    print(f"Row {i+1}: Could not take screenshot: {e}")
+                            # --- Queue the download, then OCR/extraction of whatever it produces ---
+                            try:
+                                if document_url:
+                                    from urllib.parse import urljoin
+                                    if not document_url.startswith('http'):
+                                        document_url = urljoin(driver.current_url, document_url)
+                                    download_client.sync_from_driver(driver)
+                                    documents.append({
+                                        "row": i+1,
+                                        "doc_type": cells[2].text.strip(),
+                                        "instrument_number": cells[3].text.strip(),
+                                        "url": document_url,
+                                        "path": document_filename,
+                                    })
+                                    print(f"Row {i+1}: Queued download of {document_url}")
+                                    download_future = download_stage.submit(document_url, document_filename, content_types=content_types)
+                                    text_future = document_text_after_download(i+1, download_future, details_screenshot)
+                                    track_instrument_stages(row_fields, document_url, document_filename, download_future, text_future)
+                                    extraction_queue.put((i+1, os.path.basename(document_filename), text_future, row_fields))
+                                    pipeline_metrics.rows.labels("browser", "queued").inc()
+                                elif details_screenshot:
+                                    extraction_queue.put((i+1, details_screenshot[0], ocr_pool.submit(details_screenshot[1]), row_fields))
+                                    pipeline_metrics.rows.labels("browser", "screenshot_only").inc()
+                                else:
+                                    pipeline_metrics.rows.labels("browser", "no_document").inc()
+                            except Exception as e:
+                                print(f"Row {i+1}: Could not queue document for download/extraction: {e}")
+                                pipeline_metrics.rows.labels("browser", "error").inc()
                             # Close the new tab and switch back
                             driver.close()
                             driver.switch_to.window(main_window)
-                            time.sleep(2)  # Increased wait
                         else:
                             print(f"Row {i+1}: No new tab opened after clicking details icon.")
+                            pipeline_metrics.rows.labels("browser", "no_document").inc()
                     else:
                         print(f"Row {i+1}: No details icon found in row.")
+                        pipeline_metrics.rows.labels("browser", "no_document").inc()
                 except Exception as e:
                     print(f"Row {i+1}: Error processing row: {e}")
+                    pipeline_metrics.rows.labels("browser", "error").inc()
                     continue
-            print("Finished iterating rows for PDF download.")
+                finally:
+                    if checkpoint is not None:
+                        checkpoint.row_left(i+1)
+            grid_rows.close()
+            print(f"Finished iterating {results_writer.pages_written} grid page(s) for PDF download.")
+            print(f"Step timings: {json.dumps(step_timings.summary())}")
             # Write all screenshot filenames to a text file
             try:
                 screenshots_list_path = os.path.join(screenshot_folder, "screenshots_list.txt")
@@ -754,64 +1767,30 @@ def run_fairfax_workflow():
                 print(f"Screenshot filenames written to {screenshots_list_path}")
             except Exception as e:
                 print(f"Could not write screenshots list: {e}")
+            try:
+                documents_list_path = os.path.join(screenshot_folder, "documents_list.json")
+                with open(documents_list_path, "w", encoding="utf-8") as f:
+                    json.dump(documents, f, indent=2, ensure_ascii=False)
+                print(f"Document URLs written to {documents_list_path}")
+            except Exception as e:
+                print(f"Could not write documents list: {e}")
         except Exception as e:
-            print(f"Table did not appear after waiting: {e}")
-        
-        # Fetch data from results table and export to CSV
-        print("Fetching results and exporting to CSV...")
-        data_found = False
-        try:
-            page_source = driver.page_source
-            # Only extract the table at the specified XPath
-            soup = BeautifulSoup(page_source, "html.parser")
-            table = soup.select_one('body > div:nth-of-type(1) > div > div > div:nth-of-type(3) > table')
-            if table:
-                tables = [table]
-            else:
-                tables = []
-            if tables:
-                for idx, table in enumerate(tables):
-                    headers = []
-                    thead = table.find("thead")
-                    if thead:
-                        header_row = thead.find("tr")
-                        if header_row:
-                            for th in header_row.find_all("th"):
-                                style = th.get("style", "")
-                                if "display: none" not in style:
-                                    col_title = th.find("span", class_="k-column-title")
-                                    if col_title:
-                                        headers.append(col_title.get_text(strip=True))
-                                    else:
-                                        headers.append(th.get_text(strip=True))
-                    rows = []
-                    tbody = table.find("tbody")
-                    if tbody:
-                        for tr in tbody.find_all("tr"):
-                            row = []
-                            tds = tr.find_all("td")
-                            for td in tds:
-                                style = td.get("style", "")
-                                if "display: none" not in style:
-                                    row.append(td.get_text(strip=True))
-                            if row:
-                                rows.append(row)
-                    filename = os.path.join("fairfax", f"fairfax_results.csv")
-                    with open(filename, "w", newline='', encoding='utf-8') as f:
-                        writer = csv.writer(f)
-                        if headers:
-                            writer.writerow(headers)
-                        writer.writerows(rows)
-                    print(f"Exported table to {filename} with {len(rows)} rows.")
-                data_found = True
-            else:
-                print("No results table found at the specified XPath.")
-        except Exception as e:
-            print(f"Error exporting results to CSV: {e}")
+            print(f"Stopped reading the results grid: {e}")
+        finally:
+            results_writer.close()
+            # Rows already queued are still extracted and recorded when the grid loop fails
+            if extraction_thread is not None:
+                extraction_queue.put(None)
+                print("Waiting for OCR and extraction of the remaining documents...")
+                extraction_thread.join()
+
+        data_found = results_writer.pages_written > 0 or (checkpoint is not None and checkpoint.pages_exported > 0)
+        if data_found:
+            print(f"Exported {results_writer.rows_written} rows from {results_writer.pages_written} grid page(s).")
+        else:
+            print("No results table found at the specified XPath.")
 
         if data_found:
-            if driver:
-                driver.quit()
             return "Data exported to CSV."
 
         # If not the last document type, go back to the search page to prepare for the next search
@@ -829,35 +1808,43 @@ def run_fairfax_workflow():
             except Exception as e:
                 print(f"Could not re-select 'DOCUMENT TYPE': {e}")
 
-        # Keep the browser open for a while to observe the result
-        print("All searches completed. Keeping browser open for 5 minutes...")
-        time.sleep(400)
+        print("All searches completed.")
     except TimeoutException as e:
-        print(f"Timeout error occurred: {e}")
+        error = f"Timeout error occurred: {e}"
+        print(error)
         if driver:
             print("Current URL:", driver.current_url)
             print("Page title:", driver.title)
-        time.sleep(10)
     except WebDriverException as e:
-        print(f"WebDriver error occurred: {e}")
+        error = f"WebDriver error occurred: {e}"
+        print(error)
+        driver_broken = True
         if driver:
             print("Current URL:", driver.current_url)
             print("Page title:", driver.title)
-        time.sleep(10)
     except Exception as e:
-        print(f"An error occurred: {e}")
+        error = f"An error occurred: {e}"
+        print(error)
         if driver:
             print("Current URL:", driver.current_url)
             print("Page title:", driver.title)
-        time.sleep(10)
     finally:
         if driver:
-            print("Browser will remain open as requested.")
-            pass
+            print("Returning browser to the driver pool.")
+            driver_pool.release(driver, broken=driver_broken)
+    if cancel_event is not None and cancel_event.is_set():
+        return "Workflow cancelled."
+    if error is not None:
+        return error
+    if output_dir != "fairfax":
+        # The batch pass reads fairfax/screenshots, which belongs to a full run;
+        # shards keep their screenshots under output_dir and run side by side
+        return None
     print("\n--- Starting OCR and OpenAI extraction for all screenshots ---\n")
     process_all_screenshots_and_extract()
     return "Workflow completed."
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -0,0 +1,120 @@
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Browser steps take fractions of a second, documents seconds to minutes and whole runs up to hours
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 1800, 3600, 7200)
+
+
+class PipelineMetrics:
+    """Prometheus metrics for the scraper, in a registry of their own.
+
+    Stage latencies come from a StepTimings: every recorded step is observed
+    in the fairfax_stage_duration_seconds histogram, and failed and running
+    steps are reported as fairfax_stage_errors and fairfax_stage_in_flight.
+    Counters the pipeline updates itself (rows, grid pages, chunks,
+    extractions) live here; cache, download, LLM, OCR and driver pool figures
+    are read from each component's stats() when /metrics is scraped,
+    registered with add_source().
+    """
+
+    content_type = CONTENT_TYPE_LATEST
+
+    def __init__(self, timings):
+        self.timings = timings
+        self.registry = CollectorRegistry()
+        self.stage_seconds = Histogram(
+            "fairfax_stage_duration_seconds", "Time spent in each pipeline stage.", ["stage"],
+            buckets=STAGE_BUCKETS, registry=self.registry,
+        )
+        self.rows = Counter(
+            "fairfax_rows", "Results grid rows handled, by search mode and outcome.", ["mode", "outcome"], registry=self.registry,
+        )
+        self.grid_pages = Counter("fairfax_grid_pages", "Results grid pages exported.", registry=self.registry)
+        self.grid_rows = Counter("fairfax_grid_rows", "Results grid rows exported.", registry=self.registry)
+        self.chunks = Counter("fairfax_llm_chunks", "Document text chunks sent for extraction.", registry=self.registry)
+        self.extractions = Counter(
+            "fairfax_extractions", "Documents through the extraction stage, by outcome.", ["outcome"], registry=self.registry,
+        )
+        self._sources = {}
+        timings.add_listener(self._observe)
+        self.registry.register(_StatsCollector(self))
+
+    def add_source(self, name, stats):
+        """Report the dict returned by stats() on every scrape; name is one of the sources _StatsCollector knows."""
+        self._sources[name] = stats
+
+    def render(self):
+        """The registry in the Prometheus text format."""
+        return generate_latest(self.registry)
+
+    def _observe(self, step, seconds):
+        self.stage_seconds.labels(step).observe(seconds)
+
+
+class _StatsCollector:
+    """Turns component stats() dicts into metric families at scrape time."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def describe(self):
+        # Families depend on which sources are registered, so nothing is described up front
+        return []
+
+    def collect(self):
+        in_flight = GaugeMetricFamily("fairfax_stage_in_flight", "Pipeline stages currently running.", labels=["stage"])
+        for stage, running in sorted(self.metrics.timings.in_flight().items()):
+            in_flight.add_metric([stage], running)
+        yield in_flight
+        errors = CounterMetricFamily("fairfax_stage_errors", "Pipeline stages that ended with an exception.", labels=["stage"])
+        for stage, summary in sorted(self.metrics.timings.summary().items()):
+            errors.add_metric([stage], summary["errors"])
+        yield errors
+        for name, stats in list(self.metrics._sources.items()):
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Could not read {name} stats for /metrics: {e}")
+                continue
+            yield from getattr(self, f"_{name}")(values)
+
+    def _cache(self, stats):
+        lookups = CounterMetricFamily("fairfax_cache_lookups", "Content cache lookups by namespace and outcome.", labels=["namespace", "outcome"])
+        for namespace, counts in sorted(stats["namespaces"].items()):
+            lookups.add_metric([namespace, "hit"], counts["hits"])
+            lookups.add_metric([namespace, "miss"], counts["misses"])
+        yield lookups
+        yield GaugeMetricFamily("fairfax_cache_entries", "Entries in the content cache.", value=stats["entries"])
+        yield GaugeMetricFamily("fairfax_cache_bytes", "Size of the cached values.", value=stats["bytes"])
+
+    def _downloads(self, stats):
+        downloads = CounterMetricFamily("fairfax_downloads", "Finished document downloads by outcome.", labels=["outcome"])
+        for outcome in ("ok", "failed", "wrong_type"):
+            downloads.add_metric([outcome], stats[outcome])
+        yield downloads
+        yield CounterMetricFamily("fairfax_downloads_resumed", "Downloads completed with a Range request.", value=stats["resumed"])
+        yield CounterMetricFamily("fairfax_download_bytes", "Document bytes received.", value=stats["bytes"])
+
+    def _llm(self, stats):
+        yield CounterMetricFamily("fairfax_llm_requests", "Chat completion API calls.", value=stats["requests"])
+        yield CounterMetricFamily("fairfax_llm_request_failures", "Chat completions that failed after retrying.", value=stats["failed"])
+        yield CounterMetricFamily("fairfax_llm_retries", "Chat completion calls that were retried.", value=stats["retries"])
+        yield CounterMetricFamily("fairfax_llm_cache_hits", "Chat completions answered from the cache.", value=stats["cache_hits"])
+        tokens = CounterMetricFamily("fairfax_llm_tokens", "Tokens used by chat completions.", labels=["kind"])
+        tokens.add_metric(["prompt"], stats["prompt_tokens"])
+        tokens.add_metric(["completion"], stats["completion_tokens"])
+        yield tokens
+
+    def _ocr(self, stats):
+        yield CounterMetricFamily("fairfax_ocr_submitted", "Images and documents sent to the OCR workers.", value=stats["submitted"])
+        yield CounterMetricFamily("fairfax_ocr_cache_hits", "OCR texts answered from the cache.", value=stats["cache_hits"])
+        yield CounterMetricFamily("fairfax_ocr_failures", "OCR jobs that failed or were cancelled.", value=stats["failed"])
+        yield GaugeMetricFamily("fairfax_ocr_pending", "OCR jobs queued or running.", value=stats["pending"])
+
+    def _driver_pool(self, stats):
+        yield GaugeMetricFamily("fairfax_driver_pool_size", "Configured Chrome driver pool size.", value=stats["size"])
+        yield GaugeMetricFamily("fairfax_driver_pool_live", "Chrome drivers started.", value=stats["live"])
+        yield GaugeMetricFamily("fairfax_driver_pool_idle", "Chrome drivers waiting to be leased.", value=stats["idle"])
+
+    def _results_store(self, stats):
+        yield CounterMetricFamily("fairfax_results_appended", "Extraction results appended to the results store.", value=stats["appended"])
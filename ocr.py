@@ -0,0 +1,186 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from cache import hash_file
+
+
+class OcrEngine:
+    """Process-wide EasyOCR wrapper that loads the detection/recognition models once."""
+
+    def __init__(self, languages=("en",), gpu=False):
+        self.languages = list(languages)
+        self.gpu = gpu
+        self._reader = None
+        self._init_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+
+    @property
+    def reader(self):
+        if self._reader is None:
+            with self._init_lock:
+                if self._reader is None:
+                    print("Loading EasyOCR models...")
+                    # easyocr pulls in torch, so it is only imported by processes that actually OCR
+                    import easyocr
+                    self._reader = easyocr.Reader(self.languages, gpu=self.gpu)
+        return self._reader
+
+    def warm_up(self):
+        """Load the models now instead of on the first image."""
+        self.reader
+
+    def read_text(self, image):
+        """Return the recognised text of an image path, bytes or numpy array as one string."""
+        reader = self.reader
+        # easyocr.Reader is not safe to share between concurrent calls
+        with self._read_lock:
+            result = reader.readtext(image, detail=0)
+        return " ".join(result)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    """Return the shared OcrEngine for this process, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = OcrEngine()
+    return _engine
+
+
+def _warm_up_worker():
+    get_ocr_engine().warm_up()
+
+
+def _ocr_in_worker(image):
+    try:
+        return get_ocr_engine().read_text(image)
+    except Exception as e:
+        print(f"Error extracting text from {image}: {e}")
+        return ""
+
+
+def _ingest_in_worker(document_path):
+    from ingest import extract_document_text
+    try:
+        return extract_document_text(document_path, get_ocr_engine().read_text)
+    except Exception as e:
+        print(f"Error extracting text from {document_path}: {e}")
+        return ""
+
+
+class OcrPool:
+    """OCR stage backed by worker processes, each holding its own cached EasyOCR reader.
+
+    The executor is started on first use so importing this module stays cheap,
+    and a worker only loads EasyOCR once it meets an image or a page without
+    a text layer (or on warm_up()), so PDFs with text never need the models.
+    With a ContentCache, images are looked up by the hash of their bytes first
+    and only unseen images reach the workers. Given a StepTimings, the time
+    from submission to text (queueing included) is recorded as the "ocr" step
+    for images and "document_text" for documents.
+    """
+
+    STEP_NAMES = {"ocr": "ocr", "doc": "document_text"}
+
+    def __init__(self, workers=2, cache=None, timings=None):
+        self.workers = max(1, int(workers))
+        self.cache = cache
+        self.timings = timings
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "cache_hits": 0, "failed": 0, "pending": 0}
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn, not fork: the API process has browser and HTTP threads running
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def warm_up(self):
+        """Start the worker processes and load the models in them before the first document."""
+        futures = [self.executor.submit(_warm_up_worker) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def submit(self, image_path):
+        """Queue one image and return a Future for its text."""
+        return self._submit_cached("ocr", _ocr_in_worker, image_path)
+
+    def submit_document(self, document_path):
+        """Queue a downloaded PDF/TIFF; its text layer is used where present, OCR elsewhere."""
+        return self._submit_cached("doc", _ingest_in_worker, document_path)
+
+    def stats(self):
+        """Files sent to the workers, answered from the cache, failed, and still waiting for text."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _submit_cached(self, namespace, func, path):
+        if self.cache is None:
+            return self._submit(namespace, func, path)
+        try:
+            key = f"{namespace}:{hash_file(path)}"
+        except OSError as e:
+            print(f"Could not hash {path} for the OCR cache: {e}")
+            return self._submit(namespace, func, path)
+        text = self.cache.get(key)
+        if text is not None:
+            self._count("cache_hits")
+            future = Future()
+            future.set_result(text)
+            return future
+        future = self._submit(namespace, func, path)
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _submit(self, namespace, func, path):
+        submitted = time.perf_counter()
+        future = self.executor.submit(func, path)
+        self._count("submitted")
+        self._count("pending")
+
+        def finished(f):
+            failed = f.cancelled() or f.exception() is not None
+            self._count("pending", -1)
+            if failed:
+                self._count("failed")
+            if self.timings is not None:
+                self.timings.record(self.STEP_NAMES[namespace], time.perf_counter() - submitted, failed=failed)
+        future.add_done_callback(finished)
+        return future
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def map(self, image_paths):
+        """OCR many images in parallel, returning their texts in input order."""
+        futures = [self.submit(path) for path in image_paths]
+        return [future.result() for future in futures]
+
+    def _store(self, key, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        text = future.result()
+        # Empty text usually means OCR failed; let it be retried next time
+        if text.strip():
+            self.cache.set(key, text)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
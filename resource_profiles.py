@@ -0,0 +1,131 @@
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+# URL patterns (CDP wildcards) blocked by each profile. Stylesheets and scripts are always
+# loaded: the search form and the Kendo grid need them to work.
+PROFILES = {
+    "lean": [
+        # images
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.bmp", "*.ico", "*.svg",
+        # fonts
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        # audio and video
+        "*.mp4", "*.webm", "*.mp3", "*.ogg",
+        # third-party analytics, tag managers, ads and embeds
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*newrelic.com*", "*nr-data.net*",
+        "*siteimproveanalytics*", "*addthis.com*", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+        "*youtube.com/embed*", "*maps.googleapis.com*",
+    ],
+    # Everything loads, as needed by the document viewer
+    "full": [],
+}
+
+# Bytes, requests and load time of everything the current page has fetched since the last
+# measurement. transferSize is 0 for cached responses and for cross-origin ones without
+# Timing-Allow-Origin, so third-party bytes are undercounted.
+MEASURE_PAGE_SCRIPT = """
+var entries = performance.getEntriesByType('resource');
+var bytes = 0;
+for (var i = 0; i < entries.length; i++) { bytes += entries[i].transferSize || 0; }
+var requests = entries.length;
+var loadMs = null;
+var nav = performance.getEntriesByType('navigation')[0];
+if (nav && !window.__ffxNavigationMeasured) {
+    window.__ffxNavigationMeasured = true;
+    bytes += nav.transferSize || 0;
+    requests += 1;
+    loadMs = nav.loadEventEnd > 0 ? nav.loadEventEnd - nav.startTime : performance.now();
+}
+performance.clearResourceTimings();
+return {bytes: bytes, requests: requests, load_ms: loadMs};
+"""
+
+
+class ResourceProfiles:
+    """Switches a driver's windows between resource-loading profiles with CDP URL blocking.
+
+    Blocking applies to the window (CDP target) that is current when apply()
+    is called, so a tab opened later, such as a document viewer, loads
+    everything unless a profile is applied to it. Page loads can be measured per step and per
+    profile with measure(); summary() compares the profiles step by step.
+    """
+
+    def __init__(self, profiles=None, extra_patterns=None):
+        self.profiles = {name: list(patterns) for name, patterns in (profiles or PROFILES).items()}
+        if extra_patterns:
+            self.profiles["lean"] = self.profiles.get("lean", []) + list(extra_patterns)
+        self._applied = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def apply(self, driver, name):
+        """Block the URLs of profile name in the driver's current window. Returns False if CDP is not available."""
+        if name not in self.profiles:
+            raise ValueError(f"Unknown resource profile {name}")
+        try:
+            window = (driver.session_id, driver.current_window_handle)
+            if self._applied.get(window) == name:
+                return True
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.profiles[name]})
+        except (WebDriverException, AttributeError) as e:
+            print(f"Could not apply the {name} resource profile: {e}")
+            return False
+        with self._lock:
+            self._applied[window] = name
+        return True
+
+    def profile_of(self, driver):
+        try:
+            return self._applied.get((driver.session_id, driver.current_window_handle), "full")
+        except WebDriverException:
+            return "full"
+
+    def measure(self, driver, step):
+        """Record what the current page fetched since the last measurement under step."""
+        try:
+            page = driver.execute_script(MEASURE_PAGE_SCRIPT)
+        except WebDriverException as e:
+            print(f"Could not measure page load for {step}: {e}")
+            return None
+        if not page:
+            return None
+        profile = self.profile_of(driver)
+        with self._lock:
+            stats = self._stats.setdefault(step, {}).setdefault(
+                profile, {"count": 0, "bytes": 0, "requests": 0, "load_ms": 0.0, "loads": 0}
+            )
+            stats["count"] += 1
+            stats["bytes"] += int(page.get("bytes") or 0)
+            stats["requests"] += int(page.get("requests") or 0)
+            if page.get("load_ms") is not None:
+                stats["load_ms"] += float(page["load_ms"])
+                stats["loads"] += 1
+        return page
+
+    def summary(self):
+        """Average bytes, requests and load time per step and profile, and what lean saves over full."""
+        with self._lock:
+            steps = {step: {profile: dict(stats) for profile, stats in profiles.items()} for step, profiles in self._stats.items()}
+        result = {}
+        for step, profiles in steps.items():
+            averages = {}
+            for profile, stats in profiles.items():
+                averages[profile] = {
+                    "count": stats["count"],
+                    "avg_kb": round(stats["bytes"] / stats["count"] / 1024, 1),
+                    "avg_requests": round(stats["requests"] / stats["count"], 1),
+                    "avg_load_ms": round(stats["load_ms"] / stats["loads"], 1) if stats["loads"] else None,
+                }
+            lean, full = averages.get("lean"), averages.get("full")
+            if lean and full:
+                averages["saved"] = {
+                    "kb": round(full["avg_kb"] - lean["avg_kb"], 1),
+                    "percent_bytes": round(100 * (1 - lean["avg_kb"] / full["avg_kb"]), 1) if full["avg_kb"] else None,
+                    "load_ms": round(full["avg_load_ms"] - lean["avg_load_ms"], 1)
+                    if full["avg_load_ms"] is not None and lean["avg_load_ms"] is not None else None,
+                }
+            result[step] = averages
+        return result
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+
+# Formats the extraction step has been seen to return dates in
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%m-%d-%Y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y")
+
+
+def parse_result_date(value):
+    """The date of an extraction result as a date, or None if it is missing or not understood."""
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _digits(value):
+    return "".join(c for c in str(value) if c.isdigit())
+
+
+class ResultsStore:
+    """Extraction results appended to a JSON Lines file, one result per line.
+
+    Every append is a single write of one line, so the cost per result does
+    not depend on how many results are already stored. The file is fsynced
+    after sync_every results or sync_interval seconds, whichever comes first,
+    and on sync() and close(). A line left half-written by a crash is skipped
+    when reading. The file is only created by the first append.
+    """
+
+    def __init__(self, path, sync_every=50, sync_interval=1.0):
+        self.path = path
+        self.sync_every = max(1, int(sync_every))
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._f = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._appended = 0
+
+    def _open(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        f = open(self.path, "ab")
+        # Start on a fresh line if the last write was cut short
+        if f.tell() > 0:
+            with open(self.path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    f.write(b"\n")
+        return f
+
+    def append(self, result):
+        line = json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            if self._f is None:
+                self._f = self._open()
+            self._f.write(line)
+            self._f.flush()
+            self._appended += 1
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+
+    def sync(self):
+        """Make every result appended so far durable."""
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __iter__(self):
+        """Every stored result, oldest first, read one line at a time."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                # A line without its newline is still being written (or was cut short)
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def query(self, start_date=None, end_date=None, owner=None, apn=None, run_id=None, doc_type=None, limit=100, offset=0):
+        """Stored results matching every given filter, oldest first.
+
+        start_date/end_date bound the extracted document date (inclusive), owner
+        is a case-insensitive substring of the owner name and apn is compared on
+        its digits only, so "0123 04 0005" finds "0123-04-0005".
+        """
+        owner = owner.lower() if owner else None
+        apn = _digits(apn) if apn else None
+        matched = []
+        skipped = 0
+        for result in self:
+            if run_id is not None and result.get("run_id") != run_id:
+                continue
+            if doc_type is not None and result.get("doc_type") != doc_type:
+                continue
+            if owner is not None and owner not in str(result.get("owner_name", "")).lower():
+                continue
+            if apn is not None and _digits(result.get("apn_taxid", "")) != apn:
+                continue
+            if start_date is not None or end_date is not None:
+                result_date = parse_result_date(result.get("date"))
+                if result_date is None:
+                    continue
+                if start_date is not None and result_date < start_date:
+                    continue
+                if end_date is not None and result_date > end_date:
+                    continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            matched.append(result)
+            if limit is not None and len(matched) >= limit:
+                break
+        return matched
+
+    def stats(self):
+        with self._lock:
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            appended = self._appended
+            unsynced = self._unsynced
+        return {"path": self.path, "bytes": size, "appended": appended, "unsynced": unsynced}
+
+    def close(self):
+        with self._lock:
+            if self._f is None or self._f.closed:
+                return
+            if self._unsynced:
+                self._sync()
+            self._f.close()
@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+
+class ShardFailed(Exception):
+    """Raised by a shard runner when its search did not complete."""
+
+
+class Shard:
+    """One CPAN search: a set of document types over a date range."""
+
+    def __init__(self, index, doc_types, start_date, end_date):
+        self.index = index
+        self.doc_types = list(doc_types)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.id = f"{index:03d}_{'-'.join(self.doc_types)}_{start_date:%Y%m%d}_{end_date:%Y%m%d}"
+        self.status = "pending"
+        self.attempts = 0
+        self.results = 0
+        self.duplicates = 0
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "doc_types": self.doc_types,
+            "start_date": self.start_date.isoformat(),
+            "end_date": self.end_date.isoformat(),
+            "status": self.status,
+            "attempts": self.attempts,
+            "results": self.results,
+            "duplicates": self.duplicates,
+            "error": self.error,
+        }
+
+
+def plan_shards(start_date, end_date, doc_types, days_per_shard=7, split_doc_types=True):
+    """Split an inclusive date range (and optionally the doc type list) into shards."""
+    if end_date < start_date:
+        raise ValueError("end_date is before start_date")
+    type_groups = [[t] for t in doc_types] if split_doc_types else [list(doc_types)]
+    shards = []
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=max(1, days_per_shard) - 1), end_date)
+        for group in type_groups:
+            shards.append(Shard(len(shards) + 1, group, window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return shards
+
+
+class SearchPlanner:
+    """Run search shards on a fixed number of workers, retrying each failed shard on its own.
+
+    run_shard(shard, on_result, cancel_event) performs one search and raises
+    when it did not complete. Results are passed on once per key (by default
+    the instrument number), so rows a failed attempt already produced are not
+    reported again when the shard is retried. on_status(shard), if given, is
+    called whenever a shard finishes, fails or is cancelled.
+    """
+
+    def __init__(self, run_shard, workers=2, max_attempts=3, retry_delay=5, key=None, on_status=None):
+        self.run_shard = run_shard
+        self.on_status = on_status
+        self.workers = max(1, int(workers))
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_delay = retry_delay
+        self.key = key or (lambda result: result.get("instrument_number"))
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._results = []
+
+    def run(self, shards, on_result=None, cancel_event=None):
+        """Run every shard and return the merged, de-duplicated results."""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="search-shard") as executor:
+            for shard in shards:
+                executor.submit(self._run_with_retries, shard, on_result, cancel_event)
+        return list(self._results)
+
+    def summary(self, shards):
+        statuses = {}
+        for shard in shards:
+            statuses[shard.status] = statuses.get(shard.status, 0) + 1
+        return {"shards": len(shards), "statuses": statuses, "results": len(self._results), "failed": [s.id for s in shards if s.status == "failed"]}
+
+    def _run_with_retries(self, shard, on_result, cancel_event):
+        def emit(result):
+            key = self.key(result)
+            with self._lock:
+                if key is not None and key in self._seen:
+                    shard.duplicates += 1
+                    return
+                if key is not None:
+                    self._seen.add(key)
+                shard.results += 1
+                self._results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        while shard.attempts < self.max_attempts:
+            if cancel_event is not None and cancel_event.is_set():
+                shard.status = "cancelled"
+                self._report(shard)
+                return
+            shard.attempts += 1
+            shard.status = "running"
+            print(f"Shard {shard.id}: attempt {shard.attempts}/{self.max_attempts}")
+            try:
+                self.run_shard(shard, emit, cancel_event)
+                shard.status = "done"
+                shard.error = None
+                self._report(shard)
+                return
+            except Exception as e:
+                shard.error = str(e)
+                print(f"Shard {shard.id}: attempt {shard.attempts} failed: {e}")
+            if shard.attempts < self.max_attempts:
+                time.sleep(self.retry_delay * shard.attempts)
+        shard.status = "failed"
+        self._report(shard)
+
+    def _report(self, shard):
+        if self.on_status is not None:
+            self.on_status(shard)
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+    InvalidToken = Exception
+
+
+class SessionStore:
+    """Keeps the authenticated MyFairfax/CPAN cookie jar on disk between runs.
+
+    The file is only readable by the current user and, when a key is given
+    (a Fernet key, needs the cryptography package), encrypted as well.
+    Cookies are Selenium-style dicts; expired ones are dropped on load and
+    the whole jar is ignored once it is older than max_age seconds.
+    """
+
+    def __init__(self, path, key=None, max_age=12 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._fernet = None
+        if key:
+            if Fernet is None:
+                raise RuntimeError("SESSION_STORE_KEY is set but the cryptography package is not installed")
+            self._fernet = Fernet(key.encode("ascii") if isinstance(key, str) else key)
+
+    def load(self):
+        """Return the saved cookies, or None if there is no usable saved session."""
+        with self._lock:
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+        try:
+            if self._fernet is not None:
+                data = self._fernet.decrypt(data)
+            saved = json.loads(data)
+        except (InvalidToken, ValueError) as e:
+            print(f"Ignoring unreadable saved session {self.path}: {e}")
+            return None
+        now = time.time()
+        if self.max_age and now - saved.get("saved_at", 0) > self.max_age:
+            return None
+        cookies = [c for c in saved.get("cookies", []) if not c.get("expiry") or c["expiry"] > now]
+        return cookies or None
+
+    def save(self, cookies):
+        """Write cookies atomically to a file only the owner can read."""
+        data = json.dumps({"saved_at": time.time(), "cookies": list(cookies)}).encode("utf-8")
+        if self._fernet is not None:
+            data = self._fernet.encrypt(data)
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+
+    def clear(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def cookies_from_cdp(cdp_cookies):
+    """Selenium-style cookie dicts from the result of the CDP Network.getAllCookies command."""
+    cookies = []
+    for c in cdp_cookies:
+        cookie = {"name": c["name"], "value": c["value"], "domain": c.get("domain", ""), "path": c.get("path", "/"),
+                  "secure": c.get("secure", False), "httpOnly": c.get("httpOnly", False)}
+        if not c.get("session") and c.get("expires", -1) > 0:
+            cookie["expiry"] = int(c["expires"])
+        cookies.append(cookie)
+    return cookies
+
+
+def cookies_to_cdp(cookies):
+    """CDP Network.setCookies parameters for Selenium-style cookie dicts."""
+    params = []
+    for c in cookies:
+        param = {"name": c["name"], "value": c["value"], "domain": c.get("domain", ""), "path": c.get("path", "/"),
+                 "secure": bool(c.get("secure")), "httpOnly": bool(c.get("httpOnly"))}
+        if c.get("expiry"):
+            param["expires"] = c["expiry"]
+        params.append(param)
+    return params
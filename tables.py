@@ -0,0 +1,90 @@
+import re
+
+from results_store import parse_result_date
+
+# Class every Kendo results grid <table> carries
+GRID_TABLE_XPATH = "//table[contains(concat(' ', normalize-space(@class), ' '), ' k-grid-table ')]"
+COLUMN_TITLE_XPATH = ".//span[contains(concat(' ', normalize-space(@class), ' '), ' k-column-title ')]"
+
+
+def _etree():
+    # lxml is only imported once a grid page is parsed, so the API starts without it
+    from lxml import etree
+    return etree
+
+
+def _hidden(element):
+    style = element.get("style")
+    return bool(style) and "none" in style and "display:none" in style.replace(" ", "")
+
+
+def _text(element):
+    # Same text as BeautifulSoup's get_text(strip=True), which the CSV exports have always used
+    if len(element) == 0:
+        return (element.text or "").strip()
+    return "".join(part.strip() for part in element.itertext())
+
+
+def parse_grid_table(table):
+    """Visible column headers and row values of a results <table> element (lxml)."""
+    headers = []
+    for th in table.xpath("./thead/tr[1]/th"):
+        if _hidden(th):
+            continue
+        title = th.xpath(COLUMN_TITLE_XPATH)
+        headers.append(_text(title[0] if title else th))
+    rows = []
+    for tr in table.xpath("./tbody/tr"):
+        row = [_text(td) for td in tr.iterchildren("td") if not _hidden(td)]
+        if row:
+            rows.append(row)
+    return headers, rows
+
+
+def parse_grid_html(table_html):
+    """Headers and rows of the grid table in an HTML fragment such as a table's outerHTML.
+
+    Returns None if the fragment holds no table.
+    """
+    etree = _etree()
+    root = etree.fromstring(table_html, etree.HTMLParser())
+    if root is None:
+        return None
+    table = next(root.iter("table"), None)
+    if table is None:
+        return None
+    return parse_grid_table(table)
+
+
+def find_grid_tables(page_source):
+    """Every Kendo results grid <table> in a full page."""
+    etree = _etree()
+    root = etree.fromstring(page_source, etree.HTMLParser())
+    return root.xpath(GRID_TABLE_XPATH) if root is not None else []
+
+
+def column_name(header):
+    """snake_case column name for a grid header ("Record Date" and "RecordDate" both give record_date)."""
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", str(header).strip())
+    name = re.sub(r"[^0-9a-zA-Z]+", "_", name).strip("_").lower()
+    return name or "column"
+
+
+def grid_records(headers, rows, page_number=None):
+    """Grid rows as dicts keyed by column_name(header), with date columns parsed."""
+    names = []
+    for header in headers:
+        name = column_name(header)
+        while name in names:
+            name += "_"
+        names.append(name)
+    date_names = [name for name in names if "date" in name]
+    records = []
+    for row in rows:
+        record = {name: (str(value) if value is not None else None) for name, value in zip(names, row)}
+        for name in date_names:
+            record[name] = parse_result_date(record.get(name))
+        if page_number is not None:
+            record["page"] = page_number
+        records.append(record)
+    return records
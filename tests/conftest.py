@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+import tiktoken
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# The app modules live at the top of the repo, the mock servers under benchmarks/
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+from fake_openai import start_fake_openai
+from mock_cpan import start_mock_cpan
+
+
+@pytest.fixture
+def fake_openai():
+    """Start fake OpenAI servers with the given settings; all are stopped after the test."""
+    servers = []
+
+    def start(**settings):
+        server = start_fake_openai(**settings)
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="session")
+def cpan():
+    server = start_mock_cpan(rows_per_day=6, page_size=5)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def app(cpan, tmp_path_factory):
+    """main, imported once in a scratch directory and pointed at the mock CPAN site and a fake OpenAI server."""
+    llm = start_fake_openai()
+    settings = {
+        "LOGIN_URL": cpan.login_url,
+        "CPAN_URL": cpan.cpan_url,
+        "CPAN_HTTP_MODE": "true",
+        "GRID_PAGE_SIZE": "5",
+        "OPENAI_BASE_URL": llm.base_url,
+        "OPENAI_API_KEY": "test",
+        "LLM_REQUESTS_PER_MINUTE": "100000",
+        "LLM_TOKENS_PER_MINUTE": "100000000",
+        "CACHE_ENABLED": "false",
+        "INDEX_ENABLED": "false",
+        "SESSION_STORE_ENABLED": "false",
+        "EXPORT_FORMATS": "csv",
+        "OCR_WORKERS": "1",
+    }
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("app"))
+        for name, value in settings.items():
+            mp.setenv(name, value)
+        import main
+        yield main
+        main.ocr_pool.shutdown()
+        main.llm.shutdown()
+        main.download_stage.shutdown(wait=False)
+        main.download_client.close()
+        main.results_store.close()
+    llm.shutdown()
+    llm.server_close()
+
+
+@pytest.fixture(scope="session")
+def encoder(app):
+    """A byte-level stand-in for cl100k_base, installed as main's token encoder.
+
+    tiktoken downloads cl100k_base on first use; this one is built in memory, so
+    the tests that count tokens run offline too.
+    """
+    enc = tiktoken.Encoding(
+        "bytes", pat_str=r"\S+|\s+", mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={},
+    )
+    app._token_encoder = enc
+    return enc
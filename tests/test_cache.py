@@ -0,0 +1,64 @@
+import os
+import time
+
+from cache import ContentCache
+
+
+def test_cache_file_is_created_on_first_use(tmp_path):
+    path = tmp_path / "state" / "cache.sqlite3"
+    cache = ContentCache(str(path))
+    assert not os.path.exists(path.parent)
+    cache.set("ocr:a", "text")
+    assert path.exists()
+    cache.close()
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0.2)
+    cache.set("ocr:a", "text")
+    assert cache.get("ocr:a") == "text"
+    time.sleep(0.3)
+    assert cache.get("ocr:a") is None
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert stats["bytes"] == 0
+    assert stats["namespaces"]["ocr"] == {"hits": 1, "misses": 1}
+    cache.close()
+
+
+def test_expired_entries_are_dropped_on_set(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0.2)
+    cache.set("ocr:a", "a" * 100)
+    time.sleep(0.3)
+    cache.set("ocr:b", "b" * 100)
+    assert cache.stats()["entries"] == 1
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted_over_max_bytes(tmp_path):
+    # Each value is stored as JSON: 100 characters plus quotes, 102 bytes
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"), max_bytes=250)
+    cache.set("ocr:a", "a" * 100)
+    time.sleep(0.01)
+    cache.set("ocr:b", "b" * 100)
+    time.sleep(0.01)
+    assert cache.get("ocr:a") == "a" * 100
+    time.sleep(0.01)
+    cache.set("ocr:c", "c" * 100)
+    assert cache.get("ocr:b") is None
+    assert cache.get("ocr:a") == "a" * 100
+    assert cache.get("ocr:c") == "c" * 100
+    assert cache.stats()["bytes"] == 204
+    cache.close()
+
+
+def test_size_is_restored_when_reopened(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ContentCache(path)
+    cache.set("llm:a", {"owner_name": "DOE JANE"})
+    size = cache.stats()["bytes"]
+    cache.close()
+    reopened = ContentCache(path)
+    assert reopened.get("llm:a") == {"owner_name": "DOE JANE"}
+    assert reopened.stats()["bytes"] == size
+    reopened.close()
@@ -0,0 +1,37 @@
+import json
+from datetime import date
+
+import pytest
+
+
+def test_default_run_saves_its_search_for_resume(app, monkeypatch):
+    calls = []
+
+    def workflow(**kwargs):
+        calls.append(kwargs)
+        return "Data exported to CSV."
+    monkeypatch.setattr(app, "run_fairfax_workflow", workflow)
+    response = app.run_workflow(start_date=None, end_date=None, doc_types=None)
+    job = app.job_queue.get(json.loads(response.body)["job_id"])
+    today = date.today()
+    assert job.params == {
+        "sharded": False, "start_date": today.replace(day=1).isoformat(), "end_date": today.isoformat(),
+        "doc_types": ["LP", "ST"],
+    }
+    # Run it the way the job worker would; a resume loads the same params from the checkpoint
+    job.target(job)
+    state = app.checkpoint_store.load(job.id)
+    assert state["status"] == "complete"
+    assert state["params"] == job.params
+    assert calls[0]["start_date"] == today.replace(day=1)
+    assert calls[0]["end_date"] == today
+    assert calls[0]["doc_types"] == ["LP", "ST"]
+
+
+def test_run_that_returns_an_error_fails(app, monkeypatch):
+    monkeypatch.setattr(app, "run_fairfax_workflow", lambda **kwargs: "WebDriver error occurred: gone")
+    response = app.run_workflow(start_date=None, end_date=None, doc_types=None)
+    job = app.job_queue.get(json.loads(response.body)["job_id"])
+    with pytest.raises(app.JobFailed, match="WebDriver error occurred"):
+        job.target(job)
+    assert app.checkpoint_store.load(job.id)["status"] == "failed"
@@ -0,0 +1,67 @@
+WORDS = ["lis", "pendens", "grantor", "fairfax", "county", "instrument", "recorded", "parcel", "trustee", "deed"]
+
+
+def document(lines, words_per_line=12):
+    return "\n".join(" ".join(WORDS[(n * 7 + k) % len(WORDS)] for k in range(words_per_line)) for n in range(lines))
+
+
+def token_count(encoder, text):
+    return len(encoder.encode(text))
+
+
+def test_short_text_is_one_chunk(app, encoder):
+    assert app.split_text_into_chunks("  Grantor: DOE JANE\n", max_tokens=100) == ["Grantor: DOE JANE"]
+
+
+def test_chunks_fit_and_end_on_line_breaks(app, encoder):
+    text = document(60, words_per_line=4)
+    # Several lines fit in a chunk, so every chunk should be made of whole lines
+    max_tokens = 5 * max(token_count(encoder, line) for line in text.splitlines())
+    chunks = app.split_text_into_chunks(text, max_tokens=max_tokens)
+    assert len(chunks) > 1
+    assert all(token_count(encoder, chunk) <= max_tokens for chunk in chunks)
+    lines = set(text.splitlines())
+    assert all(line in lines for chunk in chunks for line in chunk.splitlines())
+    assert "\n".join(chunks).splitlines() == text.splitlines()
+
+
+def test_words_are_not_split_without_line_breaks(app, encoder):
+    text = document(1, words_per_line=400)
+    chunks = app.split_text_into_chunks(text, max_tokens=50)
+    assert all(token_count(encoder, chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_text_without_breaks_is_cut_at_the_token_limit(app, encoder):
+    text = "x" * 5000
+    chunks = app.split_text_into_chunks(text, max_tokens=40)
+    assert len(chunks) > 1
+    assert all(token_count(encoder, chunk) <= 40 for chunk in chunks)
+    assert "".join(chunks) == text
+
+
+def test_overlap_repeats_the_tail_of_the_previous_chunk(app, encoder):
+    text = document(1, words_per_line=400)
+    chunks = app.split_text_into_chunks(text, max_tokens=50, overlap_tokens=20)
+    assert all(token_count(encoder, chunk) <= 50 for chunk in chunks)
+    merged = chunks[0].split()
+    for previous, chunk in zip(chunks, chunks[1:]):
+        before, after = previous.split(), chunk.split()
+        shared = next((k for k in range(min(len(before), len(after)), 0, -1) if before[-k:] == after[:k]), 0)
+        assert shared > 0
+        assert token_count(encoder, " ".join(after[:shared])) <= 20
+        merged.extend(after[shared:])
+    assert merged == text.split()
+
+
+def test_empty_text_has_no_chunks(app, encoder):
+    assert app.split_text_into_chunks("", max_tokens=10) == []
+    assert app.split_text_into_chunks("  \n ", max_tokens=10) == []
+
+
+def test_overlap_is_capped_at_half_the_chunk(app, encoder):
+    text = document(1, words_per_line=400)
+    capped = app.split_text_into_chunks(text, max_tokens=50, overlap_tokens=25)
+    assert app.split_text_into_chunks(text, max_tokens=50, overlap_tokens=50) == capped
+    assert app.split_text_into_chunks(text, max_tokens=50, overlap_tokens=500) == capped
+    assert len(capped) < 2 * token_count(encoder, text) / 25
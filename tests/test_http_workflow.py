@@ -0,0 +1,32 @@
+import csv
+import math
+import os
+from datetime import date
+
+from fake_openai import EXTRACTION_REPLY
+from mock_cpan import search_filings
+
+
+def test_http_workflow_extracts_every_row(app, cpan, encoder):
+    start, end = date(2024, 1, 1), date(2024, 1, 4)
+    expected = search_filings(start, end, ["LP", "ST"], cpan.rows_per_day)
+    reads_before = cpan.hits["/cpan/LandRecords/Results_Read"]
+    results = []
+    outcome = app.run_fairfax_workflow(
+        on_result=results.append, doc_types=["LP", "ST"], start_date=start, end_date=end,
+        output_dir="fairfax", run_id="http-test",
+    )
+    assert outcome == "Data exported to CSV."
+    # Every grid page was read, GRID_PAGE_SIZE (5) rows at a time
+    assert cpan.hits["/cpan/LandRecords/Results_Read"] - reads_before == math.ceil(len(expected) / 5)
+    with open(os.path.join("fairfax", "fairfax_results.csv"), newline="", encoding="utf-8") as f:
+        exported = list(csv.DictReader(f))
+    assert [row["InstrumentNumber"] for row in exported] == [row["InstrumentNumber"] for row in expected]
+
+    assert sorted(r["instrument_number"] for r in results) == sorted(row["InstrumentNumber"] for row in expected)
+    for result in results:
+        assert result["owner_name"] == EXTRACTION_REPLY["owner_name"]
+        assert result["apn_taxid"] == "".join(c for c in EXTRACTION_REPLY["apn_taxid"] if c.isdigit())
+        assert result["run_id"] == "http-test"
+    stored = app.results_store.query(run_id="http-test", limit=None)
+    assert len(stored) == len(expected)
@@ -0,0 +1,29 @@
+import time
+
+from jobs import JobFailed, JobQueue
+
+
+def run_to_end(target):
+    jobs = JobQueue(workers=1)
+    jobs.start()
+    job = jobs.submit(target)
+    deadline = time.monotonic() + 5
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    jobs.shutdown()
+    return job
+
+
+def test_finished_job_succeeds():
+    job = run_to_end(lambda job: "Data exported to CSV.")
+    assert job.status == "succeeded"
+    assert job.result == "Data exported to CSV."
+
+
+def test_run_that_did_not_do_its_work_fails():
+    def target(job):
+        raise JobFailed("Could not get a Chrome driver", {"rows": 0})
+    job = run_to_end(target)
+    assert job.status == "failed"
+    assert job.error == "Could not get a Chrome driver"
+    assert job.result == {"rows": 0}
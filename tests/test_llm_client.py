@@ -0,0 +1,88 @@
+import json
+
+import openai
+import pytest
+
+from cache import ContentCache
+from fake_openai import EXTRACTION_REPLY
+from llm_client import RateLimitedLLM
+
+
+def make_llm(**settings):
+    return RateLimitedLLM(requests_per_minute=100000, tokens_per_minute=100000000, backoff_base=0.01, **settings)
+
+
+def make_client(server):
+    # Retries are RateLimitedLLM's job, as in create_openai_client()
+    return openai.OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+
+
+def chat_requests(count):
+    return [{"model": "gpt-4", "messages": [{"role": "user", "content": f"request {n}"}]} for n in range(count)]
+
+
+def test_chat_many_returns_replies_in_request_order_through_retries(fake_openai):
+    server = fake_openai(fail_every=3, echo=True, latency=0.01)
+    llm = make_llm(max_concurrency=4)
+    try:
+        replies = llm.chat_many(make_client(server), chat_requests(12))
+    finally:
+        llm.shutdown()
+    assert replies == [f"request {n}" for n in range(12)]
+    stats = llm.stats()
+    assert server.failures > 0
+    assert stats["retries"] == server.failures
+    assert stats["requests"] == server.requests
+    assert stats["failed"] == 0
+
+
+def test_chat_gives_up_after_max_retries(fake_openai):
+    server = fake_openai(fail_every=1, fail_status=500)
+    llm = make_llm(max_retries=2)
+    try:
+        with pytest.raises(openai.InternalServerError):
+            llm.chat(make_client(server), **chat_requests(1)[0])
+    finally:
+        llm.shutdown()
+    assert server.requests == 3
+    assert llm.stats()["retries"] == 2
+    assert llm.stats()["failed"] == 1
+
+
+def test_client_errors_are_not_retried(fake_openai):
+    server = fake_openai(fail_every=1, fail_status=400)
+    llm = make_llm()
+    try:
+        replies = llm.chat_many(make_client(server), chat_requests(3))
+    finally:
+        llm.shutdown()
+    assert all(isinstance(reply, openai.BadRequestError) for reply in replies)
+    assert server.requests == 3
+    assert llm.stats()["retries"] == 0
+    assert llm.stats()["failed"] == 3
+
+
+def test_cached_replies_skip_the_api(fake_openai, tmp_path):
+    server = fake_openai(echo=True)
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"))
+    llm = make_llm(cache=cache)
+    keys = [f"llm:{n}" for n in range(4)]
+    try:
+        first = llm.chat_many(make_client(server), chat_requests(4), cache_keys=keys)
+        second = llm.chat_many(make_client(server), chat_requests(4), cache_keys=keys)
+    finally:
+        llm.shutdown()
+        cache.close()
+    assert first == second == [f"request {n}" for n in range(4)]
+    assert server.requests == 4
+    assert llm.stats()["cache_hits"] == 4
+
+
+def test_tokens_are_estimated_when_the_encoder_cannot_load(app, monkeypatch):
+    def unavailable():
+        raise OSError("cl100k_base could not be downloaded")
+    monkeypatch.setattr(app, "get_token_encoder", unavailable)
+    assert app.count_tokens("x" * 400) == 100
+    # main's extraction client still sends requests, counted with the estimate
+    reply = app.llm.chat(app.create_openai_client(), **chat_requests(1)[0])
+    assert json.loads(reply) == EXTRACTION_REPLY
@@ -0,0 +1,39 @@
+import json
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from waits import wait_for_network_idle
+
+
+class LogDriver:
+    """Replays batches of CDP Network events from the performance log, one batch per poll."""
+
+    def __init__(self, *batches):
+        self.batches = list(batches)
+
+    def get_log(self, kind):
+        events = self.batches.pop(0) if self.batches else []
+        return [{"message": json.dumps({"message": {"method": method, "params": {"requestId": request_id}}})}
+                for method, request_id in events]
+
+
+def test_network_idle_waits_for_requests_to_finish():
+    driver = LogDriver([("Network.requestWillBeSent", "1")], [], [], [("Network.loadingFinished", "1")])
+    started = time.monotonic()
+    wait_for_network_idle(driver, idle_time=0.2, timeout=5)
+    assert time.monotonic() - started >= 0.5
+
+
+def test_request_that_never_finishes_stops_blocking_idle():
+    driver = LogDriver([("Network.requestWillBeSent", "1")])
+    started = time.monotonic()
+    wait_for_network_idle(driver, idle_time=0.2, timeout=5, max_request_time=1)
+    assert time.monotonic() - started < 2
+
+
+def test_busy_network_times_out():
+    driver = LogDriver(*[[("Network.requestWillBeSent", str(n))] for n in range(100)])
+    with pytest.raises(TimeoutException):
+        wait_for_network_idle(driver, idle_time=0.2, timeout=1)
@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# How often the explicit waits re-check their condition
+POLL_INTERVAL = 0.1
+
+
+class StepTimings:
+    """Collects how long each named scraper step takes, and how many are running right now."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps = {}
+        self._running = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Call listener(step, seconds) for every recorded step."""
+        self._listeners.append(listener)
+
+    def record(self, step, seconds, failed=False):
+        with self._lock:
+            stats = self._steps.setdefault(step, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+            stats["count"] += 1
+            stats["errors"] += bool(failed)
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["last"] = seconds
+        for listener in self._listeners:
+            listener(step, seconds)
+
+    @contextmanager
+    def step(self, name):
+        with self._lock:
+            self._running[name] = self._running.get(name, 0) + 1
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._running[name] -= 1
+            self.record(name, time.perf_counter() - start, failed=failed)
+
+    def in_flight(self):
+        """Number of steps of each name that have started and not finished yet."""
+        with self._lock:
+            return dict(self._running)
+
+    def summary(self):
+        with self._lock:
+            return {
+                step: {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "total_s": round(stats["total"], 3),
+                    "avg_s": round(stats["total"] / stats["count"], 3),
+                    "max_s": round(stats["max"], 3),
+                    "last_s": round(stats["last"], 3),
+                }
+                for step, stats in self._steps.items()
+            }
+
+
+step_timings = StepTimings()
+
+
+def _wait(driver, timeout):
+    # Selenium's support package is slow to import, so it is only loaded once a browser is in use
+    from selenium.webdriver.support.ui import WebDriverWait
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL)
+
+
+def wait_for_new_window(driver, known_handles, timeout=15):
+    """Wait until a window that is not in known_handles appears and return its handle."""
+    known = set(known_handles)
+    _wait(driver, timeout).until(
+        lambda d: len(d.window_handles) > len(known)
+    )
+    return next(h for h in driver.window_handles if h not in known)
+
+
+def wait_for_document_ready(driver, timeout=30):
+    """Wait for document.readyState to reach 'complete'."""
+    _wait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") == "complete"
+    )
+
+
+def wait_for_staleness(driver, element, timeout=15):
+    """Wait until element has been detached from the DOM (e.g. after a form submit or grid refresh)."""
+    from selenium.webdriver.support import expected_conditions as EC
+    _wait(driver, timeout).until(EC.staleness_of(element))
+
+
+def wait_for_navigation(driver, old_html, old_url, timeout=15):
+    """Wait until the page whose <html> element was old_html has been replaced or the URL has changed."""
+    from selenium.webdriver.support import expected_conditions as EC
+    stale = EC.staleness_of(old_html)
+    _wait(driver, timeout).until(lambda d: stale(d) or d.current_url != old_url)
+
+
+def wait_for_any(driver, locators, timeout=10):
+    """Wait for the first of several (By, value) locators to match and return that element."""
+    def find(d):
+        for locator in locators:
+            elements = d.find_elements(*locator)
+            if elements:
+                return elements[0]
+        return False
+    return _wait(driver, timeout).until(find)
+
+
+def wait_for_attribute_change(driver, locator, attribute, old_value, timeout=15):
+    """Wait until the element at locator has a non-empty attribute different from old_value."""
+    def changed(d):
+        elements = d.find_elements(*locator)
+        if not elements:
+            return False
+        try:
+            value = elements[0].get_attribute(attribute)
+        except WebDriverException:
+            return False
+        return elements[0] if value and value != old_value else False
+    return _wait(driver, timeout).until(changed)
+
+
+def _drain_network_events(driver, in_flight):
+    """Apply Network.* CDP events from Chrome's performance log to in_flight,
+    a dict of request id to the time the request was sent.
+
+    Returns True if any network event was seen.
+    """
+    seen = False
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method", "")
+        if not method.startswith("Network."):
+            continue
+        seen = True
+        request_id = message.get("params", {}).get("requestId")
+        if method == "Network.requestWillBeSent":
+            in_flight[request_id] = time.monotonic()
+        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+            in_flight.pop(request_id, None)
+    return seen
+
+
+def wait_for_network_idle(driver, idle_time=0.5, timeout=30, max_request_time=5):
+    """Wait until no network requests have been in flight for idle_time seconds.
+
+    Uses the CDP Network events Chrome writes to the performance log (see
+    setup_driver). A request still open after max_request_time seconds (a
+    long poll, a beacon, or one whose page went away) stops counting as in
+    flight. If that log is not enabled, falls back to watching the page's
+    resource timing entries stop growing.
+    """
+    deadline = time.monotonic() + timeout
+    quiet_since = time.monotonic()
+    try:
+        in_flight = {}
+        while time.monotonic() < deadline:
+            seen = _drain_network_events(driver, in_flight)
+            stale_before = time.monotonic() - max_request_time
+            for request_id in [r for r, sent in in_flight.items() if sent < stale_before]:
+                del in_flight[request_id]
+            if seen or in_flight:
+                quiet_since = time.monotonic()
+            elif time.monotonic() - quiet_since >= idle_time:
+                return
+            time.sleep(POLL_INTERVAL)
+        raise TimeoutException(f"Network still busy after {timeout}s ({len(in_flight)} requests in flight)")
+    except WebDriverException as e:
+        if isinstance(e, TimeoutException):
+            raise
+    # No performance log on this driver: resource entry count as a proxy
+    last_count = -1
+    while time.monotonic() < deadline:
+        count = driver.execute_script("return performance.getEntriesByType('resource').length")
+        if count != last_count:
+            last_count = count
+            quiet_since = time.monotonic()
+        elif time.monotonic() - quiet_since >= idle_time:
+            return
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutException(f"Network still busy after {timeout}s")
+
+
+def wait_for_page_settled(driver, timeout=30, idle_time=0.5):
+    """readyState complete followed by a quiet network; a busy network only logs a note."""
+    wait_for_document_ready(driver, timeout)
+    try:
+        wait_for_network_idle(driver, idle_time=idle_time, timeout=timeout)
+    except TimeoutException as e:
+        print(f"Page loaded but network did not go idle: {e}")